@@ -28,6 +28,6 @@ g.set_infection( cb_fun )
 g.infect_seeds( set([g.get_node_by_name('1'), g.get_node_by_name('2'),g.get_node_by_name('3'),g.get_node_by_name('4')]) )
 
 # while there are still infected nodes, propagate the cascade.  print the volume infected at each step to stdout
-while( len(g.infected() ) > 0 ):
+while( g.n_infected() > 0 ):
     g.propagate()
-    print len( g.infected() )
+    print g.n_infected()
@@ -24,7 +24,7 @@ g.set_recovery( cb_fun )
 g.infect_seeds( set([g.get_node_by_name(1), g.get_node_by_name(2), g.get_node_by_name(3) ]) )
 
 # while there are still nodes that need to recover, allow the cascade to continue propagating.  print the results at each step (total infected) to stdout.
-while( len( g.infected() ) != 0 ):
+while( g.n_infected() != 0 ):
   g.propagate()
-  print len( g.infected() )
+  print g.n_infected()
 
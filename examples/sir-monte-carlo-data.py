@@ -15,45 +15,36 @@ except:
     sys.exit(1)
 
 from graphism import graph as g
+from graphism import ensemble
 
 NODES = 150
 PERIOD = 250
-infection_curves = []
 SEEDS = 5 # nodes initially infected
 TRANSMISSION_PROBABILITY = 0.001 # *100 = percent
 RECOVERY_PROBABILITY = 0.004 # *100 = percent
 ITERATIONS = 10
+WORKERS = 4
 
 if __name__ == '__main__':
     
-    tp = lambda parent, child: TRANSMISSION_PROBABILITY
-    rp = lambda node: RECOVERY_PROBABILITY
+    edges = []
+    for i in range(NODES):
+        for j in range(NODES):
+            if i != j:
+                edges.append((i,j))
     
-    for iteration in range(ITERATIONS):
-        infected = []
-        edges = []
-        seed_nodes = []
-        
-        for i in range(NODES):
-            for j in range(NODES):
-                if i != j:
-                    edges.append((i,j))
-        
-        graph = g.Graph(edges,
-                        transmission_probability=tp,
-                        recovery_probability=rp)    
-        
-        graph.infect_seeds([graph.get_node_by_name(n) for n in range(SEEDS)])
-        
-        for t in range(PERIOD):
-            graph.propagate()
-            infected.append(len(graph.infected()))
-            
-        infection_curves.append(infected)
-        
-        sys.stderr.write('.')
-        sys.stderr.flush()
-    dat = [numpy.mean(tup) for tup in zip(*infection_curves)]    
+    # The topology is built once and shared by every iteration.
+    graph = g.Graph(edges)
+    
+    result = ensemble.run(graph,
+                          seeds=range(SEEDS),
+                          steps=PERIOD,
+                          realizations=ITERATIONS,
+                          workers=WORKERS,
+                          transmission_probability=TRANSMISSION_PROBABILITY,
+                          recovery_probability=RECOVERY_PROBABILITY)
+    
+    dat = list(result['mean']['infected'][1:])
     fp = open( 'I.dat', 'w')
     pickle.dump( dat, fp )
     fp.close()
@@ -18,7 +18,6 @@ from graphism import graph as g
 NODES = 100
 
 PERIOD = 24
-infection_curves = []
 SEEDS = 5 # nodes initially infected
 TRANSMISSION_PROBABILITY = 0.01 # *100 = percent
 RECOVERY_PROBABILITY = 0.002 # *100 = percent
@@ -29,32 +28,21 @@ if __name__ == '__main__':
     tp = lambda parent, child: TRANSMISSION_PROBABILITY
     rp = lambda node: RECOVERY_PROBABILITY
     
-    for iteration in range(ITERATIONS):
-        infected = []
-        edges = []
-        seed_nodes = []
-        
-        for i in range(NODES):
-            for j in range(NODES):
-                if i != j:
-                    edges.append((i,j))
-        
-        graph = g.Graph(edges,
-                        transmission_probability=tp,
-                        recovery_probability=rp)    
-        
-        graph.infect_seeds([graph.get_node_by_name(n) for n in range(SEEDS)])
-        
-        for t in range(PERIOD):
-            graph.propagate()
-            infected.append(len(graph.infected()))
-            
-        infection_curves.append(infected)
-        
-        sys.stderr.write('.')
-        sys.stderr.flush()
+    edges = []
+    for i in range(NODES):
+        for j in range(NODES):
+            if i != j:
+                edges.append((i,j))
     
-    plt.plot([numpy.mean(tup) for tup in zip(*infection_curves)])
+    graph = g.Graph(edges,
+                    transmission_probability=tp,
+                    recovery_probability=rp)    
+    
+    # Every iteration is run at once, as one row of the result.
+    result = graph.run_batched(ITERATIONS, PERIOD, [graph.get_node_by_name(n) for n in range(SEEDS)])
+    infection_curves = result['infected'][:, 1:]
+    
+    plt.plot(infection_curves.mean(axis=0))
     plt.show()
 
-print [int(numpy.mean(tup)) for tup in zip(*infection_curves)]
\ No newline at end of file
+    print [int(mean) for mean in infection_curves.mean(axis=0)]
\ No newline at end of file
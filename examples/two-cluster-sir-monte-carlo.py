@@ -29,7 +29,6 @@ if __name__ == '__main__':
     rp = lambda node: RECOVERY_PROBABILITY
     
     for iteration in range(ITERATIONS):
-        infected = []
         edges = []
         seed_nodes = []
         
@@ -51,11 +50,7 @@ if __name__ == '__main__':
         
         graph.infect_seeds([graph.get_node_by_name(n) for n in range(SEEDS)])
         
-        for t in range(PERIOD):
-            graph.propagate()
-            infected.append(len(graph.infected()))
-            
-        infection_curves.append(infected)
+        infection_curves.append(graph.run(PERIOD)['infected'][1:])
         
         sys.stderr.write('.')
         sys.stderr.flush()
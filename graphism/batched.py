@@ -0,0 +1,214 @@
+import numpy
+
+from graphism.cache import probabilities
+from graphism.ensemble import COMPARTMENTS, realization_seed
+from graphism.rng import random_state, entropy
+from graphism.sir import SUSCEPTIBLE, INFECTED, RECOVERED, expand_rows, skip_sample, uniform_probability, run_steps
+
+class BatchedEngine(object):
+    """
+    Steps K independent SIR realizations on one graphism.compact.CompactGraph
+    together. The states are kept in a K x N uint8 matrix, and each step
+    expands the adjacency rows of the infected nodes of every realization in
+    one array pass, instead of traversing the graph once per realization.
+
+    Each realization draws from its own random stream, seeded with
+    graphism.ensemble.realization_seed, and its trials are drawn in an order
+    that only depends on its own state. With a constant transmission
+    probability only the successful trials are drawn, see
+    graphism.sir.skip_sample. A realization therefore gives the same
+    result no matter how many others run alongside it.
+
+    .. code-block:: python
+
+        engine = BatchedEngine(graph, realizations=100, seed=42)
+        engine.infect_seeds(['a', 'b'])
+        result = engine.run(250)
+        result['infected'] # A realizations x 251 array
+
+    Step semantics match graphism.sir.SIREngine.
+
+    :param graphism.compact.CompactGraph graph: The graph to simulate on. A graphism.graph.Graph is compacted first.
+    :param int realizations: The number of realizations, K.
+    :param transmission_probability: Either a float, or an array with the transmission probability of each stored edge. Defaults as described in graphism.cache.probabilities.
+    :param recovery_probability: Either a float, or an array with the recovery probability of each node. Defaults as described in graphism.cache.probabilities.
+    :param seed: The seed for the realizations, an int or a list of ints. Drawn with graphism.rng.entropy when omitted.
+    """
+    def __init__(self, graph, realizations, transmission_probability=None, recovery_probability=None, seed=None):
+        graph, transmission_probability, recovery_probability = probabilities(graph, transmission_probability, recovery_probability)
+        self.__graph = graph
+
+        self.__transmission_probability = uniform_probability(transmission_probability)
+        self.__recovery_probability = recovery_probability
+
+        if seed is None:
+            seed = entropy()
+        self.__random = [random_state(realization_seed(seed, k)) for k in xrange(realizations)]
+
+        self.__realizations = realizations
+        self.__state = numpy.zeros((realizations, len(graph)), dtype=numpy.uint8)
+        self.__flat = self.__state.reshape(-1)
+        self.__infected = numpy.zeros(0, dtype=numpy.int64)
+        self.__counts = numpy.zeros((realizations, 3), dtype=numpy.int64)
+        self.__counts[:, SUSCEPTIBLE] = len(graph)
+
+    def graph(self):
+        """
+        Getter for the graph the engine simulates on.
+
+        :rtype graphism.compact.CompactGraph:
+        """
+        return self.__graph
+
+    def realizations(self):
+        """
+        Returns the number of realizations.
+
+        :rtype int:
+        """
+        return self.__realizations
+
+    def state(self):
+        """
+        Returns the state matrix. Indexed by realization, then node id.
+
+        :rtype numpy.ndarray:
+        """
+        return self.__state
+
+    def counts(self):
+        """
+        Returns the susceptible, infected and recovered counts of every
+        realization.
+
+        :rtype numpy.ndarray: A K x 3 array.
+        """
+        return self.__counts
+
+    def infect_seeds(self, seed_nodes, realization=None):
+        """
+        Infects the seed nodes.
+
+        :param list(str) seed_nodes: The names of the nodes to infect.
+        :param int realization: The realization to infect them in. Every realization when omitted.
+        """
+        ids = numpy.array([self.__graph.get_node_by_name(name) for name in seed_nodes], dtype=numpy.int64)
+        self.infect_ids(ids, realization)
+
+    def infect_ids(self, ids, realization=None):
+        """
+        Infects the susceptible nodes among ids.
+
+        :param numpy.ndarray ids: The node ids to infect.
+        :param int realization: The realization to infect them in. Every realization when omitted.
+        """
+        n = len(self.__graph)
+        if realization is None:
+            realizations = numpy.arange(self.__realizations, dtype=numpy.int64)
+        else:
+            realizations = numpy.array([realization], dtype=numpy.int64)
+        flat = numpy.unique((realizations[:, None] * n + numpy.asarray(ids, dtype=numpy.int64)).ravel())
+        flat = flat[self.__flat[flat] == SUSCEPTIBLE]
+        self.__flat[flat] = INFECTED
+        self.__infected = numpy.union1d(self.__infected, flat)
+        infected = numpy.bincount(flat // n, minlength=self.__realizations)
+        self.__counts[:, SUSCEPTIBLE] -= infected
+        self.__counts[:, INFECTED] += infected
+
+    def __successes(self, groups, probability, weights=None):
+        # Returns the indices of the successful trials among trials grouped by
+        # realization, drawing each realization's trials from its own stream.
+        # With weights each entry of groups stands for that many trials.
+        counts = numpy.bincount(groups, weights, minlength=self.__realizations).astype(numpy.int64)
+        offsets = numpy.cumsum(counts) - counts
+        realizations = numpy.flatnonzero(counts).tolist()
+        if isinstance(probability, numpy.ndarray):
+            uniforms = [self.__random[k].random_sample(counts[k]) for k in realizations]
+            return numpy.flatnonzero(numpy.concatenate([numpy.zeros(0)] + uniforms) < probability)
+        hits = [offsets[k] + skip_sample(self.__random[k], probability, counts[k]) for k in realizations]
+        return numpy.concatenate([numpy.zeros(0, dtype=numpy.int64)] + hits)
+
+    def __skip_trials(self, owners, rows, probability):
+        # Numbers the trials of every edge of the infected nodes, which are
+        # grouped by realization, draws the successful ones and maps them back
+        # to realizations and target nodes.
+        indptr = self.__graph.indptr
+        starts = indptr[rows]
+        degrees = indptr[rows + 1] - starts
+        ends = numpy.cumsum(degrees)
+        hits = self.__successes(owners, probability, degrees)
+        pairs = numpy.searchsorted(ends, hits, side='right')
+        positions = starts[pairs] + hits - (ends[pairs] - degrees[pairs])
+        return owners[pairs], self.__graph.indices[positions]
+
+    def step(self):
+        """
+        Advances every realization by one step.
+
+        :rtype tuple(numpy.ndarray, numpy.ndarray): The newly infected and the newly recovered nodes, as indices into the flattened state matrix: realization * N + node id.
+        """
+        graph = self.__graph
+        n = len(graph)
+        flat = self.__flat
+        infected = self.__infected
+
+        owners = infected // n
+        rows = infected - owners * n
+        probability = self.__transmission_probability
+        if isinstance(probability, numpy.ndarray):
+            positions, _ = expand_rows(graph.indptr, rows)
+            trials = numpy.repeat(owners, graph.indptr[rows + 1] - graph.indptr[rows])
+            targets = graph.indices[positions]
+
+            exposed = flat[trials * n + targets] == SUSCEPTIBLE
+            positions = positions[exposed]
+            trials = trials[exposed]
+            targets = targets[exposed]
+
+            hits = self.__successes(trials, probability[positions])
+            trials = trials[hits]
+            targets = targets[hits]
+        else:
+            trials, targets = self.__skip_trials(owners, rows, probability)
+        exposed = flat[trials * n + targets] == SUSCEPTIBLE
+        newly_infected = numpy.unique(trials[exposed] * n + targets[exposed])
+
+        flat[newly_infected] = INFECTED
+        infected = numpy.insert(infected, numpy.searchsorted(infected, newly_infected), newly_infected)
+
+        owners = infected // n
+        probability = self.__recovery_probability
+        if isinstance(probability, numpy.ndarray):
+            probability = probability[infected - owners * n]
+        recovering = numpy.zeros(len(infected), dtype=bool)
+        recovering[self.__successes(owners, probability)] = True
+        newly_recovered = infected[recovering]
+
+        flat[newly_recovered] = RECOVERED
+        self.__infected = infected[~recovering]
+
+        infections = numpy.bincount(newly_infected // n, minlength=self.__realizations)
+        recoveries = numpy.bincount(newly_recovered // n, minlength=self.__realizations)
+        self.__counts[:, SUSCEPTIBLE] -= infections
+        self.__counts[:, INFECTED] += infections - recoveries
+        self.__counts[:, RECOVERED] += recoveries
+
+        return newly_infected, newly_recovered
+
+    def run(self, steps):
+        """
+        Runs every realization for a number of steps. Once no node is infected
+        in any realization the remaining steps are filled in without stepping.
+
+        :param int steps: The number of steps to run.
+
+        :rtype dict: The time, and the susceptible, infected and recovered curves as arrays of shape (realizations, steps + 1), plus their 'mean' and 'std' across realizations.
+        """
+        curves, _ = run_steps(self.step, lambda: self.__counts, steps, lambda: len(self.__infected))
+
+        result = {'time': numpy.arange(steps + 1, dtype=numpy.float64), 'mean': {}, 'std': {}}
+        for j, compartment in enumerate(COMPARTMENTS):
+            result[compartment] = curves[:, :, j].T.copy()
+            result['mean'][compartment] = result[compartment].mean(axis=0)
+            result['std'][compartment] = result[compartment].std(axis=0)
+        return result
@@ -0,0 +1,13 @@
+"""
+Benchmarks for graphism's hot paths over a range of graph sizes. Run them
+with:
+
+.. code-block:: bash
+
+    python -m graphism.benchmarks run --output before.json
+    python -m graphism.benchmarks run --output after.json
+    python -m graphism.benchmarks compare before.json after.json
+
+Each benchmark and size runs in its own process, so the peak memory it
+reports isn't inflated by earlier runs.
+"""
@@ -0,0 +1,183 @@
+import sys
+import json
+import time
+import timeit
+import platform
+import resource
+import argparse
+import subprocess
+
+from graphism.benchmarks.suite import BENCHMARKS, SIZES
+
+def peak_rss():
+    """
+    Returns the peak resident set size of this process in bytes.
+
+    :rtype int:
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return peak
+    return peak * 1024
+
+def measure(name, size, repeat=3):
+    """
+    Runs one benchmark at one size in this process.
+
+    :param str name: The name of the benchmark.
+    :param int size: The number of nodes.
+    :param int repeat: The number of timed repetitions.
+
+    :rtype dict: The name, size, the setup time, the fastest and mean time of a repetition, the peak memory after setup (setup_rss) and after the repetitions (peak_rss).
+    """
+    benchmark = BENCHMARKS[name]()
+    start = timeit.default_timer()
+    benchmark.setup(size)
+    setup_time = timeit.default_timer() - start
+    setup_rss = peak_rss()
+
+    times = []
+    for i in xrange(repeat):
+        benchmark.reset()
+        start = timeit.default_timer()
+        benchmark.run()
+        times.append(timeit.default_timer() - start)
+
+    return {'name': name,
+            'size': size,
+            'repeat': repeat,
+            'setup': setup_time,
+            'min': min(times),
+            'mean': sum(times) / len(times),
+            'setup_rss': setup_rss,
+            'peak_rss': peak_rss()}
+
+def measure_in_subprocess(name, size, repeat=3):
+    """
+    Runs measure in a fresh Python process, so the peak memory belongs to this
+    benchmark alone.
+
+    :rtype dict: The result of measure.
+    """
+    output = subprocess.check_output([sys.executable, '-m', 'graphism.benchmarks', 'measure', name, str(size), str(repeat)])
+    return json.loads(output.splitlines()[-1])
+
+def run(names=None, sizes=SIZES, repeat=3, all_sizes=False, isolate=True, log=None):
+    """
+    Runs benchmarks over sizes.
+
+    :param list(str) names: The benchmarks to run. All of them when omitted.
+    :param list(int) sizes: The sizes to run them at.
+    :param int repeat: The number of timed repetitions.
+    :param bool all_sizes: Whether to run sizes above each benchmark's max_size.
+    :param bool isolate: Whether to run each benchmark and size in its own process.
+    :param file log: Where to report progress.
+
+    :rtype dict: The environment and a list of results.
+    """
+    results = []
+    for name in sorted(names or BENCHMARKS):
+        for size in sizes:
+            if size > BENCHMARKS[name].max_size and not all_sizes:
+                continue
+            if isolate:
+                result = measure_in_subprocess(name, size, repeat)
+            else:
+                result = measure(name, size, repeat)
+            if log:
+                log.write('%-26s %9d %12.6fs %10.1fMB\n' % (name, size, result['min'], result['peak_rss'] / 1e6))
+            results.append(result)
+    return {'python': platform.python_version(),
+            'platform': platform.platform(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'results': results}
+
+def compare(old, new, threshold=0.1):
+    """
+    Compares two sets of results benchmark by benchmark.
+
+    :param dict old: The results to compare against.
+    :param dict new: The results to compare.
+    :param float threshold: The relative change in time below which a difference is noise.
+
+    :rtype list(dict): The name, size, old and new time and peak memory, the time ratio new / old, and the change: regression, improvement or an empty string.
+    """
+    before = dict(((r['name'], r['size']), r) for r in old['results'])
+    rows = []
+    for r in new['results']:
+        o = before.get((r['name'], r['size']))
+        if o is None:
+            continue
+        ratio = r['min'] / o['min'] if o['min'] else float('inf')
+        if ratio > 1.0 + threshold:
+            change = 'regression'
+        elif ratio < 1.0 - threshold:
+            change = 'improvement'
+        else:
+            change = ''
+        rows.append({'name': r['name'],
+                     'size': r['size'],
+                     'old': o['min'],
+                     'new': r['min'],
+                     'old_rss': o['peak_rss'],
+                     'new_rss': r['peak_rss'],
+                     'ratio': ratio,
+                     'change': change})
+    return rows
+
+def format_comparison(rows):
+    """
+    Formats the result of compare as a text table.
+
+    :rtype str:
+    """
+    lines = ['%-26s %9s %12s %12s %8s %10s %10s  %s' % ('benchmark', 'size', 'old', 'new', 'ratio', 'old MB', 'new MB', 'change')]
+    for row in rows:
+        lines.append('%-26s %9d %11.6fs %11.6fs %8.3f %10.1f %10.1f  %s' % (row['name'], row['size'], row['old'], row['new'], row['ratio'],
+                                                                            row['old_rss'] / 1e6, row['new_rss'] / 1e6, row['change']))
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m graphism.benchmarks')
+    commands = parser.add_subparsers(dest='command')
+
+    run_parser = commands.add_parser('run', help='Run benchmarks and save the results as JSON.')
+    run_parser.add_argument('--output', '-o', help='The file to save the results to. Printed when omitted.')
+    run_parser.add_argument('--benchmark', '-b', action='append', choices=sorted(BENCHMARKS), help='A benchmark to run. May be repeated. All of them by default.')
+    run_parser.add_argument('--sizes', default=','.join(str(size) for size in SIZES), help='Comma separated graph sizes.')
+    run_parser.add_argument('--repeat', type=int, default=3, help='Timed repetitions per benchmark and size.')
+    run_parser.add_argument('--all-sizes', action='store_true', help="Run sizes above each benchmark's max_size.")
+
+    compare_parser = commands.add_parser('compare', help='Compare two result files.')
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help='Relative change in time treated as noise.')
+    compare_parser.add_argument('--fail-on-regression', action='store_true', help='Exit with status 1 if anything got slower.')
+
+    measure_parser = commands.add_parser('measure', help='Run one benchmark at one size in this process and print its result.')
+    measure_parser.add_argument('name', choices=sorted(BENCHMARKS))
+    measure_parser.add_argument('size', type=int)
+    measure_parser.add_argument('repeat', type=int)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'measure':
+        print json.dumps(measure(args.name, args.size, args.repeat))
+    elif args.command == 'run':
+        sizes = [int(size) for size in args.sizes.split(',')]
+        results = run(args.benchmark, sizes, args.repeat, args.all_sizes, log=sys.stderr)
+        if args.output:
+            with open(args.output, 'w') as fp:
+                json.dump(results, fp, indent=2, sort_keys=True)
+        else:
+            print json.dumps(results, indent=2, sort_keys=True)
+    else:
+        with open(args.old) as fp:
+            old = json.load(fp)
+        with open(args.new) as fp:
+            new = json.load(fp)
+        rows = compare(old, new, args.threshold)
+        print format_comparison(rows)
+        if args.fail_on_regression and any(row['change'] == 'regression' for row in rows):
+            return 1
+    return 0
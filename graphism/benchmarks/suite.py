@@ -0,0 +1,221 @@
+import abc
+
+import numpy
+
+from graphism.graph import Graph
+from graphism.sir import SIREngine
+from graphism.compact import CompactGraph
+from graphism.generators import barabasi_albert as ba
+from graphism.generators import uniform as ug
+
+SIZES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6)
+
+def ba_edges(n, m=3):
+    """
+    Returns the edge list of a Barabasi-Albert graph with n nodes as tuples of
+    names, generated without building the graph.
+
+    :param int n: The number of nodes.
+    :param int m: The number of edges added with each node.
+
+    :rtype list(tuple(str, str)):
+    """
+    src, dst = ba.barabasi_albert_edges(m, n)
+    return zip(src.tolist(), dst.tolist())
+
+class Benchmark(object):
+    """
+    One benchmark. setup builds whatever the measured code needs and isn't
+    timed, reset runs untimed before every repetition and run is the code
+    that's timed.
+
+    Sizes above max_size are skipped unless the runner is told otherwise,
+    since the object model takes minutes and gigabytes there.
+    """
+    __metaclass__ = abc.ABCMeta
+
+    name = None
+    max_size = max(SIZES)
+
+    def setup(self, n):
+        pass
+
+    def reset(self):
+        pass
+
+    @abc.abstractmethod
+    def run(self):
+        """
+        Runs the timed code.
+
+        """
+
+class GraphConstruction(Benchmark):
+    """
+    Graph(edges) from a Barabasi-Albert edge list.
+
+    """
+    name = 'graph_construction'
+    max_size = 10 ** 5
+
+    def setup(self, n):
+        self.edges = ba_edges(n)
+
+    def run(self):
+        Graph(self.edges)
+
+class CompactConstruction(Benchmark):
+    """
+    CompactGraph.from_edge_arrays from Barabasi-Albert edge arrays.
+
+    """
+    name = 'compact_construction'
+
+    def setup(self, n):
+        self.src, self.dst = ba.barabasi_albert_edges(3, n)
+
+    def run(self):
+        CompactGraph.from_edge_arrays(self.src, self.dst)
+
+class PropagateStep(Benchmark):
+    """
+    One Graph.propagate() with 1% of a Barabasi-Albert graph infected.
+
+    """
+    name = 'propagate_step'
+    max_size = 10 ** 5
+
+    def setup(self, n):
+        self.graph = Graph(ba_edges(n), transmission_probability=lambda a, b: 0.1)
+        self.seeds = [str(i) for i in xrange(1, n + 1, 100)]
+
+    def reset(self):
+        self.graph.reset_state()
+        self.graph.infect_seeds([self.graph.get_node_by_name(name) for name in self.seeds])
+
+    def run(self):
+        self.graph.propagate()
+
+class PropagateToExtinction(PropagateStep):
+    """
+    Graph.propagate() until no node is infected, starting with 1% of a
+    Barabasi-Albert graph infected.
+
+    """
+    name = 'propagate_to_extinction'
+    max_size = 10 ** 5
+
+    def run(self):
+        while self.graph.n_infected():
+            self.graph.propagate()
+
+class EngineToExtinction(Benchmark):
+    """
+    graphism.sir.SIREngine.step() until no node is infected, starting with 1%
+    of a compact Barabasi-Albert graph infected.
+
+    """
+    name = 'engine_to_extinction'
+
+    def setup(self, n):
+        self.graph = ba.barabasi_albert(3, n, compact=True)
+        self.seeds = [str(i) for i in xrange(1, n + 1, 100)]
+        self.realization = 0
+
+    def reset(self):
+        self.engine = SIREngine(self.graph, transmission_probability=0.1, seed=self.realization)
+        self.engine.infect_seeds(self.seeds)
+        self.realization += 1
+
+    def run(self):
+        while self.engine.n_infected():
+            self.engine.step()
+
+class Closeness(Benchmark):
+    """
+    Graph.closeness() between the first and the last node of a
+    Barabasi-Albert graph, without the shortest path tree cache.
+
+    """
+    name = 'closeness'
+    max_size = 10 ** 5
+
+    def setup(self, n):
+        self.graph = Graph(ba_edges(n))
+        self.a = self.graph.get_node_by_name('1')
+        self.b = self.graph.get_node_by_name(str(n))
+
+    def reset(self):
+        self.graph.topology_changed()
+
+    def run(self):
+        self.graph.closeness(self.a, self.b)
+
+class BarabasiAlbert(Benchmark):
+    """
+    graphism.generators.barabasi_albert.barabasi_albert() with node objects.
+
+    """
+    name = 'barabasi_albert'
+    max_size = 10 ** 5
+
+    def setup(self, n):
+        self.n = n
+
+    def run(self):
+        ba.barabasi_albert(3, self.n)
+
+class BarabasiAlbertCompact(Benchmark):
+    """
+    graphism.generators.barabasi_albert.barabasi_albert() into a compact graph.
+
+    """
+    name = 'barabasi_albert_compact'
+
+    def setup(self, n):
+        self.n = n
+
+    def run(self):
+        ba.barabasi_albert(3, self.n, compact=True)
+
+class UniformBuild(Benchmark):
+    """
+    graphism.generators.uniform.build(), which creates n * (n - 1) edges.
+
+    """
+    name = 'uniform_build'
+    max_size = 10 ** 3
+
+    def setup(self, n):
+        self.n = n
+
+    def run(self):
+        ug.build(self.n)
+
+class UniformImplicit(Benchmark):
+    """
+    graphism.generators.uniform.build(implicit=True) and an epidemic to
+    extinction on it.
+
+    """
+    name = 'uniform_implicit'
+
+    def setup(self, n):
+        self.n = n
+
+    def run(self):
+        graph = ug.build(self.n, implicit=True, seed=1)
+        graph.infect_seeds(['1'])
+        while graph.n_infected():
+            graph.propagate()
+
+BENCHMARKS = dict((benchmark.name, benchmark) for benchmark in (GraphConstruction,
+                                                                CompactConstruction,
+                                                                PropagateStep,
+                                                                PropagateToExtinction,
+                                                                EngineToExtinction,
+                                                                Closeness,
+                                                                BarabasiAlbert,
+                                                                BarabasiAlbertCompact,
+                                                                UniformBuild,
+                                                                UniformImplicit))
@@ -0,0 +1,198 @@
+import weakref
+
+import numpy
+
+from graphism.compact import CompactGraph
+
+class ProbabilityCache(object):
+    """
+    Evaluates the transmission probability function of every edge and the
+    recovery probability function of every node of a graphism.graph.Graph
+    once, into arrays aligned with a compact copy of the graph:
+
+    .. code-block:: python
+
+        cache.transmission()[k] # The probability for the k-th stored edge of cache.compact()
+        cache.recovery()[i] # The probability for node i of cache.compact()
+
+    The arrays are built on first use and kept until invalidate is called.
+    graphism.graph.Graph invalidates its cache whenever its probability
+    functions or its topology change, so the probability functions must only
+    depend on static attributes of the nodes and edges.
+
+    :param graphism.graph.Graph graph: The graph to cache probabilities for.
+    """
+    __graph = None
+    __compact = None
+    __transmission = None
+    __recovery = None
+    __rows = None
+    __homogeneous = None
+
+    def __init__(self, graph):
+        self.__graph = weakref.ref(graph)
+
+    def invalidate(self):
+        """
+        Drops the cached probabilities. They're evaluated again on next use.
+
+        """
+        self.__compact = None
+        self.__transmission = None
+        self.__recovery = None
+        self.__rows = None
+        self.__homogeneous = None
+
+    def compact(self):
+        """
+        Returns the compact copy of the graph the cached arrays are aligned with.
+
+        :rtype graphism.compact.CompactGraph:
+        """
+        if self.__compact is None:
+            self.__build()
+        return self.__compact
+
+    def transmission(self):
+        """
+        Returns the transmission probability of each stored edge of compact().
+
+        :rtype numpy.ndarray:
+        """
+        if self.__compact is None:
+            self.__build()
+        return self.__transmission
+
+    def recovery(self):
+        """
+        Returns the recovery probability of each node of compact().
+
+        :rtype numpy.ndarray:
+        """
+        if self.__compact is None:
+            self.__build()
+        return self.__recovery
+
+    def __build(self):
+        graph = self.__graph()
+        compact = graph.compact()
+        nodes = [graph.get_node_by_name(name) for name in compact.names]
+
+        transmission = numpy.zeros(len(compact.indices), dtype=numpy.float64)
+        recovery = numpy.zeros(len(nodes), dtype=numpy.float64)
+        indptr = compact.indptr.tolist()
+        indices = compact.indices.tolist()
+        for u, node in enumerate(nodes):
+            for k in xrange(indptr[u], indptr[u + 1]):
+                transmission[k] = node.transmission_probability(nodes[indices[k]])
+            recovery[u] = node.get_recovery_probability()(node)
+
+        self.__compact = compact
+        self.__transmission = transmission
+        self.__recovery = recovery
+        self.__rows = {}
+
+    def transmission_probability(self, parent, child):
+        """
+        Returns the cached probability of transmission from parent to child.
+
+        :param graphism.node.Node parent: The infected node.
+        :param graphism.node.Node child: The node being exposed.
+
+        :rtype float:
+        """
+        if self.__compact is None:
+            self.__build()
+        row = self.__rows.get(parent.name())
+        if row is None:
+            compact = self.__compact
+            u = compact.get_node_by_name(parent.name())
+            start, end = compact.indptr[u], compact.indptr[u + 1]
+            row = dict(zip([compact.name(v) for v in compact.indices[start:end]],
+                           self.__transmission[start:end].tolist()))
+            self.__rows[parent.name()] = row
+        return row[child.name()]
+
+    def recovery_probability(self, node):
+        """
+        Returns the cached probability of node recovering.
+
+        :param graphism.node.Node node: The infected node.
+
+        :rtype float:
+        """
+        if self.__compact is None:
+            self.__build()
+        return self.__recovery[self.__compact.get_node_by_name(node.name())]
+
+    def is_homogeneous(self):
+        """
+        Indicates if every edge has the same transmission probability.
+
+        :rtype bool:
+        """
+        transmission = self.transmission()
+        return len(transmission) == 0 or bool((transmission == transmission[0]).all())
+
+    def homogeneous_probability(self):
+        """
+        Returns the transmission probability of every edge if they're all the
+        same, or None otherwise.
+
+        :rtype float:
+        """
+        if self.__compact is None:
+            self.__build()
+        if self.__homogeneous is None:
+            transmission = self.__transmission
+            if len(transmission) and (transmission == transmission[0]).all():
+                self.__homogeneous = (float(transmission[0]),)
+            else:
+                self.__homogeneous = (None,)
+        return self.__homogeneous[0]
+
+def default_transmission_probability(graph):
+    """
+    The array equivalent of graphism.helpers.tp. Returns multiplicity / degree
+    of the parent for every stored edge of graph.
+
+    :param graphism.compact.CompactGraph graph: The graph.
+
+    :rtype numpy.ndarray: The transmission probability of each stored edge.
+    """
+    degree = graph.degree()
+    rows = numpy.repeat(numpy.arange(len(graph)), numpy.diff(graph.indptr))
+    parent_degree = degree[rows]
+    probability = numpy.zeros(len(graph.indices), dtype=numpy.float64)
+    nonzero = parent_degree != 0
+    probability[nonzero] = graph.multiplicity[nonzero] / parent_degree[nonzero]
+    return probability
+
+def probabilities(graph, transmission_probability=None, recovery_probability=None):
+    """
+    Resolves the graph and probabilities a simulation engine runs with. For a
+    graphism.graph.Graph the graph is compacted and omitted probabilities come
+    from the graph's probability functions, evaluated once through its
+    ProbabilityCache (or a temporary one when the graph doesn't cache). For a
+    graphism.compact.CompactGraph omitted probabilities default to the array
+    equivalent of graphism.helpers.tp and to 0.5.
+
+    :param graph: A graphism.graph.Graph or graphism.compact.CompactGraph.
+    :param transmission_probability: Either a float, or an array with the transmission probability of each stored edge.
+    :param recovery_probability: Either a float, or an array with the recovery probability of each node.
+
+    :rtype tuple: The compact graph and the transmission and recovery probabilities.
+    """
+    if isinstance(graph, CompactGraph):
+        if transmission_probability is None:
+            transmission_probability = default_transmission_probability(graph)
+        if recovery_probability is None:
+            recovery_probability = 0.5
+        return graph, transmission_probability, recovery_probability
+
+    cache = graph.probability_cache() or ProbabilityCache(graph)
+    if transmission_probability is None:
+        transmission_probability = cache.transmission()
+    if recovery_probability is None:
+        recovery_probability = cache.recovery()
+    return cache.compact(), transmission_probability, recovery_probability
@@ -0,0 +1,233 @@
+import math
+
+import numpy
+
+from graphism.compact import CompactGraph
+from graphism.heap import IndexedHeap
+from graphism.parallel import map_shared, chunks
+from graphism.sir import expand_rows
+
+def edge_lengths(graph):
+    """
+    Returns a compact copy of graph and the length of each of its stored
+    edges. The lengths of a graphism.graph.Graph come from
+    graphism.edge.Edge.length(); a graphism.compact.CompactGraph uses its
+    weights.
+
+    :param graph: A graphism.graph.Graph or graphism.compact.CompactGraph.
+
+    :rtype tuple(graphism.compact.CompactGraph, numpy.ndarray):
+    """
+    if isinstance(graph, CompactGraph):
+        return graph, numpy.asarray(graph.weights, dtype=numpy.float64)
+
+    compact = graph.compact()
+    lengths = numpy.zeros(len(compact.indices), dtype=numpy.float64)
+    indptr = compact.indptr.tolist()
+    indices = compact.indices.tolist()
+    for u, name in enumerate(compact.names):
+        edges = graph.get_node_by_name(name).edges()
+        for k in xrange(indptr[u], indptr[u + 1]):
+            lengths[k] = edges[compact.name(indices[k])].length()
+    return compact, lengths
+
+def bfs(graph, source):
+    """
+    Returns the number of hops from source to every node, expanding a whole
+    frontier per level with array operations.
+
+    :param graphism.compact.CompactGraph graph: The graph.
+    :param int source: The id of the source.
+
+    :rtype numpy.ndarray: The distance to each node. Unreachable nodes have infinity.
+    """
+    distances = numpy.empty(len(graph), dtype=numpy.float64)
+    distances.fill(numpy.inf)
+    distances[source] = 0.0
+    frontier = numpy.array([source], dtype=numpy.int64)
+    level = 0
+    while len(frontier):
+        level += 1
+        positions, sources = expand_rows(graph.indptr, frontier)
+        neighbors = graph.indices[positions]
+        frontier = numpy.unique(neighbors[distances[neighbors] == numpy.inf])
+        distances[frontier] = level
+    return distances
+
+def dijkstra(graph, lengths, source):
+    """
+    Returns the shortest distance from source to every node.
+
+    :param graphism.compact.CompactGraph graph: The graph.
+    :param numpy.ndarray lengths: The length of each stored edge.
+    :param int source: The id of the source.
+
+    :rtype numpy.ndarray: The distance to each node. Unreachable nodes have infinity.
+    """
+    distances = numpy.empty(len(graph), dtype=numpy.float64)
+    distances.fill(numpy.inf)
+    indptr = graph.indptr
+    indices = graph.indices
+    final = numpy.zeros(len(graph), dtype=bool)
+    queue = IndexedHeap()
+    queue.push(source, 0.0)
+    while queue:
+        u, distance = queue.pop()
+        distances[u] = distance
+        final[u] = True
+        start, end = indptr[u], indptr[u + 1]
+        neighbors = indices[start:end]
+        candidates = distance + lengths[start:end]
+        better = ~final[neighbors] & (candidates < distances[neighbors])
+        for v, length in zip(neighbors[better].tolist(), candidates[better].tolist()):
+            if length < queue.priority(v, numpy.inf):
+                queue.push(v, length)
+    return distances
+
+class _Distances(object):
+    """
+    The read-only state the centrality workers share.
+
+    """
+    def __init__(self, graph, lengths):
+        self.graph = graph
+        self.lengths = lengths
+        self.unit = bool((lengths == 1.0).all())
+
+    def __call__(self, source):
+        if self.unit:
+            return bfs(self.graph, source)
+        return dijkstra(self.graph, self.lengths, source)
+
+def _accumulate(distances, sources):
+    """
+    Sums the distances from each source to every node, along with the number
+    of sources that reach each node and the sum of the reciprocal distances.
+
+    """
+    n = len(distances.graph)
+    reached = numpy.zeros(n, dtype=numpy.float64)
+    total = numpy.zeros(n, dtype=numpy.float64)
+    harmonic = numpy.zeros(n, dtype=numpy.float64)
+    eccentricity = 0.0
+    for source in sources:
+        d = distances(source)
+        d[source] = numpy.inf
+        finite = numpy.isfinite(d)
+        reached += finite
+        total[finite] += d[finite]
+        harmonic[finite] += 1.0 / d[finite]
+        if finite.any():
+            eccentricity = max(eccentricity, d[finite].max())
+    return reached, total, harmonic, eccentricity
+
+def _sums(graph, workers, pivots, seed):
+    graph, lengths = edge_lengths(graph)
+    distances = _Distances(graph, lengths)
+    n = len(graph)
+    if pivots is None or pivots >= n:
+        sources = range(n)
+    else:
+        sources = sorted(numpy.random.RandomState(seed).choice(n, pivots, replace=False).tolist())
+
+    reached = numpy.zeros(n, dtype=numpy.float64)
+    total = numpy.zeros(n, dtype=numpy.float64)
+    harmonic = numpy.zeros(n, dtype=numpy.float64)
+    eccentricity = 0.0
+    for r, t, h, e in map_shared(_accumulate, distances, chunks(sources, 4 * max(workers, 1)), workers=workers):
+        reached += r
+        total += t
+        harmonic += h
+        eccentricity = max(eccentricity, e)
+
+    scale = float(n) / len(sources) if sources else 0.0
+    shortest = lengths[lengths > 0].min() if (lengths > 0).any() else 1.0
+    return {'graph': graph,
+            'sources': len(sources),
+            'exact': len(sources) == n,
+            'reached': reached * scale,
+            'total': total * scale,
+            'harmonic': harmonic * scale,
+            'eccentricity': eccentricity,
+            'shortest': shortest}
+
+def _deviation(sums, confidence):
+    """
+    The Hoeffding bound on the deviation of a mean of sums['sources']
+    independent draws with values in [0, 1] at the given confidence.
+
+    """
+    if sums['exact']:
+        return 0.0
+    return math.sqrt(math.log(2.0 / (1.0 - confidence)) / (2.0 * sums['sources']))
+
+def closeness(graph, workers=1, pivots=None, seed=None, confidence=0.95):
+    """
+    Computes the closeness centrality of every node,
+
+    .. code-block:: python
+
+        closeness(v) = (r - 1) / (n - 1) * (r - 1) / sum(distance(u, v) for the r - 1 nodes u that reach v)
+
+    which is the inverse mean distance scaled by the fraction of the graph that
+    reaches v, so it's comparable across components. Unit length edges are
+    searched breadth first, others with Dijkstra's algorithm.
+
+    With pivots only that many sources, chosen uniformly at random, are
+    searched and the sums are scaled up (Eppstein and Wang). The error is
+    then a Hoeffding bound on the estimated mean distance to each node,
+    1 / closeness on a connected graph, that holds with the given confidence.
+    It assumes no distance exceeds twice the largest distance found from a
+    pivot, which holds for undirected graphs.
+
+    :param graph: A graphism.graph.Graph or graphism.compact.CompactGraph.
+    :param int workers: The number of worker processes the sources are spread across.
+    :param int pivots: The number of sources to sample. Every node is a source when omitted.
+    :param int seed: The seed for choosing pivots.
+    :param float confidence: The probability the error bound holds.
+
+    :rtype dict: 'centrality', indexed by the node ids of 'graph', the compact graph, and 'error'.
+    """
+    sums = _sums(graph, workers, pivots, seed)
+    n = len(sums['graph'])
+    reached = sums['reached']
+    centrality = numpy.zeros(n, dtype=numpy.float64)
+    nonzero = sums['total'] > 0
+    if n > 1:
+        centrality[nonzero] = reached[nonzero] ** 2 / ((n - 1) * sums['total'][nonzero])
+    error = 2.0 * sums['eccentricity'] * _deviation(sums, confidence) * n / max(n - 1, 1)
+    return {'graph': sums['graph'], 'centrality': centrality, 'error': error}
+
+def harmonic(graph, workers=1, pivots=None, seed=None, confidence=0.95):
+    """
+    Computes the harmonic centrality of every node, the sum of the reciprocal
+    distances from every other node. Unreachable nodes contribute 0. Unit
+    length edges are searched breadth first, others with Dijkstra's algorithm.
+
+    With pivots only that many sources, chosen uniformly at random, are
+    searched and the sums are scaled up. The error is then a Hoeffding bound
+    on the estimated centrality of each node that holds with the given
+    confidence.
+
+    :param graph: A graphism.graph.Graph or graphism.compact.CompactGraph.
+    :param int workers: The number of worker processes the sources are spread across.
+    :param int pivots: The number of sources to sample. Every node is a source when omitted.
+    :param int seed: The seed for choosing pivots.
+    :param float confidence: The probability the error bound holds.
+
+    :rtype dict: 'centrality', indexed by the node ids of 'graph', the compact graph, and 'error'.
+    """
+    sums = _sums(graph, workers, pivots, seed)
+    n = len(sums['graph'])
+    error = n / sums['shortest'] * _deviation(sums, confidence)
+    return {'graph': sums['graph'], 'centrality': sums['harmonic'], 'error': error}
+
+def by_name(result):
+    """
+    Keys the centrality of a result of closeness or harmonic by node name.
+
+    :param dict result: The result.
+
+    :rtype dict(str, float):
+    """
+    return dict(zip(result['graph'].names, result['centrality'].tolist()))
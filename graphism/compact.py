@@ -0,0 +1,426 @@
+import numpy
+
+def name_array(names):
+    """
+    Converts a list of node names to an array without coercing them to a
+    common type, e.g. a list mixing ints and strs gives an object array rather
+    than an array of strs.
+
+    :param list names: The node names.
+
+    :rtype numpy.ndarray:
+    """
+    array = numpy.asarray(names)
+    if array.dtype.kind not in 'iub' or len(set(type(name) for name in names)) > 1:
+        array = numpy.empty(len(names), dtype=object)
+        array[:] = names
+    return array
+
+class CompactGraph(object):
+    """
+    A compact, array-backed representation of a graph. Nodes are identified by
+    integer ids on [0, n) and the adjacency is stored in compressed sparse row
+    (CSR) form:
+
+    .. code-block:: python
+
+        neighbors of node i == indices[indptr[i]:indptr[i+1]]
+
+    with the parallel arrays weights, types and multiplicity holding the
+    attributes of each stored edge. Undirected edges are stored once in each
+    endpoint's row. Neighbor ids are sorted within a row.
+
+    Build one from an existing graph with CompactGraph.from_graph(graph) (or
+    graphism.graph.Graph.compact()) or directly from an edge list with
+    CompactGraph.from_edges(edges).
+
+    :param list names: The node names indexed by node id. Any sequence of names will do.
+    :param numpy.ndarray indptr: Row offsets into indices. Has length n + 1.
+    :param numpy.ndarray indices: The neighbor ids for each row.
+    :param numpy.ndarray weights: The weight of each stored edge.
+    :param numpy.ndarray types: The type code of each stored edge. Decoded through type_names.
+    :param numpy.ndarray multiplicity: The multiplicity of each stored edge.
+    :param list type_names: The edge type for each type code. type_names[0] is always None.
+    :param numpy.ndarray degree: The degree of each node. Computed from multiplicity when omitted.
+    :param bool directed: Whether or not the edges are directed.
+    """
+    names = None
+    indptr = None
+    indices = None
+    weights = None
+    types = None
+    multiplicity = None
+    type_names = None
+    directed = None
+
+    __degree = None
+    __ids = None
+
+    def __init__(self, names, indptr, indices, weights, types, multiplicity, type_names=None, degree=None, directed=False):
+        self.names = names
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.types = types
+        self.multiplicity = multiplicity
+        self.type_names = type_names or [None]
+        self.directed = directed
+
+        if degree is None:
+            rows = numpy.repeat(numpy.arange(len(names)), numpy.diff(indptr))
+            degree = numpy.bincount(rows, weights=multiplicity, minlength=len(names)).astype(numpy.float64)
+        self.__degree = degree
+
+    @classmethod
+    def from_graph(cls, graph):
+        """
+        Builds a compact copy of an existing graph. The node degrees are taken
+        from the nodes themselves so transmission probabilities computed on the
+        compact graph match the ones computed on graph.
+
+        :param graphism.graph.Graph graph: The graph to copy.
+
+        :rtype graphism.compact.CompactGraph:
+        """
+        nodes = list(graph.nodes())
+        nodes.sort(key=lambda n: n.name())
+        ids = dict((n.name(), i) for i, n in enumerate(nodes))
+
+        type_codes = {None: 0}
+        type_names = [None]
+
+        indptr = numpy.zeros(len(nodes) + 1, dtype=numpy.int64)
+        indices = []
+        weights = []
+        types = []
+        multiplicity = []
+        directed = False
+        for i, node in enumerate(nodes):
+            row = []
+            for name, edge in node.edges().items():
+                if edge.directed:
+                    directed = True
+                    if edge.parent() is not node:
+                        continue
+                if edge.type_ not in type_codes:
+                    type_codes[edge.type_] = len(type_names)
+                    type_names.append(edge.type_)
+                row.append((ids[name], edge.weight_, type_codes[edge.type_], edge.multiplicity))
+            row.sort()
+            for j, weight, type_, m in row:
+                indices.append(j)
+                weights.append(weight)
+                types.append(type_)
+                multiplicity.append(m)
+            indptr[i + 1] = len(indices)
+
+        return cls(names=[n.name() for n in nodes],
+                   indptr=indptr,
+                   indices=numpy.array(indices, dtype=numpy.int64),
+                   weights=numpy.array(weights, dtype=numpy.float64),
+                   types=numpy.array(types, dtype=numpy.int32),
+                   multiplicity=numpy.array(multiplicity, dtype=numpy.float64),
+                   type_names=type_names,
+                   degree=numpy.array([n.degree() for n in nodes], dtype=numpy.float64),
+                   directed=directed)
+
+    @classmethod
+    def from_edges(cls, edges, directed=False):
+        """
+        Builds a compact graph directly from an edge list, without creating any
+        graphism.node.Node or graphism.edge.Edge objects. Takes the same edge
+        lists graphism.graph.Graph does: either tuples of the form (from_, to_)
+        or dicts with the keys from_, to_, type_ and weight_.
+
+        Repeated edges increase the multiplicity of the edge by one. The weight
+        and type of the first occurrence are kept.
+
+        :param list edges: The edge list.
+        :param bool directed: Whether or not the edges are directed.
+
+        :rtype graphism.compact.CompactGraph:
+        """
+        src = []
+        dst = []
+        weight = []
+        type_ = []
+        for edge in edges:
+            if isinstance(edge, dict):
+                src.append(edge['from_'])
+                dst.append(edge['to_'])
+                weight.append(edge.get('weight_', 1.0))
+                type_.append(edge.get('type_', None))
+            else:
+                parent, child = edge
+                src.append(parent)
+                dst.append(child)
+
+        return cls.from_edge_arrays(name_array(src),
+                                    name_array(dst),
+                                    weight=weight or None,
+                                    type=type_ or None,
+                                    directed=directed)
+
+    @classmethod
+    def from_edge_arrays(cls, src, dst, weight=None, type=None, directed=False):
+        """
+        Builds a compact graph from parallel arrays of edge endpoints in a few
+        vectorized passes. Node names are interned once with numpy.unique,
+        repeated edges are merged into multiplicities with one sort, and the
+        CSR arrays are built from the sorted edges. Node ids follow the sorted
+        order of the names.
+
+        Repeated edges increase the multiplicity of the edge by one. The weight
+        and type of the first occurrence are kept.
+
+        :param numpy.ndarray src: The name of the parent of each edge.
+        :param numpy.ndarray dst: The name of the child of each edge.
+        :param numpy.ndarray weight: The weight of each edge. Defaults to 1.0.
+        :param numpy.ndarray type: The type of each edge. Defaults to None.
+        :param bool directed: Whether or not the edges are directed.
+
+        :rtype graphism.compact.CompactGraph:
+        """
+        src = numpy.asarray(src)
+        dst = numpy.asarray(dst)
+        names, ids = numpy.unique(numpy.concatenate((src, dst)), return_inverse=True)
+        n = len(names)
+        u = ids[:len(src)].astype(numpy.int64)
+        v = ids[len(src):].astype(numpy.int64)
+
+        if weight is None:
+            weight = numpy.ones(len(u), dtype=numpy.float64)
+        else:
+            weight = numpy.asarray(weight, dtype=numpy.float64)
+
+        type_names = [None]
+        if type is None:
+            types = numpy.zeros(len(u), dtype=numpy.int32)
+        else:
+            type = numpy.asarray(type, dtype=object)
+            present = numpy.array([t is not None for t in type], dtype=bool)
+            types = numpy.zeros(len(u), dtype=numpy.int32)
+            if present.any():
+                values, codes = numpy.unique(type[present], return_inverse=True)
+                type_names.extend(values.tolist())
+                types[present] = codes + 1
+
+        if not directed:
+            swap = v < u
+            u[swap], v[swap] = v[swap], u[swap]
+
+        # Merge repeated edges, keeping the attributes of the first occurrence.
+        key = u * n + v
+        order = numpy.argsort(key)
+        key = key[order]
+        starts = numpy.flatnonzero(numpy.concatenate(([True], key[1:] != key[:-1]))) if len(key) else numpy.zeros(0, dtype=numpy.int64)
+        multiplicity = numpy.diff(numpy.append(starts, len(key))).astype(numpy.float64)
+        first = numpy.minimum.reduceat(order, starts) if len(key) else starts
+        u, v, weight, types = u[first], v[first], weight[first], types[first]
+
+        # As in graphism.graph.Graph, a self edge adds two to the degree of its
+        # node and a half to its multiplicity.
+        degree = numpy.bincount(u, weights=multiplicity, minlength=n)
+        degree += numpy.bincount(v, weights=multiplicity, minlength=n)
+        loop = u == v
+        multiplicity[loop] += 0.5
+
+        if not directed:
+            u, v = numpy.concatenate((u, v[~loop])), numpy.concatenate((v, u[~loop]))
+            weight = numpy.concatenate((weight, weight[~loop]))
+            types = numpy.concatenate((types, types[~loop]))
+            multiplicity = numpy.concatenate((multiplicity, multiplicity[~loop]))
+
+        order = numpy.argsort(u * n + v)
+        indptr = numpy.zeros(n + 1, dtype=numpy.int64)
+        numpy.cumsum(numpy.bincount(u, minlength=n), out=indptr[1:])
+
+        return cls(names=names.tolist(),
+                   indptr=indptr,
+                   indices=v[order],
+                   weights=weight[order],
+                   types=types[order].astype(numpy.int32),
+                   multiplicity=multiplicity[order],
+                   type_names=type_names,
+                   degree=degree.astype(numpy.float64),
+                   directed=directed)
+
+    @classmethod
+    def from_edge_chunks(cls, chunks, directed=False):
+        """
+        Builds a compact graph from an iterable of edge array chunks, e.g. read
+        from a large file a block at a time. Each chunk is a tuple of
+        (src, dst) or (src, dst, weight, type) arrays as taken by
+        from_edge_arrays.
+
+        :param iterable chunks: The chunks of edges.
+        :param bool directed: Whether or not the edges are directed.
+
+        :rtype graphism.compact.CompactGraph:
+        """
+        columns = [[], [], [], []]
+        weighted = typed = False
+        for chunk in chunks:
+            chunk = tuple(chunk) + (None,) * (4 - len(chunk))
+            src, dst, weight, type_ = chunk
+            columns[0].append(numpy.asarray(src))
+            columns[1].append(numpy.asarray(dst))
+            weighted = weighted or weight is not None
+            typed = typed or type_ is not None
+            columns[2].append(numpy.ones(len(columns[0][-1])) if weight is None else numpy.asarray(weight, dtype=numpy.float64))
+            columns[3].append(numpy.empty(len(columns[0][-1]), dtype=object) if type_ is None else numpy.asarray(type_, dtype=object))
+
+        if not columns[0]:
+            return cls.from_edge_arrays(numpy.zeros(0), numpy.zeros(0), directed=directed)
+
+        return cls.from_edge_arrays(numpy.concatenate(columns[0]),
+                                    numpy.concatenate(columns[1]),
+                                    weight=numpy.concatenate(columns[2]) if weighted else None,
+                                    type=numpy.concatenate(columns[3]) if typed else None,
+                                    directed=directed)
+
+    def to_graph(self, **kwargs):
+        """
+        Returns a graphism.graph.Graph with the same nodes and edges. Takes the
+        same keyword arguments as graphism.graph.Graph.
+
+        :rtype graphism.graph.Graph:
+        """
+        from graphism.graph import Graph
+        return Graph.from_compact(self, **kwargs)
+
+    def save(self, path):
+        """
+        Writes the graph to path in the binary format described in
+        graphism.storage.
+
+        :param str path: The file to write.
+        """
+        from graphism import storage
+        storage.save(self, path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Reads a graph written by save. See graphism.storage.load.
+
+        :param str path: The file to read.
+        :param bool mmap: Whether to map the file read-only rather than read it into memory.
+
+        :rtype graphism.compact.CompactGraph:
+        """
+        from graphism import storage
+        return storage.load(path, mmap=mmap)
+
+    def get_node_by_name(self, name):
+        """
+        Returns the integer id of the node with that name.
+
+        :param str name: The name of the node.
+
+        :rtype int: The node id, or None if there is no node with that name.
+        """
+        if self.__ids is None:
+            self.__ids = dict((n, i) for i, n in enumerate(self.names))
+        return self.__ids.get(name, None)
+
+    def name(self, node_id):
+        """
+        Returns the name of the node with id node_id.
+
+        :param int node_id: The node id.
+
+        :rtype str:
+        """
+        return self.names[node_id]
+
+    def neighbors(self, node_id):
+        """
+        Returns the ids of the nodes adjacent to node_id. For directed graphs
+        these are the children of node_id.
+
+        :param int node_id: The node id.
+
+        :rtype numpy.ndarray:
+        """
+        return self.indices[self.indptr[node_id]:self.indptr[node_id + 1]]
+
+    def degree(self, node_id=None):
+        """
+        Returns the degree of node_id, or the array of all node degrees when
+        node_id is omitted.
+
+        :param int node_id: The node id.
+
+        :rtype float:
+        """
+        if node_id is None:
+            return self.__degree
+        return self.__degree[node_id]
+
+    def number_of_nodes(self):
+        """
+        Returns the number of nodes in the graph.
+
+        :rtype int:
+        """
+        return len(self.names)
+
+    def number_of_edges(self):
+        """
+        Returns the number of distinct edges in the graph. Multiplicity is
+        not counted.
+
+        :rtype int:
+        """
+        if self.directed:
+            return len(self.indices)
+        rows = numpy.repeat(numpy.arange(len(self.names)), numpy.diff(self.indptr))
+        return int(numpy.count_nonzero(rows <= self.indices))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        """
+        Returns a generator over the node names in the graph.
+
+        """
+        for name in self.names:
+            yield name
+
+    def __contains__(self, name):
+        return self.get_node_by_name(name) is not None
+
+    def edges(self):
+        """
+        Returns a generator over the edges in the graph. Undirected edges are
+        generated once.
+
+        :rtype generator(tuple(str, str, float, str, float)): Tuples of from_, to_, weight_, type_ and multiplicity.
+        """
+        indptr = self.indptr
+        indices = self.indices
+        for u in xrange(len(self.names)):
+            for k in xrange(indptr[u], indptr[u + 1]):
+                v = indices[k]
+                if not self.directed and v < u:
+                    continue
+                yield (self.names[u],
+                       self.names[v],
+                       float(self.weights[k]),
+                       self.type_names[self.types[k]],
+                       float(self.multiplicity[k]))
+
+    def export(self):
+        """
+        Returns the edgelist as a list of dictionaries to be used for initializing a new graph.
+
+        :rtype list(dict): Edges with attributes to be re-created.
+        """
+        return [{'from_': from_,
+                 'to_': to_,
+                 'weight_': weight_,
+                 'directed': self.directed,
+                 'type_': type_,
+                 'multiplicity': multiplicity} for from_, to_, weight_, type_, multiplicity in self.edges()]
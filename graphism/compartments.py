@@ -0,0 +1,339 @@
+import numpy
+
+from graphism.cache import probabilities
+from graphism.rng import random_state
+from graphism.sir import expand_rows, skip_sample, uniform_probability, run_steps
+
+class Transition(object):
+    """
+    Moves nodes from one state of a CompartmentModel to another.
+
+    :param str source: The state nodes leave.
+    :param str target: The state nodes enter.
+    :param probability: Either a float, or None to use the probability the engine is given.
+    """
+    def __init__(self, source, target, probability=None):
+        self.source = source
+        self.target = target
+        self.probability = probability
+
+    def states(self):
+        """
+        Returns the states the transition refers to.
+
+        :rtype tuple(str):
+        """
+        return (self.source, self.target)
+
+class Spontaneous(Transition):
+    """
+    Moves each node in source to target with a fixed probability per step,
+    like recovery. A probability of None uses the recovery probability of each
+    node given to the engine.
+
+    :param str source: The state nodes leave.
+    :param str target: The state nodes enter.
+    :param float probability: The probability per step, or None.
+    """
+
+class Induced(Transition):
+    """
+    Moves nodes in source to target through contact, like infection: every
+    neighbor in one of the states in by makes one trial per step, with the
+    transmission probability of the edge between them. A probability of None
+    uses the transmission probability of each edge given to the engine.
+
+    :param str source: The state nodes leave.
+    :param str target: The state nodes enter.
+    :param tuple(str) by: The states that transmit.
+    :param float probability: The probability per trial, or None.
+    """
+    def __init__(self, source, target, by, probability=None):
+        super(Induced, self).__init__(source, target, probability)
+        self.by = tuple(by)
+
+    def states(self):
+        return (self.source, self.target) + self.by
+
+class CompartmentModel(object):
+    """
+    Specifies a compartment model: the states a node can be in and the
+    transitions between them. Each step the transitions are applied in order,
+    each one seeing the states left by the ones before it.
+
+    .. code-block:: python
+
+        model = CompartmentModel(('susceptible', 'exposed', 'infected', 'recovered'),
+                                 [Spontaneous('exposed', 'infected', 0.2),
+                                  Induced('susceptible', 'exposed', by=('infected',)),
+                                  Spontaneous('infected', 'recovered')],
+                                 seed_state='infected')
+
+    :param tuple(str) states: The states. The first is the state every node starts in.
+    :param list(Transition) transitions: The transitions, in the order they're applied.
+    :param str seed_state: The state seed nodes are put in. Defaults to the second state.
+    """
+    def __init__(self, states, transitions, seed_state=None):
+        self.states = tuple(states)
+        if len(set(self.states)) != len(self.states):
+            raise ValueError("States must be unique.")
+        if len(self.states) > 255:
+            raise ValueError("A model can have at most 255 states.")
+        self.transitions = list(transitions)
+        self.seed_state = self.states[1] if seed_state is None else seed_state
+        for state in [self.seed_state] + [s for t in self.transitions for s in t.states()]:
+            if state not in self.states:
+                raise ValueError("Unknown state %s." % (state,))
+        self.__index = dict((state, i) for i, state in enumerate(self.states))
+
+    def index(self, state):
+        """
+        Returns the code of state in the engine's state array.
+
+        :param str state: The state.
+
+        :rtype int:
+        """
+        return self.__index[state]
+
+    def active_states(self):
+        """
+        Returns the codes of the states that can drive a transition: the
+        sources of spontaneous transitions and the transmitting states of
+        induced ones. The state can't change while none of them is occupied.
+
+        :rtype list(int):
+        """
+        active = set()
+        for transition in self.transitions:
+            if isinstance(transition, Induced):
+                active.update(self.index(state) for state in transition.by)
+            else:
+                active.add(self.index(transition.source))
+        return sorted(active)
+
+def sir():
+    """
+    The SIR model. Matches graphism.sir.SIREngine in distribution.
+
+    :rtype CompartmentModel:
+    """
+    return CompartmentModel(('susceptible', 'infected', 'recovered'),
+                            [Induced('susceptible', 'infected', by=('infected',)),
+                             Spontaneous('infected', 'recovered')])
+
+def sis():
+    """
+    The SIS model: recovered nodes are susceptible again.
+
+    :rtype CompartmentModel:
+    """
+    return CompartmentModel(('susceptible', 'infected'),
+                            [Induced('susceptible', 'infected', by=('infected',)),
+                             Spontaneous('infected', 'susceptible')])
+
+def seir(incubation_probability=0.5):
+    """
+    The SEIR model: infected nodes are exposed, and not yet infectious, until
+    they pass an incubation period.
+
+    :param float incubation_probability: The probability per step of an exposed node becoming infectious.
+
+    :rtype CompartmentModel:
+    """
+    return CompartmentModel(('susceptible', 'exposed', 'infected', 'recovered'),
+                            [Spontaneous('exposed', 'infected', incubation_probability),
+                             Induced('susceptible', 'exposed', by=('infected',)),
+                             Spontaneous('infected', 'recovered')],
+                            seed_state='infected')
+
+def sirs(waning_probability=0.1):
+    """
+    The SIRS model: immunity wanes and recovered nodes become susceptible
+    again.
+
+    :param float waning_probability: The probability per step of a recovered node losing immunity.
+
+    :rtype CompartmentModel:
+    """
+    return CompartmentModel(('susceptible', 'infected', 'recovered'),
+                            [Spontaneous('recovered', 'susceptible', waning_probability),
+                             Induced('susceptible', 'infected', by=('infected',)),
+                             Spontaneous('infected', 'recovered')])
+
+class CompartmentEngine(object):
+    """
+    Steps a CompartmentModel over a graphism.compact.CompactGraph. The state
+    of every node is one code in a uint8 array and each transition is applied
+    to every node at once with array operations, so adding states adds no
+    per-node containers. The ids of the nodes in each active state (see
+    CompartmentModel.active_states) are kept in an array too, so a step only
+    touches the nodes that can drive a transition and their edges, like
+    graphism.sir.SIREngine does with its infected nodes.
+
+    :param graphism.compact.CompactGraph graph: The graph to simulate on. A graphism.graph.Graph is compacted first.
+    :param CompartmentModel model: The model.
+    :param transmission_probability: Either a float, or an array with the transmission probability of each stored edge. Used by induced transitions without a probability. Defaults as described in graphism.cache.probabilities.
+    :param recovery_probability: Either a float, or an array with the recovery probability of each node. Used by spontaneous transitions without a probability. Defaults as described in graphism.cache.probabilities.
+    :param seed: The seed for the engine's random number generator, or a graphism.rng.RandomStream to draw from.
+    :param function callback: Executed once per transition per step with the transition and the array of ids of the nodes it moved. Not executed when it moved no node.
+    """
+    def __init__(self, graph, model, transmission_probability=None, recovery_probability=None, seed=None, callback=None):
+        graph, transmission_probability, recovery_probability = probabilities(graph, transmission_probability, recovery_probability)
+        self.__graph = graph
+        self.__model = model
+
+        self.__transmission_probability = uniform_probability(transmission_probability)
+        self.__recovery_probability = recovery_probability
+
+        self.__random = random_state(seed)
+
+        self.__state = numpy.zeros(len(graph), dtype=numpy.uint8)
+        self.__counts = numpy.zeros(len(model.states), dtype=numpy.int64)
+        self.__counts[0] = len(graph)
+        self.__active = model.active_states()
+        self.__members = dict((code, numpy.zeros(0, dtype=numpy.int64)) for code in self.__active)
+        if 0 in self.__members:
+            self.__members[0] = numpy.arange(len(graph), dtype=numpy.int64)
+        self.__callback = callback
+
+    def graph(self):
+        """
+        Getter for the graph the engine simulates on.
+
+        :rtype graphism.compact.CompactGraph:
+        """
+        return self.__graph
+
+    def model(self):
+        """
+        Getter for the model.
+
+        :rtype CompartmentModel:
+        """
+        return self.__model
+
+    def state(self):
+        """
+        Returns the state array. Indexed by node id; the codes are positions in
+        the model's states.
+
+        :rtype numpy.ndarray:
+        """
+        return self.__state
+
+    def count(self, state):
+        """
+        Returns the number of nodes in state.
+
+        :param str state: The state.
+
+        :rtype int:
+        """
+        return int(self.__counts[self.__model.index(state)])
+
+    def counts(self):
+        """
+        Returns the number of nodes in each state.
+
+        :rtype dict(str, int):
+        """
+        return dict(zip(self.__model.states, self.__counts.tolist()))
+
+    def infect_seeds(self, seed_nodes, state=None):
+        """
+        Moves the seed nodes to the model's seed state.
+
+        :param list(str) seed_nodes: The names of the nodes to start the infection with.
+        :param str state: The state to move them to instead of the seed state.
+        """
+        ids = numpy.array([self.__graph.get_node_by_name(name) for name in seed_nodes], dtype=numpy.int64)
+        self.infect_ids(ids, state)
+
+    def infect_ids(self, ids, state=None):
+        """
+        Moves the nodes among ids that are in the initial state to the model's
+        seed state.
+
+        :param numpy.ndarray ids: The node ids.
+        :param str state: The state to move them to instead of the seed state.
+        """
+        ids = numpy.unique(ids)
+        ids = ids[self.__state[ids] == 0]
+        self.__move(ids, 0, self.__model.index(state or self.__model.seed_state))
+
+    def __move(self, ids, source, target):
+        self.__state[ids] = target
+        self.__counts[source] -= len(ids)
+        self.__counts[target] += len(ids)
+        members = self.__members
+        if len(ids) and source != target:
+            if source in members:
+                members[source] = members[source][~numpy.in1d(members[source], ids, assume_unique=True)]
+            if target in members:
+                members[target] = numpy.concatenate((members[target], ids))
+
+    def step(self):
+        """
+        Advances the model by one step, applying each transition in order.
+
+        :rtype list(numpy.ndarray): The ids of the nodes moved by each transition.
+        """
+        model = self.__model
+        moved = []
+        for transition in model.transitions:
+            source = model.index(transition.source)
+            target = model.index(transition.target)
+            if isinstance(transition, Induced):
+                ids = self.__induced(source, [model.index(s) for s in transition.by], transition.probability)
+            else:
+                ids = self.__spontaneous(source, transition.probability)
+            self.__move(ids, source, target)
+            moved.append(ids)
+            if self.__callback is not None and len(ids):
+                self.__callback(transition, ids)
+        return moved
+
+    def __induced(self, source, by, probability):
+        graph = self.__graph
+        state = self.__state
+        if not self.__counts[source] or not self.__counts[by].any():
+            return numpy.zeros(0, dtype=numpy.int64)
+
+        transmitting = numpy.concatenate([self.__members[code] for code in by])
+        positions, _ = expand_rows(graph.indptr, transmitting)
+        positions = positions[state[graph.indices[positions]] == source]
+
+        if probability is None:
+            probability = self.__transmission_probability
+        if isinstance(probability, numpy.ndarray):
+            positions = positions[self.__random.random_sample(len(positions)) < probability[positions]]
+        else:
+            positions = positions[skip_sample(self.__random, probability, len(positions))]
+        return numpy.unique(graph.indices[positions])
+
+    def __spontaneous(self, source, probability):
+        if not self.__counts[source]:
+            return numpy.zeros(0, dtype=numpy.int64)
+        ids = self.__members[source]
+        if probability is None:
+            probability = self.__recovery_probability
+            if isinstance(probability, numpy.ndarray):
+                probability = probability[ids]
+        return ids[self.__random.random_sample(len(ids)) < probability]
+
+    def run(self, steps):
+        """
+        Runs the model for a number of steps. Once no node is in a state that
+        drives a transition the state can't change, so the remaining steps are
+        filled in without stepping.
+
+        :param int steps: The number of steps to run.
+
+        :rtype dict(str, numpy.ndarray): The time and the count of every state of the model. The first entry is the state before the first step.
+        """
+        counts, _ = run_steps(self.step, lambda: self.__counts, steps, lambda: self.__counts[self.__active].any())
+        result = {'time': numpy.arange(steps + 1, dtype=numpy.float64)}
+        for i, state in enumerate(self.__model.states):
+            result[state] = counts[:, i]
+        return result
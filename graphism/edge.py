@@ -1,5 +1,70 @@
 import weakref
 
+def weight_length(edge):
+    """
+    The default length of an edge, its weight.
+
+    :param graphism.edge.Edge edge: The edge.
+
+    :rtype float:
+    """
+    return edge.weight_
+
+class NeighborRef(weakref.ref):
+    """
+    A weak reference to one end of an edge, kept by the node at the other end.
+    It carries the edge instead of a closure, so the shared callbacks below
+    can find the node to clean up when the referenced node is collected.
+
+    """
+    __slots__ = ('edge',)
+
+    def __new__(cls, node, callback, edge):
+        return weakref.ref.__new__(cls, node, callback)
+
+    def __init__(self, node, callback, edge):
+        # weakref.ref.__init__ only checks the arguments __new__ already took.
+        self.edge = edge
+
+    def __eq__(self, other):
+        # weakref.ref only compares equal to references of the same type.
+        if not isinstance(other, weakref.ref):
+            return NotImplemented
+        node, other_node = self(), other()
+        if node is None or other_node is None:
+            return self is other
+        return node == other_node
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+    __hash__ = weakref.ref.__hash__
+
+def _child_collected(wr):
+    """
+    Called when the child of an edge is collected. Removes the edge from the
+    parent.
+
+    """
+    parent = wr.edge.parent()
+    if parent is not None:
+        parent.remove_child_ref(wr)
+        parent.remove_all_edges_by_name(wr.edge.child_name)
+
+def _parent_collected(wr):
+    """
+    Called when the parent of an edge is collected. Removes the edge from the
+    child.
+
+    """
+    child = wr.edge.child()
+    if child is not None:
+        child.remove_parent_ref(wr)
+        child.remove_all_edges_by_name(wr.edge.parent_name)
+
 class Edge(object):
     """
     Represents a Edge between the node containing the Edge and a parent or child node.
@@ -11,16 +76,12 @@ class Edge(object):
     :param float weight_: The weight of the edge.
     :param bool directed: Whether or not the edge is directed.
     :param function length: A function returning the length of the edge. Takes the edge as the only argument.
+    :param bool cleanup: If set to False the nodes get plain weak references to each other, without callbacks, so neither is pruned from the other when it's garbage collected.
+    :param bool attach: If set to False the edge isn't added to the edges of its nodes. The caller adds it, see graphism.node.Node.add_edges.
     """    
-    node = None
-    multiplicity = None
-    type_ = None
-    directed = None
-    weight_ = None
-    child = None
-    parent = None
+    __slots__ = ('parent', 'child', 'multiplicity', 'type_', 'weight_', 'directed', 'parent_name', 'child_name', '__length')
     
-    def __init__(self, parent, child, multiplicity=1L, type_=None, weight_=1.0, directed=False, length=None):
+    def __init__(self, parent, child, multiplicity=1L, type_=None, weight_=1.0, directed=False, length=None, cleanup=True, attach=True):
         assert isinstance(parent, weakref.ref)
         assert isinstance(child, weakref.ref)
         
@@ -31,24 +92,21 @@ class Edge(object):
         self.weight_ = weight_
         self.directed = directed
         
-        self.__length = length or (lambda e: e.weight_)
-        
-        self.__parent_name = parent().name()
-        self.__child_name = child().name()
-        
-        def parent_cleanup(wr):
-            self.parent().remove_child_ref(wr) 
-            self.parent().remove_all_edges_by_name(self.__child_name)
+        self.__length = length or weight_length
         
-        def child_cleanup(wr):
-            self.child().remove_parent_ref(wr)
-            self.child().remove_all_edges_by_name(self.__parent_name)
+        self.parent_name = parent().name()
+        self.child_name = child().name()
             
-        child().parents().add(weakref.ref(parent(), child_cleanup))
-        parent().children().add(weakref.ref(child(), parent_cleanup))
+        if cleanup:
+            child().parents().add(NeighborRef(parent(), _parent_collected, self))
+            parent().children().add(NeighborRef(child(), _child_collected, self))
+        else:
+            child().parents().add(parent)
+            parent().children().add(child)
         
-        parent().add_edge(child().name(), self)
-        child().add_edge(parent().name(), self)
+        if attach:
+            parent().add_edge(self.child_name, self)
+            child().add_edge(self.parent_name, self)
         
     def to_dict(self):
         """
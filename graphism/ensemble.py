@@ -0,0 +1,76 @@
+import numpy
+
+from graphism.cache import probabilities
+from graphism.rng import entropy
+from graphism.sir import SIREngine
+from graphism.parallel import map_shared, chunks
+
+COMPARTMENTS = ('susceptible', 'infected', 'recovered')
+
+def realization_seed(seed, realization):
+    """
+    Returns the seed for one realization of an ensemble. Each realization gets
+    its own random stream that only depends on seed and the realization index,
+    so results don't depend on how realizations are spread across workers.
+
+    :param seed: The seed for the whole ensemble, an int or a list of ints.
+    :param int realization: The index of the realization.
+
+    :rtype list(int):
+    """
+    return (list(seed) if isinstance(seed, (list, tuple)) else [seed]) + [realization]
+
+def _run_realizations(shared, realizations):
+    graph, seeds, steps, transmission_probability, recovery_probability, seed = shared
+    curves = numpy.zeros((len(realizations), len(COMPARTMENTS), steps + 1), dtype=numpy.int64)
+    for i, realization in enumerate(realizations):
+        engine = SIREngine(graph,
+                           transmission_probability=transmission_probability,
+                           recovery_probability=recovery_probability,
+                           seed=realization_seed(seed, realization))
+        engine.infect_ids(seeds)
+        result = engine.run(steps)
+        for j, compartment in enumerate(COMPARTMENTS):
+            curves[i, j] = result[compartment]
+    return curves
+
+def run(graph, seeds, steps, realizations, workers=1, transmission_probability=None, recovery_probability=None, seed=None):
+    """
+    Runs an ensemble of independent SIR realizations on one topology with
+    graphism.sir.SIREngine and returns their S/I/R curves. The graph is
+    compacted once and handed to each worker process once, rather than being
+    rebuilt or pickled for every realization. The probability functions of a
+    graphism.graph.Graph are evaluated once, see graphism.cache.probabilities.
+
+    .. code-block:: python
+
+        result = graphism.ensemble.run(graph, seeds=[0, 1, 2], steps=250, realizations=1000, workers=32)
+        result['mean']['infected'] # The mean I curve
+
+    :param graphism.compact.CompactGraph graph: The graph to simulate on. A graphism.graph.Graph is compacted first.
+    :param list(str) seeds: The names of the nodes infected at the start of every realization.
+    :param int steps: The number of steps in each realization.
+    :param int realizations: The number of realizations.
+    :param int workers: The number of worker processes.
+    :param transmission_probability: Either a float, or an array with the transmission probability of each stored edge. Defaults as described in graphism.cache.probabilities.
+    :param recovery_probability: Either a float, or an array with the recovery probability of each node. Defaults as described in graphism.cache.probabilities.
+    :param seed: The seed for the ensemble, an int or a list of ints. Drawn with graphism.rng.entropy when omitted.
+
+    :rtype dict: The susceptible, infected and recovered curves as arrays of shape (realizations, steps + 1), plus their 'mean' and 'std' across realizations.
+    """
+    graph, transmission_probability, recovery_probability = probabilities(graph, transmission_probability, recovery_probability)
+    if seed is None:
+        seed = entropy()
+
+    seed_ids = numpy.array([graph.get_node_by_name(name) for name in seeds], dtype=numpy.int64)
+    shared = (graph, seed_ids, steps, transmission_probability, recovery_probability, seed)
+    tasks = chunks(range(realizations), workers or 1)
+
+    curves = numpy.concatenate(map_shared(_run_realizations, shared, tasks, workers))
+
+    result = {'mean': {}, 'std': {}}
+    for j, compartment in enumerate(COMPARTMENTS):
+        result[compartment] = curves[:, j]
+        result['mean'][compartment] = curves[:, j].mean(axis=0)
+        result['std'][compartment] = curves[:, j].std(axis=0)
+    return result
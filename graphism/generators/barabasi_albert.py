@@ -1,78 +1,182 @@
 import random as r
 
+import numpy
+
 import graphism.graph as gg
 import graphism.node as gn
+from graphism.compact import CompactGraph
 
-# TODO: Add test coverage for barabasi_albert() and choose_nodes()
-
-def barabasi_albert( m, n, seed_graph=None ):
+def barabasi_albert( m, n, seed_graph=None, compact=False ):
     """
     The Barabasi-Albert model is a preferential attachment model that
-    dynamically generates an undirected, unweighted  graph with small 
-    world structure (geodesic length grows ~ ln(n)/ln(ln(n)) ), and 
-    clustering around central nodes.  The specified seed_graph will 
-    cause the graph generated to prefer to keep building on the modular 
-    structure that is already present.  
-    
+    dynamically generates an undirected, unweighted  graph with small
+    world structure (geodesic length grows ~ ln(n)/ln(ln(n)) ), and
+    clustering around central nodes.  The specified seed_graph will
+    cause the graph generated to prefer to keep building on the modular
+    structure that is already present.
+
+    Generation costs O(n*m): the endpoints of every edge are kept in one list,
+    so drawing a uniform entry from it chooses a node with probability
+    proportional to its degree.
+
     :param int m: The number of edges directed from each newly added node
     :param int n: The total number of nodes the final graph should contain
     :param graphism.graph.Graph seed_graph: The graph on which to build the final graph.  The default is two nodes with one edge connecting them.
-    
+    :param bool compact: If set to True the edges are emitted as arrays straight into a graphism.compact.CompactGraph, without creating node or edge objects.
+
     :rtype graphism.graph.Graph: A Barabasi Albert random graph
     """
     if n < 2:
         print "graph needs more nodes"
-        
+
+    if compact:
+        src, dst, names = barabasi_albert_ids( m, n, seed_graph )
+        BA_graph = CompactGraph.from_edge_arrays( src, dst )
+        BA_graph.names = [ names[ i ] for i in BA_graph.names ]
+        return BA_graph
+
     if seed_graph == None:
-        node_name = 3
-        BA_graph = gg.Graph([ ('1','2') ])
+        BA_graph = gg.Graph( [ ('1','2') ] )
     else:
-        node_name = len( seed_graph.nodes() ) + 1
         BA_graph = seed_graph
-        
-    while len( BA_graph.nodes() ) < n:
-        new_edges_to = choose_nodes( BA_graph, m )
-        new_node = gn.Node( name=str(node_name) )
+
+    nodes = BA_graph.n_susceptible() + BA_graph.n_infected() + BA_graph.n_recovered()
+    node_name = nodes + 1
+    endpoints = degree_list( BA_graph.nodes() )
+
+    while nodes < n:
+        new_node = str( node_name )
         node_name += 1
-        
-        BA_graph.add_node( new_node )
+        nodes += 1
+
+        new_edges_to = choose_endpoints( endpoints, m, nodes - 1 )
+        if not new_edges_to:
+            BA_graph.add_node( gn.Node( name=new_node,
+                                        transmission_probability=BA_graph.get_transmission_probability(),
+                                        recovery_probability=BA_graph.get_recovery_probability(),
+                                        graph=BA_graph ) )
         for edge_to in new_edges_to:
-            BA_graph.add_edge_by_node_sequence( new_node.name() , edge_to )
-            
+            BA_graph.add_edge_by_node_sequence( new_node, edge_to )
+            endpoints.append( new_node )
+            endpoints.append( edge_to )
+
     return BA_graph
-        
+
+def barabasi_albert_edges( m, n, seed_graph=None ):
+    """
+    Generates the edges of a Barabasi-Albert graph as arrays of node names, in
+    O(n*m) and without creating node or edge objects. Takes the same arguments
+    as barabasi_albert. The edges of seed_graph are included, repeated
+    according to their multiplicity.
+
+    :param int m: The number of edges directed from each newly added node
+    :param int n: The total number of nodes the final graph should contain
+    :param seed_graph: A graphism.graph.Graph or graphism.compact.CompactGraph to build on.  The default is two nodes with one edge connecting them.
+
+    :rtype tuple(numpy.ndarray, numpy.ndarray): The names of the parent and the child of each edge.
+    """
+    src, dst, names = barabasi_albert_ids( m, n, seed_graph )
+    table = numpy.empty( len( names ), dtype=object )
+    table[:] = names
+    return table[src], table[dst]
+
+def barabasi_albert_ids( m, n, seed_graph=None ):
+    """
+    Generates the edges of a Barabasi-Albert graph as arrays of integer node
+    ids. Takes the same arguments as barabasi_albert.
+
+    :param int m: The number of edges directed from each newly added node
+    :param int n: The total number of nodes the final graph should contain
+    :param seed_graph: A graphism.graph.Graph or graphism.compact.CompactGraph to build on.  The default is two nodes with one edge connecting them.
+
+    :rtype tuple(numpy.ndarray, numpy.ndarray, list(str)): The ids of the parent and the child of each edge and the name of each id.
+    """
+    src = []
+    dst = []
+    if seed_graph == None:
+        names = [ '1', '2' ]
+        src.append( 0 )
+        dst.append( 1 )
+    else:
+        if not isinstance( seed_graph, CompactGraph ):
+            seed_graph = seed_graph.compact()
+        names = list( seed_graph.names )
+        indptr = seed_graph.indptr.tolist()
+        indices = seed_graph.indices.tolist()
+        multiplicity = seed_graph.multiplicity.tolist()
+        for u in xrange( len( names ) ):
+            for k in xrange( indptr[ u ], indptr[ u + 1 ] ):
+                if indices[ k ] >= u or seed_graph.directed:
+                    for i in xrange( int( round( multiplicity[ k ] ) ) ):
+                        src.append( u )
+                        dst.append( indices[ k ] )
+
+    endpoints = src + dst
+    nodes = len( names )
+    while nodes < n:
+        new_node = nodes
+        names.append( str( nodes + 1 ) )
+        nodes += 1
+
+        for edge_to in choose_endpoints( endpoints, m, nodes - 1 ):
+            src.append( new_node )
+            dst.append( edge_to )
+            endpoints.append( new_node )
+            endpoints.append( edge_to )
+
+    return numpy.array( src, dtype=numpy.int64 ), numpy.array( dst, dtype=numpy.int64 ), names
+
+def degree_list( nodes ):
+    """
+    Returns a list holding the name of each node once per unit of its degree, so
+    a uniform draw from the list chooses nodes with probability proportional to
+    their degree.
+
+    :param iterable(graphism.node.Node) nodes: The nodes.
+
+    :rtype list(str):
+    """
+    endpoints = []
+    for node in nodes:
+        endpoints.extend( [ node.name() ] * int( round( node.degree() ) ) )
+    return endpoints
+
+def choose_endpoints( endpoints, m, available ):
+    """
+    Chooses m distinct nodes by drawing uniformly from a list of edge endpoints,
+    i.e. with probabilities proportional to their degree.
+
+    :param list(str) endpoints: The endpoints of every edge in the graph, see degree_list.
+    :param int m: the number of nodes to choose
+    :param int available: The number of nodes in the graph. At most this many nodes are chosen.
+
+    :rtype list(str): list of chosen node names
+    """
+    if not endpoints:
+        return []
+    m = min( m, available )
+    chosen = []
+    seen = set()
+    draws = 0
+    while len( chosen ) < m:
+        name = endpoints[ int( r.random() * len( endpoints ) ) ]
+        if name not in seen:
+            seen.add( name )
+            chosen.append( name )
+        draws += 1
+        if draws == 20 * m + 100:
+            # Fewer than m nodes might have edges at all.
+            m = min( m, len( set( endpoints ) ) )
+    return chosen
+
 def choose_nodes(g, m):
     """
     choose m nodes from the graph g, where the nodes are chosen with probabilities proportional to their total degree.
-    
+
     :param graphism.graph.Graph g: the graph from which to choose the nodes
     :param int m: the number of nodes to choose
-    
+
     :rtype list(graphism.node.Node): list of chosen nodes
     """
-    tot_deg = 0
-    nodelist = []
-
-    for node in g.nodes():
-        tot_deg += node.degree()
-      
-    probs = [ (node.name(), float( node.degree()) / float( tot_deg) )  for node in g.nodes() ] # calculate node selection probabilities based on degree
-    cdf = [ 0 ] # cumulative distribution function of node probability list, to be calculated
-    for i, dat in enumerate( probs ):
-        p_i = dat[ 1 ] 
-        cdf.append( cdf[ i ] + p_i )
-    
-    # choose m nodes
-    while len(nodelist) < m:
-        n = r.random()
-        for i, entry in enumerate( cdf ):
-            if n > entry and n < cdf[ i + 1]:
-                res = probs[i][0]
-                if res not in nodelist:
-                    nodelist.append( res )
-                    break
-                else:
-                    continue
-                
-    return nodelist
-
+    nodes = list( g.nodes() )
+    return choose_endpoints( degree_list( nodes ), m, len( nodes ) )
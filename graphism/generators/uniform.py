@@ -1,4 +1,8 @@
+import numpy
+
 import graphism.graph as gg
+from graphism.sir import SUSCEPTIBLE, INFECTED, RECOVERED, run_steps
+from graphism.rng import random_state, spawn_state
 
 def trans_prob(a, b):
     """
@@ -11,14 +15,21 @@ def trans_prob(a, b):
     """
     return 0.9
 
-def build( n ):
+def build( n, implicit=False, seed=None ):
     """
     Takes n, the number of nodes to be in the final graph, and returns a graph where each node is connected by one edge to every other node.  There are no self edges.  This is the graph assumed by the SIR model, so this graph can be used to simulate that model.
+
+    With implicit the edges are never created. A MeanFieldGraph with the same transmission and recovery probabilities is returned instead, which simulates the same epidemic from compartment counts. It has propagate, run, reset_state and the compartment counts of graphism.graph.Graph, but it works with node names rather than graphism.node.Node objects: infect_seeds takes names and infected, susceptible and recovered return sets of names. It has no nodes, edges, get_node_by_name or callbacks.
     
     :param int n: the number of nodes in the final graph
+    :param bool implicit: If set to True a MeanFieldGraph is returned.
+    :param int seed: The seed for the random number generator of the MeanFieldGraph.
     
-    :rtype graphism.graph.Graph: a uniform graph
+    :rtype graphism.graph.Graph: a uniform graph, or a graphism.generators.uniform.MeanFieldGraph when implicit is set
     """
+    if implicit:
+        return MeanFieldGraph( n, transmission_probability=trans_prob( None, None ), recovery_probability=0.5, seed=seed )
+
     edgelist = []
     nodelist = range(1,n+1)
     for i in nodelist:
@@ -27,4 +38,185 @@ def build( n ):
                 edgelist.append((str(i),str(j)))
                 
     return gg.Graph( edgelist, transmission_probability=trans_prob )
-    
+
+class MeanFieldGraph(object):
+    """
+    A complete graph whose edges are never materialized. Since every node is
+    connected to every other node the nodes within a compartment are
+    interchangeable, so a step only needs the compartment counts: each of the
+    S susceptible nodes is exposed once by each of the I infected nodes, so
+
+    .. code-block:: python
+
+        newly_infected ~ binomial(S, 1 - (1 - transmission_probability) ** I)
+        newly_recovered ~ binomial(I, recovery_probability)
+
+    which is the same in distribution as graphism.graph.Graph.propagate() on
+    the graph built by build( n ).
+
+    Nodes are named '1' through str(n), like the nodes of build( n ). To know
+    which nodes are in each compartment the node ids are kept in one array
+    ordered recovered, infected, susceptible. The susceptible block is kept in
+    random order, so the first nodes of the block are a uniform choice of the
+    nodes to infect. The array is only brought up to date when names are asked
+    for, so runs that only look at the counts never touch it. It's shuffled
+    from its own random stream, so asking for names doesn't change the counts
+    drawn for a seed.
+
+    It isn't a drop-in graphism.graph.Graph: there are no node or edge
+    objects, so infect_seeds takes node names, infected, susceptible and
+    recovered return sets of names, and there's no get_node_by_name, no
+    infection or recovery callbacks and no observers. propagate, run,
+    reset_state and the n_infected, n_susceptible and n_recovered counts
+    behave like the Graph methods of the same names.
+
+    :param int n: The number of nodes.
+    :param float transmission_probability: The probability an infected node infects a susceptible node in one step.
+    :param float recovery_probability: The probability an infected node recovers in one step.
+    :param seed: The seed for the random number generator, or a graphism.rng.RandomStream to draw from.
+    """
+    def __init__( self, n, transmission_probability=0.9, recovery_probability=0.5, seed=None ):
+        self.__n = n
+        self.__transmission_probability = transmission_probability
+        self.__recovery_probability = recovery_probability
+        self.__random = random_state( seed )
+        self.__ordering = spawn_state( seed )
+        self.reset_state()
+
+    def reset_state( self ):
+        """
+        Moves every node back to susceptible.
+
+        """
+        self.__order = self.__ordering.permutation( self.__n )
+        self.__counts = [ self.__n, 0, 0 ]
+        self.__ordered = [ self.__n, 0, 0 ]
+        self.__pending = []
+
+    def __len__( self ):
+        return self.__n
+
+    def __sync( self ):
+        susceptible, infected, recovered = self.__ordered
+        for newly_infected, newly_recovered in self.__pending:
+            infected += newly_infected
+            if newly_recovered:
+                # Any newly_recovered of the infected nodes recover with the same chance.
+                self.__ordering.shuffle( self.__order[ recovered:recovered + infected ] )
+            infected -= newly_recovered
+            recovered += newly_recovered
+        self.__pending = []
+        self.__ordered = list( self.__counts )
+
+    def __block( self, compartment ):
+        self.__sync()
+        susceptible, infected, recovered = self.__counts
+        if compartment == RECOVERED:
+            return self.__order[ :recovered ]
+        if compartment == INFECTED:
+            return self.__order[ recovered:recovered + infected ]
+        return self.__order[ recovered + infected: ]
+
+    def __names( self, compartment ):
+        return set( str( i + 1 ) for i in self.__block( compartment ).tolist() )
+
+    def infect_seeds( self, seed_nodes ):
+        """
+        Infects the seed nodes.
+
+        :param list(str) seed_nodes: The names of the nodes to start the infection with.
+        """
+        self.__sync()
+        ids = set( int( name ) - 1 for name in seed_nodes )
+        order = self.__order
+        start = self.__counts[ RECOVERED ] + self.__counts[ INFECTED ]
+        positions = start + numpy.flatnonzero( numpy.isin( order[ start: ], list( ids ) ) )
+        for i, position in enumerate( positions.tolist() ):
+            order[ start + i ], order[ position ] = order[ position ], order[ start + i ]
+        self.__counts[ SUSCEPTIBLE ] -= len( positions )
+        self.__counts[ INFECTED ] += len( positions )
+        self.__ordered = list( self.__counts )
+
+    def propagate( self ):
+        """
+        First infects nodes according to the probability of transmission.
+        Second, recovers nodes depending on the probability of recovery.
+
+        """
+        susceptible, infected, recovered = self.__counts
+        if not infected:
+            return
+
+        escape = ( 1.0 - self.__transmission_probability ) ** infected
+        newly_infected = self.__random.binomial( susceptible, 1.0 - escape )
+        susceptible -= newly_infected
+        infected += newly_infected
+
+        newly_recovered = self.__random.binomial( infected, self.__recovery_probability )
+        infected -= newly_recovered
+        recovered += newly_recovered
+
+        self.__counts = [ susceptible, infected, recovered ]
+        self.__pending.append( ( newly_infected, newly_recovered ) )
+
+    def run( self, steps ):
+        """
+        Runs the epidemic for a number of steps.
+
+        :param int steps: The number of steps to run.
+
+        :rtype dict(str, numpy.ndarray): The time, susceptible, infected and recovered counts. The first entry is the state before the first step.
+        """
+        counts, _ = run_steps( self.propagate, lambda: self.__counts, steps, lambda: self.__counts[ INFECTED ] )
+        return { 'time': numpy.arange( steps + 1, dtype=numpy.float64 ),
+                 'susceptible': counts[ :, SUSCEPTIBLE ],
+                 'infected': counts[ :, INFECTED ],
+                 'recovered': counts[ :, RECOVERED ] }
+
+    def infected( self ):
+        """
+        Returns the names of the infected nodes.
+
+        :rtype set(str):
+        """
+        return self.__names( INFECTED )
+
+    def susceptible( self ):
+        """
+        Returns the names of the susceptible nodes.
+
+        :rtype set(str):
+        """
+        return self.__names( SUSCEPTIBLE )
+
+    def recovered( self ):
+        """
+        Returns the names of the recovered nodes.
+
+        :rtype set(str):
+        """
+        return self.__names( RECOVERED )
+
+    def n_infected( self ):
+        """
+        Returns the number of infected nodes.
+
+        :rtype int:
+        """
+        return self.__counts[ INFECTED ]
+
+    def n_susceptible( self ):
+        """
+        Returns the number of susceptible nodes.
+
+        :rtype int:
+        """
+        return self.__counts[ SUSCEPTIBLE ]
+
+    def n_recovered( self ):
+        """
+        Returns the number of recovered nodes.
+
+        :rtype int:
+        """
+        return self.__counts[ RECOVERED ]
@@ -0,0 +1,169 @@
+import numpy
+
+from graphism.cache import probabilities
+from graphism.heap import IndexedHeap
+from graphism.rng import random_state
+from graphism.sir import SUSCEPTIBLE, INFECTED, RECOVERED
+
+def rate(probability):
+    """
+    Converts a per-step probability into the rate of a Poisson process with
+    the same chance of at least one event per unit of time, -ln(1 - p).
+
+    :param probability: A float or an array of floats on [0,1].
+
+    :rtype numpy.ndarray:
+    """
+    with numpy.errstate(divide='ignore'):
+        return -numpy.log1p(-numpy.asarray(probability, dtype=numpy.float64))
+
+def sample(result, times):
+    """
+    Samples a continuous-time result at the given times so it can be compared
+    with the per-step counts of graphism.graph.Graph.propagate() or
+    graphism.sir.SIREngine.run().
+
+    :param dict result: The result of GillespieEngine.run().
+    :param numpy.ndarray times: The times to sample at, e.g. numpy.arange(steps + 1).
+
+    :rtype dict(str, numpy.ndarray): The time, susceptible, infected and recovered counts at times.
+    """
+    times = numpy.asarray(times, dtype=numpy.float64)
+    i = numpy.searchsorted(result['time'], times, side='right') - 1
+    i[i < 0] = 0
+    sampled = {'time': times}
+    for compartment in ('susceptible', 'infected', 'recovered'):
+        sampled[compartment] = result[compartment][i]
+    return sampled
+
+class GillespieEngine(object):
+    """
+    Simulates an SIR epidemic in continuous time with the next-reaction
+    method. Each node has at most one scheduled event in an indexed priority
+    queue: its recovery when it's infected, or its earliest pending infection
+    when it's susceptible. The cost scales with the number of transmission and
+    recovery events rather than with steps times edges.
+
+    Per-step probabilities are converted to rates with graphism.gillespie.rate,
+    so one unit of time corresponds to one call to
+    graphism.graph.Graph.propagate(). Use graphism.gillespie.sample to put the
+    result on the same time axis as the discrete-step model.
+
+    :param graphism.compact.CompactGraph graph: The graph to simulate on. A graphism.graph.Graph is compacted first.
+    :param transmission_probability: Either a float, or an array with the per-step transmission probability of each stored edge. Defaults as described in graphism.cache.probabilities.
+    :param recovery_probability: Either a float, or an array with the per-step recovery probability of each node. Defaults as described in graphism.cache.probabilities.
+    :param seed: The seed for the engine's random number generator, or a graphism.rng.RandomStream to draw from.
+    """
+    def __init__(self, graph, transmission_probability=None, recovery_probability=None, seed=None):
+        graph, transmission_probability, recovery_probability = probabilities(graph, transmission_probability, recovery_probability)
+        self.__graph = graph
+
+        self.__transmission_rate = rate(transmission_probability) * numpy.ones(len(graph.indices))
+        self.__recovery_rate = rate(recovery_probability) * numpy.ones(len(graph))
+
+        self.__random = random_state(seed)
+
+        self.__state = numpy.zeros(len(graph), dtype=numpy.uint8)
+        self.__infector = -numpy.ones(len(graph), dtype=numpy.int64)
+        self.__events = IndexedHeap()
+        self.__time = 0.0
+        self.__counts = [len(graph), 0, 0]
+
+    def state(self):
+        """
+        Returns the state array. Indexed by node id.
+
+        :rtype numpy.ndarray:
+        """
+        return self.__state
+
+    def infector(self):
+        """
+        Returns the id of the node each node was infected by. Seeds and nodes
+        that were never infected have -1.
+
+        :rtype numpy.ndarray:
+        """
+        return self.__infector
+
+    def time(self):
+        """
+        Returns the time of the last event.
+
+        :rtype float:
+        """
+        return self.__time
+
+    def infect_seeds(self, seed_nodes):
+        """
+        Infects the seed nodes at the current time.
+
+        :param list(str) seed_nodes: The names of the nodes to start the infection with.
+        """
+        for name in seed_nodes:
+            node_id = self.__graph.get_node_by_name(name)
+            if self.__state[node_id] == SUSCEPTIBLE:
+                self.__infect(node_id, self.__time)
+
+    def __infect(self, node_id, t):
+        graph = self.__graph
+        state = self.__state
+        events = self.__events
+
+        state[node_id] = INFECTED
+        self.__counts[SUSCEPTIBLE] -= 1
+        self.__counts[INFECTED] += 1
+
+        recovery = t + self.__exponential(self.__recovery_rate[node_id])
+        events.push(node_id, recovery)
+
+        start, end = graph.indptr[node_id], graph.indptr[node_id + 1]
+        neighbors = graph.indices[start:end]
+        exposed = state[neighbors] == SUSCEPTIBLE
+        neighbors = neighbors[exposed]
+        times = t + self.__exponential(self.__transmission_rate[start:end][exposed])
+        candidates = times < recovery
+        for neighbor, transmission in zip(neighbors[candidates].tolist(), times[candidates].tolist()):
+            if transmission < events.priority(neighbor, float('inf')):
+                events.push(neighbor, transmission)
+                self.__infector[neighbor] = node_id
+
+    def __exponential(self, rates):
+        with numpy.errstate(divide='ignore'):
+            return self.__random.standard_exponential(numpy.shape(rates)) / rates
+
+    def run(self, max_time=None):
+        """
+        Processes events until there are none left or the next one is after
+        max_time.
+
+        :param float max_time: The time to stop at. Runs to extinction when omitted.
+
+        :rtype dict(str, numpy.ndarray): The time of each event and the susceptible, infected and recovered counts right after it. The first entry is the state before the first event.
+        """
+        events = self.__events
+        state = self.__state
+        counts = self.__counts
+
+        times = [self.__time]
+        history = [tuple(counts)]
+        while events:
+            node_id, t = events.peek()
+            if max_time is not None and t > max_time:
+                break
+            events.pop()
+            self.__time = t
+            if state[node_id] == SUSCEPTIBLE:
+                self.__infect(node_id, t)
+            else:
+                state[node_id] = RECOVERED
+                counts[INFECTED] -= 1
+                counts[RECOVERED] += 1
+            times.append(t)
+            history.append(tuple(counts))
+
+        history = numpy.array(history, dtype=numpy.int64)
+        return {'time': numpy.array(times, dtype=numpy.float64),
+                'susceptible': history[:, SUSCEPTIBLE],
+                'infected': history[:, INFECTED],
+                'recovered': history[:, RECOVERED]}
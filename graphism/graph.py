@@ -1,10 +1,15 @@
+import gc
 import sys
+import time
+import random
+import itertools
+import weakref
 
 from graphism.node import Node
 from graphism.edge import Edge
-from graphism.vendor.priodict import priorityDictionary
+from graphism.paths import ShortestPathCache
 
-from graphism.helpers import tp, rp, return_none_from_one
+from graphism.helpers import tp, rp, return_none_from_one, probability_function
 
 class Graph(object):
     """
@@ -23,33 +28,56 @@ class Graph(object):
     Possible keyword arguments are:
     
     :param bool directed: If set to False the graph will be undirected and transmissions can occur from child-to-parent as well as parent-to-child
-    :param function transmission_probability: The transmission probability function. Should take two arguments of type graphism.node.Node. The first positional argument is the parent (infection host), the second is the child. 
+    :param function transmission_probability: The transmission probability function. Should take two arguments of type graphism.node.Node. The first positional argument is the parent (infection host), the second is the child. A float sets a constant probability, which lets propagate skip over failed trials.
     :param function recovery_probability: The recovery probability function. Should take a single objet of type graphism.node.Node. Returns a float on [0,1] indicating the probability of recovery for the node.
     :param function infection: The callback function to execute when a new node is infected. Takes the node as the only argument.
     :param function recovery: The callback function to execute when a node recovers from infection. Takes the node as the only argument.
+    :param function batch_infection: The callback function to execute once per step with the list of nodes infected during the step. See set_batch_infection.
+    :param function batch_recovery: The callback function to execute once per step with the list of nodes that recovered during the step. See set_batch_recovery.
     :param list(dict) edges: You can optionally pass the graph as a keyword argument instead of the first positional argument.
+    :param bool cache_probabilities: If set to True the probability functions are evaluated once per edge and node and reused. See cache_probabilities.
+    :param bool cleanup_references: If set to False edges are built without the weak reference callbacks that prune a node from its neighbors when it's garbage collected, which saves memory and time on large graphs. Nodes must then be removed with remove_node.
+    :param rng: The random number generator for transmission and recovery trials. Any object with a random() method, like a graphism.rng.RandomStream. Defaults to the random module.
     
     """
     __susceptible = None
     __infected = None
     __recovered = None
+    __newly_infected = None
+    __newly_infected_by_name = None
     
     __transmission_probability = None
     __recovery_probability = None
     
     __infection = None
     __recovery = None
+    __batch_infection = None
+    __batch_recovery = None
     
     __length = None
     
+    __version = 0
+    __probability_cache = None
+    __path_cache = None
+    __rng = None
+    __observers = None
+    __recorder = None
+    __steps = 0
+    __cleanup_references = True
+    
     def __init__(self, *args, **kwargs):
         self.__susceptible = {}
         self.__infected = {}
         self.__recovered = {}
+        
+        if kwargs.get('cache_probabilities', False):
+            self.cache_probabilities()
                 
         self.__length = kwargs.get('length', None)
+        self.__rng = kwargs.get('rng', None)
+        self.__cleanup_references = kwargs.get('cleanup_references', True)
                 
-        self.__transmission_probability = kwargs.get('transmission_probability', tp)
+        self.__transmission_probability = probability_function(kwargs.get('transmission_probability', tp))
         self.__recovery_probability = kwargs.get('recovery_probability', rp)
                 
         if 'edges' in kwargs:
@@ -59,6 +87,111 @@ class Graph(object):
             
         self.set_infection(kwargs.get('infection', return_none_from_one))
         self.set_recovery(kwargs.get('recovery', return_none_from_one))
+        self.set_batch_infection(kwargs.get('batch_infection', None))
+        self.set_batch_recovery(kwargs.get('batch_recovery', None))
+    
+    @classmethod
+    def from_compact(cls, compact, **kwargs):
+        """
+        Creates a graph from a graphism.compact.CompactGraph. Each node and each
+        distinct edge is created exactly once and handed to the nodes in bulk,
+        with the multiplicities and node degrees taken from the compact graph,
+        instead of replaying every edge through add_edge_by_node_sequence. The
+        version is bumped once, after the last edge is added.
+        
+        Takes the same keyword arguments as the constructor. The edges are
+        directed if directed is set, and otherwise if compact is directed.
+        
+        :param graphism.compact.CompactGraph compact: The graph to copy.
+        
+        :rtype graphism.graph.Graph:
+        """
+        import numpy
+        
+        graph = cls(**kwargs)
+        transmission_probability = graph.get_transmission_probability()
+        recovery_probability = graph.get_recovery_probability()
+        directed = bool(kwargs.get('directed', compact.directed))
+        length = graph.__length
+        cleanup = graph.__cleanup_references
+        
+        # Every object built here stays reachable, so the cyclic garbage
+        # collector, which would otherwise run every few hundred nodes or
+        # edges, is paused for the build.
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            names = list(compact.names)
+            nodes = [Node(name=name,
+                          transmission_probability=transmission_probability,
+                          recovery_probability=recovery_probability,
+                          graph=graph,
+                          length=length) for name in names]
+            graph.__susceptible.update(itertools.izip(names, nodes))
+            refs = [weakref.ref(node) for node in nodes]
+            edges = [{} for node in nodes]
+        
+            # Undirected edges are stored in both rows; build each one once.
+            rows = numpy.repeat(numpy.arange(len(names), dtype=numpy.int64), numpy.diff(compact.indptr))
+            keep = slice(None) if compact.directed else rows <= compact.indices
+            type_names = compact.type_names
+            for u, v, weight_, type_, multiplicity in itertools.izip(rows[keep].tolist(),
+                                                                     compact.indices[keep].tolist(),
+                                                                     compact.weights[keep].tolist(),
+                                                                     compact.types[keep].tolist(),
+                                                                     compact.multiplicity[keep].tolist()):
+                parent_edges = edges[u]
+                child_name = names[v]
+                edge = parent_edges.get(child_name)
+                if edge is not None:
+                    # The reverse of an edge already built. Its references
+                    # already prune the edge when either node is collected.
+                    edge.multiplicity += multiplicity
+                    nodes[v].parents().add(refs[u])
+                    nodes[u].children().add(refs[v])
+                    continue
+                edge = Edge(parent=refs[u],
+                            child=refs[v],
+                            multiplicity=multiplicity,
+                            type_=type_names[type_],
+                            weight_=weight_,
+                            directed=directed,
+                            length=length,
+                            cleanup=cleanup,
+                            attach=False)
+                parent_edges[child_name] = edge
+                edges[v][names[u]] = edge
+        
+            for node, node_edges, degree in itertools.izip(nodes, edges, compact.degree().tolist()):
+                node.add_edges(node_edges, degree)
+        finally:
+            if collecting:
+                gc.enable()
+        graph.topology_changed()
+        
+        return graph
+    
+    @classmethod
+    def from_edge_arrays(cls, src, dst, weight=None, type=None, **kwargs):
+        """
+        Bulk loads a graph from parallel arrays of edge endpoints. Node names are
+        interned and repeated edges merged in a few vectorized passes (see
+        graphism.compact.CompactGraph.from_edge_arrays) before any node or edge
+        object is created.
+        
+        Takes the same keyword arguments as the constructor.
+        
+        :param numpy.ndarray src: The name of the parent of each edge.
+        :param numpy.ndarray dst: The name of the child of each edge.
+        :param numpy.ndarray weight: The weight of each edge. Defaults to 1.0.
+        :param numpy.ndarray type: The type of each edge. Defaults to None.
+        
+        :rtype graphism.graph.Graph:
+        """
+        from graphism.compact import CompactGraph
+        compact = CompactGraph.from_edge_arrays(src, dst, weight=weight, type=type,
+                                                directed=kwargs.get('directed', False))
+        return cls.from_compact(compact, **kwargs)
     
     def add_edge_by_node_sequence(self, parent, child, directed=None, transmission_probability=None, type_=None, weight_=1.0, recovery_probability=None):
         """
@@ -139,11 +272,14 @@ class Graph(object):
         """
         Allows the user to set the transmission probability function for all nodes in the graph to f
         
-        :param function f: The new transmission probability function to use for all nodes in the graph.
+        :param function f: The new transmission probability function to use for all nodes in the graph, or a float for a constant probability.
         """
+        f = probability_function(f)
         self.__transmission_probability = f
         for n in self.nodes():
             n.set_transmission_probability(f)
+        if self.__probability_cache:
+            self.__probability_cache.invalidate()
             
     def set_recovery_probability(self, f):
         """
@@ -154,6 +290,71 @@ class Graph(object):
         self.__recovery_probability = f
         for n in self.nodes():
             n.set_recovery_probability(f)
+        if self.__probability_cache:
+            self.__probability_cache.invalidate()
+            
+    def cache_probabilities(self, enabled=True):
+        """
+        Turns the probability cache on or off. While it's on, the transmission
+        probability of every edge and the recovery probability of every node are
+        evaluated once (see graphism.cache.ProbabilityCache) and reused by every
+        step, by simulation engines and across realizations. The cache is
+        invalidated by set_transmission_probability, set_recovery_probability
+        and by any change to the topology, so only use it with probability
+        functions that depend on static node and edge attributes.
+        
+        :param bool enabled: Whether to cache probabilities.
+        """
+        if enabled:
+            if not self.__probability_cache:
+                from graphism.cache import ProbabilityCache
+                self.__probability_cache = ProbabilityCache(self)
+        else:
+            self.__probability_cache = None
+            
+    def probability_cache(self):
+        """
+        Getter for the graph's probability cache.
+        
+        :rtype graphism.cache.ProbabilityCache: The cache, or None if probabilities aren't cached.
+        """
+        return self.__probability_cache
+    
+    def version(self):
+        """
+        Returns a counter that increases every time the topology of the graph changes.
+        
+        :rtype int:
+        """
+        return self.__version
+    
+    def topology_changed(self):
+        """
+        Records a change to the topology of the graph. Called by the nodes of the
+        graph when their edges change. Invalidates the probability cache.
+        
+        """
+        self.__version += 1
+        if self.__probability_cache:
+            self.__probability_cache.invalidate()
+            
+    def rng(self):
+        """
+        Getter for the random number generator the nodes draw their trials from.
+        
+        :rtype graphism.rng.RandomStream: The generator, or the random module if none was set.
+        """
+        if self.__rng is None:
+            return random
+        return self.__rng
+    
+    def set_rng(self, rng):
+        """
+        Sets the random number generator the nodes draw their trials from.
+        
+        :param rng: Any object with a random() method, like a graphism.rng.RandomStream. None for the random module.
+        """
+        self.__rng = rng
             
     def get_transmission_probability(self):
         """
@@ -179,7 +380,14 @@ class Graph(object):
         
         :rtype graphism.node.Node:
         """
-        return self.__susceptible.get(name, self.__infected.get(name, self.__recovered.get(name, None)))
+        node = self.__susceptible.get(name)
+        if node is None:
+            node = self.__infected.get(name)
+            if node is None:
+                node = self.__recovered.get(name)
+                if node is None and self.__newly_infected_by_name:
+                    node = self.__newly_infected_by_name.get(name)
+        return node
     
     def add_node(self, node):
         """
@@ -191,8 +399,58 @@ class Graph(object):
         """
         if node.name() not in self.__susceptible:
             self.__susceptible[node.name()] = node
+            self.topology_changed()
+        return node
+        
+    def remove_node(self, name):
+        """
+        Removes the node named name and every edge it's part of, updating the
+        degrees and edges of its neighbors. Costs O(degree).
+        
+        :param str name: The name of the node to remove.
+        
+        :rtype graphism.node.Node: The removed node, without edges.
+        """
+        node = self.get_node_by_name(name)
+        if node is None:
+            raise KeyError(name)
+        for neighbor_name in list(node.edges()):
+            neighbor = self.get_node_by_name(neighbor_name)
+            if neighbor is not None and neighbor is not node:
+                neighbor.unlink(node)
+            node.remove_all_edges_by_name(neighbor_name)
+        node.parents().clear()
+        node.children().clear()
+        for compartment in (self.__susceptible, self.__infected, self.__recovered):
+            compartment.pop(name, None)
+        self.topology_changed()
         return node
+
+    def remove_edge(self, a, b):
+        """
+        Removes the edge between the nodes named a and b, whatever its
+        multiplicity, and updates the degree of both. Costs O(1).
+        
+        :param str a: The name of one node.
+        :param str b: The name of the other node.
+        """
+        node_a = self.get_node_by_name(a)
+        node_b = self.get_node_by_name(b)
+        if node_a is None or node_b is None or b not in node_a.edges():
+            raise KeyError((a, b))
+        node_a.unlink(node_b)
+        if node_b is not node_a:
+            node_b.unlink(node_a)
+
+    def cleanup_references(self):
+        """
+        Indicates if edges are built with the weak reference callbacks that
+        prune garbage collected nodes from their neighbors.
         
+        :rtype bool:
+        """
+        return self.__cleanup_references
+
     def add_edge(self, from_, to_):
         """
         Creates an edge between two nodes in the graph.
@@ -202,9 +460,9 @@ class Graph(object):
         
         :rtype tuple(graphism.node.Node, graphism.node.Edge, graphism.node.Node: A tuple of the parent node, edge, and child node.
         """
-        if from_ not in self.nodes():
+        if self.get_node_by_name(from_.name()) is None:
             self.add_node(from_)
-        if to_ not in self.nodes():
+        if self.get_node_by_name(to_.name()) is None:
             self.add_node(to_)
             
         from_.add_child(to_)
@@ -231,6 +489,30 @@ class Graph(object):
         :rtype None:
         """           
         self.__recovery = callback
+
+    def set_batch_infection(self, callback):
+        """
+        Sets a callback that's executed once per call to infect_seeds or
+        propagate with the list of nodes infected by it, so work like writing
+        to a datastore can be done in bulk. It isn't called when no node was
+        infected. While it's set, the per-node callback set with set_infection
+        isn't executed, so there's no Python call per infection; set it back
+        to None to return to per-node callbacks.
+
+        :param function callback: The function to execute, or None to stop. The only argument is the list of newly infected nodes.
+        """
+        self.__batch_infection = callback
+
+    def set_batch_recovery(self, callback):
+        """
+        Sets a callback that's executed once per call to recover or propagate
+        with the list of nodes that recovered. It isn't called when no node
+        recovered. While it's set, the per-node callback set with set_recovery
+        isn't executed.
+
+        :param function callback: The function to execute, or None to stop. The only argument is the list of newly recovered nodes.
+        """
+        self.__batch_recovery = callback
         
     def infect_seeds(self, seed_nodes):
         """
@@ -238,23 +520,108 @@ class Graph(object):
         
         :param set(graphism.node.Node) seed_nodes: The nodes to start the infection with.
         """
+        infection = self.__infection if self.__batch_infection is None else None
         for n in seed_nodes:
-            n.infect(self.__infection)
+            n.infect(infection)
+        if self.__batch_infection is not None and seed_nodes:
+            self.__batch_infection(list(seed_nodes))
+        if self.__recorder is not None:
+            for n in seed_nodes:
+                self.__recorder.record_infection(n.name(), self.__steps)
+            self.__record_counts()
             
+    def reset_state(self):
+        """
+        Moves every node back to susceptible and clears the infection and
+        recovery callbacks set on the nodes, without touching the topology. Use
+        it to rerun an outbreak on the same graph. An attached recorder is
+        cleared and starts over from step 0.
+        
+        """
+        for compartment in (self.__infected, self.__recovered):
+            self.__susceptible.update(compartment)
+            compartment.clear()
+        for n in self.__susceptible.itervalues():
+            n.reset()
+        self.__steps = 0
+        if self.__recorder is not None:
+            self.__recorder.clear()
+            self.__record_counts()
+
+    def snapshot(self):
+        """
+        Returns the compartment state of the graph so it can be restored later
+        with restore. Only node names are stored; every node not named in the
+        snapshot is susceptible.
+        
+        :rtype dict(str, tuple(str)): The names of the infected and recovered nodes.
+        """
+        return {'infected': tuple(self.__infected.iterkeys()),
+                'recovered': tuple(self.__recovered.iterkeys())}
+
+    def restore(self, snapshot):
+        """
+        Restores the compartment state saved by snapshot. Many continuations
+        can be branched from the same snapshot. Names of nodes that are no
+        longer in the graph are ignored.
+        
+        :param dict snapshot: The result of snapshot.
+        """
+        for compartment in (self.__infected, self.__recovered):
+            self.__susceptible.update(compartment)
+            compartment.clear()
+        for name in snapshot['infected']:
+            if name in self.__susceptible:
+                self.__infected[name] = self.__susceptible.pop(name)
+        for name in snapshot['recovered']:
+            if name in self.__susceptible:
+                self.__recovered[name] = self.__susceptible.pop(name)
+
     def infected(self):
         """
-        Returns the set of infected nodes in the graph.
+        Returns the set of infected nodes in the graph, including the ones
+        infected so far during a running propagate().
         
         :rtype set(graphism.node.Node):
         """
-        return set(self.__infected.values())
+        infected = set(self.__infected.values())
+        if self.__newly_infected_by_name:
+            infected.update(self.__newly_infected_by_name.itervalues())
+        return infected
+
+    def infected_view(self):
+        """
+        Returns a read-only, live view of the infected nodes. Nothing is copied,
+        so the view must not be iterated while nodes change compartments.
+        During propagate() it doesn't include the nodes infected in the current
+        step until the step's transmissions are done.
+
+        :rtype dict_values(graphism.node.Node):
+        """
+        return self.__infected.viewvalues()
+
+    def n_infected(self):
+        """
+        Returns the number of infected nodes in the graph in constant time,
+        including the ones infected so far during a running propagate().
+
+        :rtype int:
+        """
+        if self.__newly_infected_by_name:
+            return len(self.__infected) + len(self.__newly_infected_by_name)
+        return len(self.__infected)
     
     def add_infected(self, node):
         """
-        Adds a node to the list of infected nodes
+        Adds a node to the list of infected nodes. Nodes infected during
+        propagate() are held back until every infected node has propagated.
         
         """
-        self.__infected[node.name()] = node
+        if self.__newly_infected is not None:
+            self.__newly_infected.append(node)
+            self.__newly_infected_by_name[node.name()] = node
+        else:
+            self.__infected[node.name()] = node
         
     def add_recovered(self, node):
         """
@@ -283,7 +650,10 @@ class Graph(object):
         
         :rtype set(graphism.node.Node):
         """
-        return self.susceptible().union(self.infected()).union(set(self.__recovered.values()))
+        return set(itertools.chain(self.__susceptible.itervalues(),
+                                   self.__infected.itervalues(),
+                                   self.__recovered.itervalues(),
+                                   (self.__newly_infected_by_name or {}).itervalues()))
     
     def is_susceptible(self, node):
         """
@@ -295,6 +665,16 @@ class Graph(object):
         """
         return node.name() in self.__susceptible
 
+    def susceptible_node(self, name):
+        """
+        Returns the node named name if it's susceptible.
+        
+        :param str name: The name of the node.
+        
+        :rtype graphism.node.Node: The node, or None if it isn't susceptible.
+        """
+        return self.__susceptible.get(name)
+
     def susceptible(self):
         """
         Returns the set of susceptible nodes in the graph.
@@ -303,6 +683,23 @@ class Graph(object):
         """
         return set(self.__susceptible.values())
 
+    def susceptible_view(self):
+        """
+        Returns a read-only, live view of the susceptible nodes. Nothing is
+        copied, so the view must not be iterated while nodes change compartments.
+
+        :rtype dict_values(graphism.node.Node):
+        """
+        return self.__susceptible.viewvalues()
+
+    def n_susceptible(self):
+        """
+        Returns the number of susceptible nodes in the graph in constant time.
+
+        :rtype int:
+        """
+        return len(self.__susceptible)
+
     def recovered(self):
         """
         Returns the set of recovered nodes in the graph.
@@ -311,16 +708,256 @@ class Graph(object):
         """
         return set(self.__recovered.values())
 
+    def recovered_view(self):
+        """
+        Returns a read-only, live view of the recovered nodes. Nothing is copied,
+        so the view must not be iterated while nodes change compartments.
+
+        :rtype dict_values(graphism.node.Node):
+        """
+        return self.__recovered.viewvalues()
+
+    def n_recovered(self):
+        """
+        Returns the number of recovered nodes in the graph in constant time.
+
+        :rtype int:
+        """
+        return len(self.__recovered)
+
     def propagate(self):
         """
         First infects nodes according to the probability of transmission. 
         Second, recovers nodes depending on the probability of recovery. 
 
+        Nodes infected during this step don't propagate until the next step.
+
         """
-        for n in self.infected():
-            n.propagate_infection(self.__infection)
+        if self.__observers or self.__recorder is not None:
+            return self.__observed_propagate()
+
+        infection, batched = self.__infection, self.__batch_infection is not None
+        if batched:
+            infection = None
+        self.__newly_infected = []
+        self.__newly_infected_by_name = {}
+        try:
+            for n in self.__infected.itervalues():
+                n.propagate_infection(infection, batched)
+        finally:
+            newly_infected, self.__newly_infected = self.__newly_infected, None
+            self.__newly_infected_by_name = None
+            for n in newly_infected:
+                self.__infected[n.name()] = n
+        if self.__batch_infection is not None and newly_infected:
+            self.__batch_infection(newly_infected)
 
         self.recover()
+        self.__steps += 1
+
+    def run(self, max_steps, until=None, record=None):
+        """
+        Propagates the infection for up to max_steps steps and returns the
+        trajectory. Stops early when until(graph) is true, which is checked
+        before the first step and after every step. Once no node is infected
+        the state can't change, so the remaining steps are skipped: they're
+        filled in with the final counts, in the recorder too, and only the
+        step count advances.
+
+        :param int max_steps: The largest number of steps to run.
+        :param function until: Takes the graph and returns True to stop.
+        :param graphism.recorder.Recorder record: Passed to set_recorder before running, so every step is recorded. Pass True to create one.
+
+        :rtype dict(str, numpy.ndarray): The time, susceptible, infected and recovered counts, in the same format as graphism.sir.SIREngine.run(). The first entry is the state before the first step. When until stops the run the arrays end at that step.
+        """
+        import numpy
+        from graphism.sir import SUSCEPTIBLE, INFECTED, RECOVERED, run_steps
+
+        if record is not None:
+            self.set_recorder(record)
+
+        counts, t = run_steps(self.propagate,
+                              lambda: (len(self.__susceptible), len(self.__infected), len(self.__recovered)),
+                              max_steps,
+                              lambda: self.__infected,
+                              None if until is None else lambda: until(self))
+        if len(counts) == max_steps + 1 and t < max_steps:
+            if self.__recorder is not None:
+                self.__recorder.fill_counts(self.__steps + 1, self.__steps + max_steps - t + 1, *counts[t])
+            self.__steps += max_steps - t
+
+        return {'time': numpy.arange(len(counts), dtype=numpy.float64),
+                'susceptible': counts[:, SUSCEPTIBLE],
+                'infected': counts[:, INFECTED],
+                'recovered': counts[:, RECOVERED]}
+
+    def run_batched(self, realizations, steps, seeds, seed=None):
+        """
+        Runs independent realizations of the outbreak on this topology at once
+        with graphism.batched.BatchedEngine, starting from a susceptible
+        population. The probability functions are evaluated once, see
+        graphism.cache.probabilities. The state of the graph isn't changed.
+
+        :param int realizations: The number of realizations.
+        :param int steps: The number of steps in each realization.
+        :param list seeds: The nodes infected at the start of every realization, or a list with one such list per realization.
+        :param seed: The seed for the realizations, an int or a list of ints. Drawn with graphism.rng.entropy when omitted.
+
+        :rtype dict: The time, and the susceptible, infected and recovered curves as arrays of shape (realizations, steps + 1), plus their 'mean' and 'std' across realizations.
+        """
+        from graphism.batched import BatchedEngine
+        engine = BatchedEngine(self, realizations, seed=seed)
+        if seeds and all(isinstance(s, (list, tuple, set, frozenset)) for s in seeds):
+            for realization, nodes in enumerate(seeds):
+                engine.infect_seeds([n.name() for n in nodes], realization)
+        else:
+            engine.infect_seeds([n.name() for n in seeds])
+        return engine.run(steps)
+
+    def __observed_propagate(self):
+        from graphism.observers import TimedCallback
+        statistics = {'step': self.__steps,
+                      'frontier': len(self.__infected),
+                      'trials': 0,
+                      'transmissions': 0,
+                      'recoveries': 0,
+                      'callback_time': 0.0}
+        observers = self.__observers or ()
+        recorder = self.__recorder
+        for observer in observers:
+            observer.step_started(self, self.__steps)
+
+        infection, recovery = self.__infection, self.__recovery
+        batch_infection, batch_recovery = self.__batch_infection, self.__batch_recovery
+        batched = batch_infection is not None
+        if batched:
+            infection = None
+        if batch_recovery is not None:
+            recovery = None
+        if observers:
+            infection, recovery, batch_infection, batch_recovery = \
+                [TimedCallback(callback, statistics) if callback is not None else None
+                 for callback in (infection, recovery, batch_infection, batch_recovery)]
+        start = time.time()
+        time_ = self.__steps + 1
+        newly_infected = self.__newly_infected = []
+        self.__newly_infected_by_name = {}
+        try:
+            for n in self.__infected.itervalues():
+                first = len(newly_infected)
+                trials, transmissions = n.propagate_infection(infection, batched, count_trials=bool(observers))
+                if observers:
+                    statistics['trials'] += trials
+                statistics['transmissions'] += transmissions
+                if recorder is not None:
+                    for child in itertools.islice(newly_infected, first, None):
+                        recorder.record_infection(child.name(), time_, n.name())
+        finally:
+            self.__newly_infected = None
+            self.__newly_infected_by_name = None
+            for n in newly_infected:
+                self.__infected[n.name()] = n
+        if batch_infection is not None and newly_infected:
+            batch_infection(newly_infected)
+
+        recovered = self.__recover(recovery)
+        if batch_recovery is not None and recovered:
+            batch_recovery(recovered)
+        statistics['recoveries'] = len(recovered)
+        statistics['duration'] = time.time() - start
+        for callback in (infection, recovery, batch_infection, batch_recovery):
+            if isinstance(callback, TimedCallback):
+                callback.statistics = None
+        self.__steps += 1
+
+        if recorder is not None:
+            for n in recovered:
+                recorder.record_recovery(n.name(), time_)
+            self.__record_counts()
+
+        for observer in observers:
+            observer.step_finished(self, statistics)
+
+    def add_observer(self, observer):
+        """
+        Attaches an observer that's told about every step of propagate, see
+        graphism.observers. Steps aren't measured while no observer is
+        attached.
+
+        :param graphism.observers.Observer observer: The observer.
+        """
+        self.__observers = (self.__observers or ()) + (observer,)
+
+    def remove_observer(self, observer):
+        """
+        Detaches an observer.
+
+        :param graphism.observers.Observer observer: The observer.
+        """
+        self.__observers = tuple(o for o in self.__observers or () if o is not observer) or None
+
+    def observers(self):
+        """
+        Returns the attached observers.
+
+        :rtype tuple(graphism.observers.Observer):
+        """
+        return self.__observers or ()
+
+    def set_recorder(self, recorder):
+        """
+        Attaches a graphism.recorder.Recorder that records the counts of every
+        step of propagate and when and by whom each node is infected, or
+        detaches it when recorder is None. Pass True to record every node
+        currently in the graph. The counts of the current step are recorded
+        right away; nodes that are already infected have no infection time.
+
+        :param graphism.recorder.Recorder recorder: The recorder.
+
+        :rtype graphism.recorder.Recorder: The attached recorder.
+        """
+        if recorder is True:
+            from graphism.recorder import Recorder
+            recorder = Recorder([n.name() for n in self.nodes()])
+        self.__recorder = recorder
+        if recorder is not None:
+            self.__record_counts()
+        return recorder
+
+    def recorder(self):
+        """
+        Getter for the attached recorder, or None.
+
+        :rtype graphism.recorder.Recorder:
+        """
+        return self.__recorder
+
+    def __record_counts(self):
+        self.__recorder.record_counts(self.__steps, len(self.__susceptible), len(self.__infected), len(self.__recovered))
+
+    def shortest_path_tree(self, source):
+        """
+        Returns the shortest distances and paths from source to every node it
+        can reach, found with one run of Dijkstra's algorithm. The trees of the
+        most recently used sources are cached until the topology changes.
+
+        :param graphism.node.Node source: The node to start from.
+
+        :rtype graphism.paths.ShortestPathTree:
+        """
+        if self.__path_cache is None:
+            self.__path_cache = ShortestPathCache()
+        return self.__path_cache.tree(self, source)
+
+    def distances_from(self, source):
+        """
+        Returns the shortest distance from source to every node it can reach.
+
+        :param graphism.node.Node source: The node to start from.
+
+        :rtype dict(str, float): The distance to each reachable node, keyed by name.
+        """
+        return self.shortest_path_tree(source).distances
 
     def closeness(self, a, b):
         """
@@ -329,28 +966,40 @@ class Graph(object):
         :param graphism.node.Node a: The first node.
         :param graphism.node.Node b: The second node.
 
-        :rtype tuple(float, list(str)): The closeness and a list of predecessor ids
+        :rtype tuple(float, list(str)): The closeness and the names of the nodes on a shortest path from a to b. Infinity and an empty path if b can't be reached.
+        """
+        tree = self.shortest_path_tree(a)
+        return (tree.distance(b.name()), tree.path(b.name()))
+
+    def closeness_centrality(self, workers=1, pivots=None, seed=None):
         """
-        final_distances = {}
-        predecessors = []
-        non_final_distances = priorityDictionary()
-        non_final_distances[a.name()] = 0.0
+        Returns the closeness centrality of every node. With pivots it's
+        estimated from that many randomly chosen sources. See
+        graphism.centrality.closeness, which also reports the error bound.
 
-        for node_name in non_final_distances:
-            final_distances[node_name] = non_final_distances[node_name]
-            if node_name == b.name():
-                break
+        :param int workers: The number of worker processes.
+        :param int pivots: The number of sources to sample. Every node is a source when omitted.
+        :param int seed: The seed for choosing pivots.
 
-            for node in self[node_name]:
-                length = final_distances[node_name] + self[node_name][node.name()].length()
-                if node.name() in final_distances:
-                    if length < final_distances[node.name()]:
-                        raise ValueError("Found better path to already-final vertex")
-                elif node.name() not in non_final_distances or length < non_final_distances[node.name()]:
-                    non_final_distances[node.name()] = length
-                    predecessors.append(node_name)
+        :rtype dict(str, float): The centrality of each node, keyed by name.
+        """
+        from graphism import centrality
+        return centrality.by_name(centrality.closeness(self, workers=workers, pivots=pivots, seed=seed))
+
+    def harmonic_centrality(self, workers=1, pivots=None, seed=None):
+        """
+        Returns the harmonic centrality of every node. With pivots it's
+        estimated from that many randomly chosen sources. See
+        graphism.centrality.harmonic, which also reports the error bound.
 
-        return (final_distances[b.name()], predecessors)
+        :param int workers: The number of worker processes.
+        :param int pivots: The number of sources to sample. Every node is a source when omitted.
+        :param int seed: The seed for choosing pivots.
+
+        :rtype dict(str, float): The centrality of each node, keyed by name.
+        """
+        from graphism import centrality
+        return centrality.by_name(centrality.harmonic(self, workers=workers, pivots=pivots, seed=seed))
 
     def __iter__(self):
         """
@@ -396,15 +1045,60 @@ class Graph(object):
         """
         return [e.to_dict() for e in self.edges()]
 
+    def save(self, path):
+        """
+        Writes the graph to path in the binary format described in
+        graphism.storage. Node names must be all integers or all strings.
+        Probability functions, callbacks and compartment state aren't saved.
+        
+        :param str path: The file to write.
+        """
+        from graphism import storage
+        storage.save(self.compact(), path)
+
+    @staticmethod
+    def load(path, **kwargs):
+        """
+        Reads a graph written by save. Takes the same keyword arguments as
+        Graph. Every node and edge is built as an object; to open a large graph
+        in milliseconds, mapped read-only and shared with other processes
+        through the page cache, use graphism.compact.CompactGraph.load.
+        
+        :param str path: The file to read.
+        
+        :rtype Graph:
+        """
+        if 'mmap' in kwargs:
+            raise TypeError("Graph.load builds every node and edge and can't map the file. "
+                            "Use graphism.compact.CompactGraph.load(path, mmap=True).")
+        from graphism import storage
+        return storage.load(path, mmap=False).to_graph(**kwargs)
+
+    def compact(self):
+        """
+        Returns a compact, array-backed copy of the graph with integer node ids
+        and CSR adjacency. See graphism.compact.CompactGraph.
+
+        :rtype graphism.compact.CompactGraph:
+        """
+        from graphism.compact import CompactGraph
+        return CompactGraph.from_graph(self)
+
     def recover(self):
         """
         Executes the recovery function for each infected node and subsequently 
         removes it from the 'infected' set iff that node recovered.
 
         """
-        for n in self.infected():
-            if n.recover(self.__recovery): # Returns true if recovered, false if not
-                self.remove_infected(n)
-                self.add_recovered(n)
+        recovered = self.__recover(self.__recovery if self.__batch_recovery is None else None)
+        if self.__batch_recovery is not None and recovered:
+            self.__batch_recovery(recovered)
+
+    def __recover(self, recovery):
+        recovered = [n for n in self.__infected.itervalues() if n.recover(recovery)] # Returns true if recovered, false if not
+        for n in recovered:
+            self.remove_infected(n)
+            self.add_recovered(n)
+        return recovered
 
 
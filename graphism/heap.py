@@ -0,0 +1,135 @@
+class IndexedHeap(object):
+    """
+    A binary min-heap of keys ordered by priority that knows where each key is
+    stored. Each key is in the heap at most once, and its priority can be
+    changed in O(log n) without leaving stale entries behind.
+
+    .. code-block:: python
+
+        heap = IndexedHeap()
+        heap.push('a', 2.0)
+        heap.push('b', 1.0)
+        heap.push('a', 0.5) # Decreases the priority of 'a'
+        heap.pop() # ('a', 0.5)
+
+    """
+    __heap = None
+    __position = None
+
+    def __init__(self):
+        self.__heap = []
+        self.__position = {}
+
+    def __len__(self):
+        return len(self.__heap)
+
+    def __contains__(self, key):
+        return key in self.__position
+
+    def priority(self, key, default=None):
+        """
+        Returns the priority of key.
+
+        :param key: The key to look up.
+        :param default: Returned when key isn't in the heap.
+
+        :rtype float:
+        """
+        i = self.__position.get(key)
+        if i is None:
+            return default
+        return self.__heap[i][0]
+
+    def push(self, key, priority):
+        """
+        Adds key to the heap, or changes its priority if it's already there.
+
+        :param key: The key to add. Must be hashable.
+        :param float priority: The priority of key. Smaller priorities are popped first.
+        """
+        i = self.__position.get(key)
+        if i is None:
+            self.__heap.append([priority, key])
+            i = len(self.__heap) - 1
+            self.__position[key] = i
+            self.__sift_up(i)
+        else:
+            old = self.__heap[i][0]
+            self.__heap[i][0] = priority
+            if priority < old:
+                self.__sift_up(i)
+            else:
+                self.__sift_down(i)
+
+    def peek(self):
+        """
+        Returns the key with the smallest priority without removing it.
+
+        :rtype tuple: The key and its priority.
+        """
+        priority, key = self.__heap[0]
+        return key, priority
+
+    def pop(self):
+        """
+        Removes and returns the key with the smallest priority.
+
+        :rtype tuple: The key and its priority.
+        """
+        heap = self.__heap
+        priority, key = heap[0]
+        last = heap.pop()
+        del self.__position[key]
+        if heap:
+            heap[0] = last
+            self.__position[last[1]] = 0
+            self.__sift_down(0)
+        return key, priority
+
+    def remove(self, key):
+        """
+        Removes key from the heap.
+
+        :param key: The key to remove.
+        """
+        heap = self.__heap
+        i = self.__position.pop(key)
+        last = heap.pop()
+        if i < len(heap):
+            heap[i] = last
+            self.__position[last[1]] = i
+            self.__sift_up(i)
+            self.__sift_down(self.__position[last[1]])
+
+    def __sift_up(self, i):
+        heap = self.__heap
+        position = self.__position
+        item = heap[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if heap[parent][0] <= item[0]:
+                break
+            heap[i] = heap[parent]
+            position[heap[i][1]] = i
+            i = parent
+        heap[i] = item
+        position[item[1]] = i
+
+    def __sift_down(self, i):
+        heap = self.__heap
+        position = self.__position
+        size = len(heap)
+        item = heap[i]
+        while True:
+            child = 2 * i + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1][0] < heap[child][0]:
+                child += 1
+            if item[0] <= heap[child][0]:
+                break
+            heap[i] = heap[child]
+            position[heap[i][1]] = i
+            i = child
+        heap[i] = item
+        position[item[1]] = i
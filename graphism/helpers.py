@@ -1,3 +1,6 @@
+import math
+import numbers
+
 def tp(from_node, to_node):
     edge = from_node.edges()[to_node.name()]
     multiplicity = edge.multiplicity
@@ -16,3 +19,55 @@ def return_none():
 def return_none_from_one(n):
     return None
 
+class Constant(object):
+    """
+    A transmission probability function that returns the same probability for
+    every pair of nodes. Engines and nodes recognize it and skip over failed
+    trials instead of drawing them, see geometric_skips.
+
+    :param float probability: The probability of transmission.
+    """
+    def __init__(self, probability):
+        self.probability = float(probability)
+
+    def __call__(self, from_node, to_node):
+        return self.probability
+
+def probability_function(f):
+    """
+    Returns f, or a Constant if f is a number.
+
+    :param f: A transmission probability function, or a float.
+
+    :rtype function:
+    """
+    if isinstance(f, numbers.Real):
+        return Constant(f)
+    return f
+
+def geometric_skips(draw, probability, n):
+    """
+    Yields the indices of the successes among n independent trials with the
+    same probability, in order. The gap to the next success is drawn from a
+    geometric distribution, so the cost is proportional to the number of
+    successes rather than to n.
+
+    :param function draw: Returns a uniform on [0,1), e.g. random.random.
+    :param float probability: The probability of success of each trial.
+    :param int n: The number of trials.
+
+    :rtype generator(int):
+    """
+    if probability <= 0.0 or n == 0:
+        return
+    if probability >= 1.0:
+        for i in xrange(n):
+            yield i
+        return
+    scale = 1.0 / math.log(1.0 - probability)
+    i = -1
+    while True:
+        i += 1 + int(math.log(1.0 - draw()) * scale)
+        if i >= n:
+            return
+        yield i
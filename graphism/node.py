@@ -3,47 +3,53 @@ import random
 import weakref
 
 from graphism.edge import Edge
-from graphism.helpers import return_none, tp, rp
+from graphism.helpers import return_none, tp, rp, Constant, probability_function, geometric_skips
 
 class Node(object):
     """
     Represents a node in a graph.
     
     """
-    __name = None
-    __degree = 0L
-    __parents = None
-    __children = None
-    __edges = None
-    __infection_function = None
-    __transmission_probability = None
-    __recovery_probability = None
-    __recovery_function = None
-    __graph = None
-    __length = None
+    # __dict__ is kept so callers can still attach their own attributes. It's
+    # only allocated for nodes that get one.
+    __slots__ = ('__name', '__degree', '__parents', '__children', '__edges',
+                 '__infection_function', '__transmission_probability',
+                 '__recovery_probability', '__recovery_function', '__graph',
+                 '__length', '__rng', '__neighbor_names', '__weakref__', '__dict__')
     
-    def __init__(self, parents=None, children=None, name=None, transmission_probability=None, recovery_probability=None, graph=None, length=None):
+    def __init__(self, parents=None, children=None, name=None, transmission_probability=None, recovery_probability=None, graph=None, length=None, rng=None):
         """
         Instantiates a node in a graph. 
         
         :param list(graphism.node.Node) parents: A list of parent nodes. They are added as parents to this node.
         :param list(graphism.node.Node) children: A list of child nodes. They are added as children to this node.
         :param str name: The name of the node. Must be unique for each node in the graph.
-        :param function transmission_probability: Takes two arguments of type graphism.node.Node. The first positional argument is the parent node, the second is the child. The output should be the probability of an infection transmitting from the parent to the child over one exposure. The output should be a float in [0,1].
+        :param function transmission_probability: Takes two arguments of type graphism.node.Node. The first positional argument is the parent node, the second is the child. The output should be the probability of an infection transmitting from the parent to the child over one exposure. The output should be a float in [0,1]. A float sets a constant probability.
         :param function recovery_probability: The probability of a node recovering from infection
         :param function graphism.graph.Graph: The graph this node belongs to.
         :param function length: A function returning the length of an edge given the edge as the only argument.
+        :param rng: The random number generator for transmission and recovery trials. Any object with a random() method, like a graphism.rng.RandomStream. Defaults to the graph's.
         """
+        if name is not None:
+            self.__name = name
+        else:
+            self.__name = str(random.random()) + str(time.time())
+        
+        self.__degree = 0
         self.__parents = set([])
         self.__children = set([])
         self.__edges = {}
+        self.__infection_function = None
+        self.__recovery_function = None
+        self.__neighbor_names = None
         
-        self.__transmission_probability = transmission_probability or tp
+        self.__transmission_probability = probability_function(transmission_probability or tp)
         self.__recovery_probability = recovery_probability or rp
         
         self.__graph = return_none
 
         self.__length = length
+        self.__rng = rng
         
         if graph:
             self.__graph = weakref.ref(graph)
@@ -54,11 +60,6 @@ class Node(object):
         if children:
             for c in children:
                 self.add_child(c)
-                
-        if name is not None:
-            self.__name = name
-        else:
-            self.__name = str(random.random()) + str(time.time())
     
     def name(self):
         """
@@ -88,18 +89,32 @@ class Node(object):
         Makes node iterable. Iterates over children of the node (e.g. node this node can transmit to)
         
         """
-        children = set([])
-        for edge in self.edges().values():
-            if edge.directed and self is edge.parent():
-                children.add(edge.child)
-            else:
-                if self is not edge.child():
-                    children.add(edge.child)
-                elif self is not edge.parent():
-                    children.add(edge.parent)
-                    
-        for child in children:
-            yield child()
+        for name in self.neighbor_names():
+            yield self.__neighbor(name)
+
+    def neighbor_names(self):
+        """
+        Returns the names of the nodes this node can transmit to, i.e. the other
+        end of each of its edges. Directed edges only count from the parent,
+        and self edges are left out unless they're directed. The tuple is kept
+        until the node's edges change, so it costs nothing to iterate
+        repeatedly.
+        
+        :rtype tuple(str):
+        """
+        if self.__neighbor_names is None:
+            own_name = self.__name
+            self.__neighbor_names = tuple(name for name, edge in self.__edges.iteritems()
+                                          if (name != own_name or edge.directed)
+                                          and not (edge.directed and edge.parent_name != own_name))
+        return self.__neighbor_names
+
+    def __neighbor(self, name):
+        edge = self.__edges[name]
+        child = edge.child()
+        if child.name() == name:
+            return child
+        return edge.parent()
 
     def add_edge(self, name, edge):
         """
@@ -112,7 +127,25 @@ class Node(object):
             self.__edges[name].multiplicity += 0.5
         else:
             self.__edges[name] = edge
+            self.__neighbor_names = None
         self.degree(1L)
+        
+        graph = self.__graph()
+        if graph is not None:
+            graph.topology_changed()
+
+    def add_edges(self, edges, degree):
+        """
+        Adds edges in bulk, without merging repeated edges or recording a
+        change to the graph's topology. Used by graphism.graph.Graph.from_compact,
+        which bumps the version once when it's done.
+        
+        :param dict(str, graphism.node.Edge) edges: The edges, by the name of the other node.
+        :param float degree: The degree the edges add to the node.
+        """
+        self.__edges.update(edges)
+        self.__neighbor_names = None
+        self.__degree += degree
 
     def remove_all_edges_by_name(self, name):
         """
@@ -122,7 +155,29 @@ class Node(object):
         """
         if name in self.__edges:
             edge = self.__edges.pop(name)
+            self.__neighbor_names = None
             self.degree(-1L*edge.multiplicity)
+            
+            graph = self.__graph()
+            if graph is not None:
+                graph.topology_changed()
+
+    def __cleanup(self):
+        graph = self.__graph()
+        return graph is None or graph.cleanup_references()
+
+    def unlink(self, node):
+        """
+        Removes every edge between self and node from self, along with the weak
+        references self keeps of node. node is left as it is; see
+        graphism.graph.Graph.remove_edge to remove both sides.
+        
+        :param graphism.node.Node node: The other node.
+        """
+        ref = weakref.ref(node)
+        self.__parents.discard(ref)
+        self.__children.discard(ref)
+        self.remove_all_edges_by_name(node.name())
 
     def remove_parent_ref(self, wr):
         """
@@ -156,7 +211,7 @@ class Node(object):
         """
         return self.__children
 
-    def add_parent(self, parent_node, type_=None, weight_=1.0):
+    def add_parent(self, parent_node, type_=None, weight_=1.0, directed=False):
         """
         Adds a parent node to the set of parents. If the node already exists the 
         multiplicity of the node is increased. Also creates an edge from the parent to self.
@@ -164,6 +219,7 @@ class Node(object):
         :param graphism.node.Node parent_node: The parent node to add.
         :param str type_: The type of edge to add.
         :param float weight_: The weight of the edge
+        :param bool directed: Whether or not the edge is directed.
         
         :rtype long: The multiplicity of the edge to parent_node.
         """
@@ -172,11 +228,13 @@ class Node(object):
                     child=weakref.ref(self),
                     type_=type_,
                     weight_=weight_,
-                    length=self.__length)
+                    directed=directed,
+                    length=self.__length,
+                    cleanup=self.__cleanup())
                     
         return self.__edges[node_name].multiplicity
     
-    def add_child(self, child_node, type_=None, weight_=1.0):
+    def add_child(self, child_node, type_=None, weight_=1.0, directed=False):
         """
         Adds a child node to the set of children. If the node already exists the
         multiplicity of the node is increased.
@@ -184,6 +242,7 @@ class Node(object):
         :param graphism.node.Node child_node: The child node to add.
         :param str type_: The type of edge to add.
         :param float weight_: The weight of the edge
+        :param bool directed: Whether or not the edge is directed.
         
         :rtype long: The multiplicity of the edge to child_node.
         """
@@ -192,7 +251,9 @@ class Node(object):
                     child=weakref.ref(child_node),
                     type_=type_,
                     weight_=weight_,
-                    length=self.__length)
+                    directed=directed,
+                    length=self.__length,
+                    cleanup=self.__cleanup())
 
         return self.__edges[node_name].multiplicity
         
@@ -231,13 +292,42 @@ class Node(object):
         
         return self.__infection_function
         
+    def reset(self):
+        """
+        Forgets the infection and recovery callbacks set by infect and recover.
+        
+        """
+        self.__infection_function = None
+        self.__recovery_function = None
+
+    def rng(self):
+        """
+        Returns the random number generator the node draws its trials from:
+        its own, else its graph's, else the random module.
+        
+        :rtype graphism.rng.RandomStream:
+        """
+        if self.__rng is not None:
+            return self.__rng
+        graph = self.__graph()
+        if graph is not None:
+            return graph.rng()
+        return random
+
     def recover(self, recovery_function=None):
         """
         Recover from infection.
         
         :param function recovery_function: The callback to execute during recovery
         """
-        if random.random() < self.__recovery_probability(self):
+        graph = self.__graph()
+        cache = graph.probability_cache() if graph is not None else None
+        if cache:
+            probability = cache.recovery_probability(self)
+        else:
+            probability = self.__recovery_probability(self)
+        
+        if self.rng().random() < probability:
             if recovery_function:
                 self.__recovery_function = recovery_function
             if self.__recovery_function:
@@ -246,7 +336,7 @@ class Node(object):
         
         return False
                         
-    def propagate_infection(self, l=None):
+    def propagate_infection(self, l=None, batched=False, count_trials=False):
         """
         Propagates the lambda function (executes the function on) nodes 
         at random in the set of parents and children weighted by the 
@@ -255,25 +345,67 @@ class Node(object):
         The lambda is executed on the node it propagates to.
         
         :param lambda l: The function to propagate. It must take the node as the first argument
-        """
-        if l:
-            nodes = set([])
-            for edge in self.edges().values():
-                if edge.directed and self is edge.parent():
-                    nodes.add(edge.child)
-                else:
-                    if self is not edge.child():
-                        nodes.add(edge.child)
-                    elif self is not edge.parent():
-                        nodes.add(edge.parent)
+        :param bool batched: If set to True the infection spreads even when l is None, for graphs that hand newly infected nodes to a batch callback instead.
+        :param bool count_trials: If set to True the trials are counted with a homogeneous transmission probability too. Failed trials aren't drawn then, so counting them costs a lookup per neighbor.
+        
+        :rtype tuple(int, int): The number of transmission trials, i.e. of susceptible neighbors, and of successful transmissions. The number of trials is None when the probability is homogeneous and count_trials isn't set.
+        """
+        if not l and not batched:
+            return 0, 0
+        names = self.neighbor_names()
+        graph = self.__graph()
+        if graph is not None:
+            exposed = graph.susceptible_node # None unless the node is susceptible
+            cache = graph.probability_cache()
+        else:
+            exposed = self.__neighbor
+            cache = None
+        draw = self.rng().random
+        transmissions = 0
+        probability = self.homogeneous_transmission_probability()
+        if probability is not None:
+            # Every trial has the same chance, so only the successes are drawn.
+            trials = None
+            if count_trials:
+                trials = sum(1 for name in names if exposed(name) is not None)
+            for i in geometric_skips(draw, probability, len(names)):
+                child = exposed(names[i])
+                if child is not None:
+                    child.infect(l) # It transmits!
+                    transmissions += 1
+            return trials, transmissions
 
-            for n in nodes:
-                if not self.__graph() or (self.__graph() and self.__graph().is_susceptible(n())):
-                    probability = self.transmission_probability(n())
-                    if random.random() < probability:
-                        n().infect(l) # It transmits!
-                        
+        trials = 0
+        for name in names:
+            child = exposed(name)
+            if child is not None:
+                trials += 1
+                if cache:
+                    probability = cache.transmission_probability(self, child)
+                else:
+                    probability = self.transmission_probability(child)
+                if draw() < probability:
+                    child.infect(l) # It transmits!
+                    transmissions += 1
+        return trials, transmissions
             
+    def homogeneous_transmission_probability(self):
+        """
+        Returns the transmission probability to every neighbor when it's known
+        to be the same for all of them: when the transmission probability is a
+        graphism.helpers.Constant, or when the graph's probability cache found
+        every edge has the same probability. Returns None otherwise.
+        
+        :rtype float:
+        """
+        if isinstance(self.__transmission_probability, Constant):
+            return self.__transmission_probability.probability
+        graph = self.__graph()
+        cache = graph.probability_cache() if graph is not None else None
+        if cache:
+            return cache.homogeneous_probability()
+        return None
+
     def transmission_probability(self, to_node, probability_function=None):
         """
         Returns the probability of transmission from self to to_node.
@@ -292,9 +424,10 @@ class Node(object):
         """
         Set the transmission probability function for the node.
         
-        :param function f: The new transmission probability function for the node.
+        :param function f: The new transmission probability function for the node, or a float for a constant probability.
         """
-        self.__transmission_probability = f
+        self.__transmission_probability = probability_function(f)
+        self.__invalidate_probabilities()
         
     def set_recovery_probability(self, f):
         """
@@ -303,6 +436,14 @@ class Node(object):
         :param function f: The new recovery probability function for the node.
         """
         self.__recovery_probability = f
+        self.__invalidate_probabilities()
+
+    def __invalidate_probabilities(self):
+        graph = self.__graph()
+        if graph is not None:
+            cache = graph.probability_cache()
+            if cache:
+                cache.invalidate()
         
     def get_transmission_probability(self):
         """
@@ -0,0 +1,138 @@
+import sys
+import time
+
+STATISTICS = ('duration', 'frontier', 'trials', 'transmissions', 'recoveries', 'callback_time')
+
+class Observer(object):
+    """
+    Receives per-step reports from graphism.graph.Graph.propagate(). Attach
+    one with graphism.graph.Graph.add_observer and override the hooks you
+    need. The statistics of a step are:
+
+    ==============  ==============================================================
+    Key             Value
+    ==============  ==============================================================
+    step            The number of steps the graph ran before this one
+    duration        The wall time of the step in seconds, including callbacks
+    frontier        The number of infected nodes at the start of the step
+    trials          The number of transmission trials
+    transmissions   The number of successful transmissions
+    recoveries      The number of nodes that recovered
+    callback_time   The wall time spent in infection and recovery callbacks
+    ==============  ==============================================================
+
+    """
+    def step_started(self, graph, step):
+        """
+        Called before a step.
+
+        :param graphism.graph.Graph graph: The graph that's stepping.
+        :param int step: The number of steps the graph ran before this one.
+        """
+        pass
+
+    def step_finished(self, graph, statistics):
+        """
+        Called after a step.
+
+        :param graphism.graph.Graph graph: The graph that stepped.
+        :param dict statistics: The statistics of the step.
+        """
+        pass
+
+class TimedCallback(object):
+    """
+    Wraps an infection or recovery callback, per node or batched, and adds the
+    time spent in it to the callback_time of a step's statistics. Once the
+    step is over, statistics is set to None and calls go straight through.
+
+    :param function callback: The callback to wrap.
+    :param dict statistics: The statistics of the step.
+    """
+    def __init__(self, callback, statistics):
+        self.callback = callback
+        self.statistics = statistics
+
+    def __call__(self, node):
+        if self.statistics is None:
+            return self.callback(node)
+        start = time.time()
+        try:
+            return self.callback(node)
+        finally:
+            self.statistics['callback_time'] += time.time() - start
+
+class Profiler(Observer):
+    """
+    An observer that aggregates the statistics of every step it sees.
+
+    .. code-block:: python
+
+        profiler = Profiler()
+        graph.add_observer(profiler)
+        for i in range(100):
+            graph.propagate()
+        profiler.dump()
+
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets every step seen so far.
+
+        """
+        self.steps = 0
+        self.totals = dict((key, 0) for key in STATISTICS)
+        self.slowest = 0.0
+
+    def step_finished(self, graph, statistics):
+        self.steps += 1
+        for key in STATISTICS:
+            self.totals[key] += statistics[key]
+        self.slowest = max(self.slowest, statistics['duration'])
+
+    def summary(self):
+        """
+        Returns the totals and per-step means of the statistics.
+
+        :rtype dict(str, float): The total of each statistic, the mean of each as mean_<key>, plus steps, slowest (the longest step) and hit_rate (transmissions per trial).
+        """
+        summary = dict(self.totals)
+        summary['steps'] = self.steps
+        summary['slowest'] = self.slowest
+        for key in STATISTICS:
+            summary['mean_' + key] = float(self.totals[key]) / self.steps if self.steps else 0.0
+        summary['hit_rate'] = float(self.totals['transmissions']) / self.totals['trials'] if self.totals['trials'] else 0.0
+        return summary
+
+    def table(self):
+        """
+        Formats the summary as a text table.
+
+        :rtype str:
+        """
+        summary = self.summary()
+        duration = summary['duration']
+        rows = [('steps', '%d' % summary['steps'], ''),
+                ('duration', '%.6fs' % duration, '%.6fs' % summary['mean_duration']),
+                ('slowest step', '%.6fs' % summary['slowest'], ''),
+                ('callbacks', '%.6fs' % summary['callback_time'], '%.1f%% of duration' % (100.0 * summary['callback_time'] / duration if duration else 0.0)),
+                ('frontier', '%d' % summary['frontier'], '%.1f' % summary['mean_frontier']),
+                ('trials', '%d' % summary['trials'], '%.1f' % summary['mean_trials']),
+                ('transmissions', '%d' % summary['transmissions'], '%.1f (hit rate %.4f)' % (summary['mean_transmissions'], summary['hit_rate'])),
+                ('recoveries', '%d' % summary['recoveries'], '%.1f' % summary['mean_recoveries'])]
+        rows.insert(0, ('statistic', 'total', 'per step'))
+        widths = [max(len(row[i]) for row in rows) for i in range(3)]
+        lines = ['  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows]
+        lines.insert(1, '  '.join('-' * width for width in widths))
+        return '\n'.join(lines)
+
+    def dump(self, stream=None):
+        """
+        Writes the table to stream.
+
+        :param file stream: Where to write. Defaults to sys.stdout.
+        """
+        (stream or sys.stdout).write(self.table() + '\n')
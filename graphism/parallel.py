@@ -0,0 +1,54 @@
+import multiprocessing
+
+_shared = None
+
+def _share(shared):
+    global _shared
+    _shared = shared
+
+def _call(args):
+    function, task = args
+    return function(_shared, task)
+
+def map_shared(function, shared, tasks, workers=1):
+    """
+    Returns [function(shared, task) for task in tasks], computed by a pool of
+    worker processes. shared is handed to each worker once when the pool
+    starts (inherited without pickling where processes fork) instead of being
+    pickled with every task, so it can be a large, read-only graph.
+
+    :param function function: A module-level function taking shared and one task.
+    :param shared: The read-only object every task needs.
+    :param list tasks: The tasks.
+    :param int workers: The number of worker processes. Runs in this process when 1 or less.
+
+    :rtype list: The result of each task, in order.
+    """
+    if workers is None or workers <= 1:
+        return [function(shared, task) for task in tasks]
+
+    pool = multiprocessing.Pool(workers, initializer=_share, initargs=(shared,))
+    try:
+        return pool.map(_call, [(function, task) for task in tasks])
+    finally:
+        pool.close()
+        pool.join()
+
+def chunks(items, n):
+    """
+    Splits items into at most n contiguous chunks of nearly equal size.
+
+    :param list items: The items to split.
+    :param int n: The number of chunks.
+
+    :rtype list(list):
+    """
+    n = max(1, min(n, len(items)))
+    size, extra = divmod(len(items), n)
+    result = []
+    start = 0
+    for i in xrange(n):
+        end = start + size + (1 if i < extra else 0)
+        result.append(items[start:end])
+        start = end
+    return result
@@ -0,0 +1,140 @@
+import collections
+
+from graphism.heap import IndexedHeap
+
+def dijkstra(source, target=None):
+    """
+    Finds the shortest distance from source to every node it can reach, using
+    an indexed heap so each node is queued at most once. Edge lengths come from
+    graphism.edge.Edge.length() and are evaluated once per edge. Directed edges
+    are only followed from parent to child.
+
+    :param graphism.node.Node source: The node to start from.
+    :param graphism.node.Node target: Stop as soon as the distance to target is final. Searches the whole component when omitted.
+
+    :rtype tuple(dict(str, float), dict(str, str)): The distance to each reached node and the predecessor of each reached node on a shortest path from source. The source has no predecessor.
+    """
+    distances = {}
+    predecessors = {}
+    nodes = {source.name(): source}
+    queue = IndexedHeap()
+    queue.push(source.name(), 0.0)
+    target_name = target.name() if target is not None else None
+
+    while queue:
+        name, distance = queue.pop()
+        distances[name] = distance
+        if name == target_name:
+            break
+
+        for neighbor_name, edge in nodes.pop(name).edges().iteritems():
+            if neighbor_name in distances or (edge.directed and edge.child_name == name):
+                continue
+            length = distance + edge.length()
+            if length < queue.priority(neighbor_name, float('inf')):
+                queue.push(neighbor_name, length)
+                predecessors[neighbor_name] = name
+                if neighbor_name not in nodes:
+                    nodes[neighbor_name] = edge.parent() if edge.child().name() == name else edge.child()
+
+    return distances, predecessors
+
+def path(predecessors, source, target):
+    """
+    Follows a predecessor map back from target to source.
+
+    :param dict(str, str) predecessors: The predecessors found by dijkstra.
+    :param str source: The name of the node the search started from.
+    :param str target: The name of the node to find the path to.
+
+    :rtype list(str): The names of the nodes on the path, from source to target. Empty if target wasn't reached.
+    """
+    if target != source and target not in predecessors:
+        return []
+    names = [target]
+    while names[-1] != source:
+        names.append(predecessors[names[-1]])
+    names.reverse()
+    return names
+
+class ShortestPathTree(object):
+    """
+    The shortest distances and paths from one source to every node it can
+    reach.
+
+    :param str source: The name of the source.
+    :param dict(str, float) distances: The distance to each reached node.
+    :param dict(str, str) predecessors: The predecessor of each reached node.
+    """
+    def __init__(self, source, distances, predecessors):
+        self.source = source
+        self.distances = distances
+        self.predecessors = predecessors
+
+    def distance(self, target):
+        """
+        Returns the distance to target, or infinity if it can't be reached.
+
+        :param str target: The name of the node.
+
+        :rtype float:
+        """
+        return self.distances.get(target, float('inf'))
+
+    def path(self, target):
+        """
+        Returns the names of the nodes on a shortest path from the source to
+        target, or an empty list if it can't be reached.
+
+        :param str target: The name of the node.
+
+        :rtype list(str):
+        """
+        return path(self.predecessors, self.source, target)
+
+class ShortestPathCache(object):
+    """
+    Keeps the shortest path trees of the most recently used sources. Entries
+    are keyed by source and graphism.graph.Graph.version(), so a tree computed
+    before the topology changed is never returned. Edge lengths are assumed not
+    to change; call graphism.graph.Graph.topology_changed() if they do.
+
+    :param int size: The number of trees to keep.
+    """
+    def __init__(self, size=16):
+        self.size = size
+        self.__trees = collections.OrderedDict()
+        self.__version = None
+
+    def __len__(self):
+        return len(self.__trees)
+
+    def clear(self):
+        """
+        Drops every cached tree.
+
+        """
+        self.__trees.clear()
+
+    def tree(self, graph, source):
+        """
+        Returns the shortest path tree of source, computing it if it isn't
+        cached.
+
+        :param graphism.graph.Graph graph: The graph source belongs to.
+        :param graphism.node.Node source: The source.
+
+        :rtype ShortestPathTree:
+        """
+        if graph.version() != self.__version:
+            self.__trees.clear()
+            self.__version = graph.version()
+        key = (source.name(), graph.version())
+        tree = self.__trees.pop(key, None)
+        if tree is None:
+            distances, predecessors = dijkstra(source)
+            tree = ShortestPathTree(source.name(), distances, predecessors)
+            while self.__trees and len(self.__trees) >= self.size:
+                self.__trees.popitem(last=False)
+        self.__trees[key] = tree
+        return tree
@@ -0,0 +1,204 @@
+import numpy
+
+from graphism.sir import SUSCEPTIBLE, INFECTED, RECOVERED
+
+class Recorder(object):
+    """
+    Records a simulation into preallocated, columnar numpy arrays: the
+    susceptible, infected and recovered counts of every step, and for every
+    node the time it was infected, the time it recovered and the id of the
+    node that infected it. Nothing is allocated per event, so it keeps up with
+    graphism.sir.SIREngine on graphs with millions of nodes.
+
+    .. code-block:: python
+
+        recorder = Recorder(graph.names)
+        engine = SIREngine(graph, recorder=recorder)
+        engine.infect_seeds(seeds)
+        engine.run(100)
+        recorder.save('run.npz')
+
+    Node ids are positions in names. Times a node wasn't infected or didn't
+    recover are NaN, and seeds and uninfected nodes have infector -1.
+
+    :param names: The name of each node.
+    :param int steps: The number of steps to allocate counts for. The arrays grow as needed.
+    """
+    def __init__(self, names, steps=64):
+        self.names = names
+        n = len(names)
+        self.infection_time = numpy.empty(n, dtype=numpy.float64)
+        self.infection_time.fill(numpy.nan)
+        self.recovery_time = numpy.empty(n, dtype=numpy.float64)
+        self.recovery_time.fill(numpy.nan)
+        self.infector = -numpy.ones(n, dtype=numpy.int64)
+        self.__counts = numpy.zeros((max(steps, 1) + 1, 3), dtype=numpy.int64)
+        self.__steps = -1
+        self.__index = None
+
+    def index(self, name):
+        """
+        Returns the id of the node named name.
+
+        :param str name: The name.
+
+        :rtype int:
+        """
+        if self.__index is None:
+            self.__index = dict((name, i) for i, name in enumerate(self.names))
+        return self.__index[name]
+
+    def record_counts(self, step, susceptible, infected, recovered):
+        """
+        Records the compartment counts after step. Recording the same step
+        again overwrites it.
+
+        :param int step: The step. 0 is the state before the first step.
+        :param int susceptible: The number of susceptible nodes.
+        :param int infected: The number of infected nodes.
+        :param int recovered: The number of recovered nodes.
+        """
+        self.__reserve(step)
+        counts = self.__counts[step]
+        counts[SUSCEPTIBLE] = susceptible
+        counts[INFECTED] = infected
+        counts[RECOVERED] = recovered
+        self.__steps = max(self.__steps, step)
+
+    def fill_counts(self, start, end, susceptible, infected, recovered):
+        """
+        Records the same compartment counts for every step from start up to
+        end, e.g. for steps skipped because the state can't change anymore.
+
+        :param int start: The first step.
+        :param int end: The step after the last one.
+        :param int susceptible: The number of susceptible nodes.
+        :param int infected: The number of infected nodes.
+        :param int recovered: The number of recovered nodes.
+        """
+        if end <= start:
+            return
+        self.__reserve(end - 1)
+        counts = self.__counts[start:end]
+        counts[:, SUSCEPTIBLE] = susceptible
+        counts[:, INFECTED] = infected
+        counts[:, RECOVERED] = recovered
+        self.__steps = max(self.__steps, end - 1)
+
+    def __reserve(self, step):
+        if step >= len(self.__counts):
+            counts = numpy.zeros((max(step + 1, 2 * len(self.__counts)), 3), dtype=numpy.int64)
+            counts[:len(self.__counts)] = self.__counts
+            self.__counts = counts
+
+    def clear(self):
+        """
+        Forgets every recorded count, time and infector, e.g. when the
+        simulation starts over.
+
+        """
+        self.infection_time.fill(numpy.nan)
+        self.recovery_time.fill(numpy.nan)
+        self.infector.fill(-1)
+        self.__counts.fill(0)
+        self.__steps = -1
+
+    def record_infections(self, ids, time, infectors=-1):
+        """
+        Records that the nodes ids were infected at time.
+
+        :param numpy.ndarray ids: The ids of the infected nodes.
+        :param float time: The time of the infections.
+        :param numpy.ndarray infectors: The id of the node that infected each node. -1 for seeds.
+        """
+        self.infection_time[ids] = time
+        self.infector[ids] = infectors
+
+    def record_recoveries(self, ids, time):
+        """
+        Records that the nodes ids recovered at time.
+
+        :param numpy.ndarray ids: The ids of the recovered nodes.
+        :param float time: The time of the recoveries.
+        """
+        self.recovery_time[ids] = time
+
+    def record_infection(self, name, time, infector=None):
+        """
+        Records that the node named name was infected at time.
+
+        :param str name: The name of the infected node.
+        :param float time: The time of the infection.
+        :param str infector: The name of the node that infected it. None for seeds.
+        """
+        i = self.index(name)
+        self.infection_time[i] = time
+        self.infector[i] = -1 if infector is None else self.index(infector)
+
+    def record_recovery(self, name, time):
+        """
+        Records that the node named name recovered at time.
+
+        :param str name: The name of the recovered node.
+        :param float time: The time of the recovery.
+        """
+        self.recovery_time[self.index(name)] = time
+
+    def counts(self):
+        """
+        Returns the recorded counts up to the last recorded step.
+
+        :rtype dict(str, numpy.ndarray): The time, susceptible, infected and recovered counts.
+        """
+        counts = self.__counts[:self.__steps + 1]
+        return {'time': numpy.arange(len(counts), dtype=numpy.float64),
+                'susceptible': counts[:, SUSCEPTIBLE],
+                'infected': counts[:, INFECTED],
+                'recovered': counts[:, RECOVERED]}
+
+    def transmission_tree(self):
+        """
+        Returns the recorded transmissions as parallel arrays of node ids.
+
+        :rtype tuple(numpy.ndarray, numpy.ndarray): The infector and the infected node of each transmission.
+        """
+        infected = numpy.flatnonzero(self.infector >= 0)
+        return self.infector[infected], infected
+
+    def save(self, path):
+        """
+        Writes the recording to an .npz file. Node names are saved when they're
+        all strings or all integers.
+
+        :param str path: The file to write.
+        """
+        arrays = dict(self.counts())
+        arrays['infection_time'] = self.infection_time
+        arrays['recovery_time'] = self.recovery_time
+        arrays['infector'] = self.infector
+        names = list(self.names)
+        if all(isinstance(name, basestring) for name in names):
+            arrays['names'] = numpy.array(names, dtype=unicode)
+        elif all(isinstance(name, (int, long, numpy.integer)) for name in names):
+            arrays['names'] = numpy.array(names, dtype=numpy.int64)
+        numpy.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a recording written by save.
+
+        :param str path: The file to read.
+
+        :rtype Recorder:
+        """
+        with numpy.load(path) as arrays:
+            n = len(arrays['infector'])
+            names = arrays['names'].tolist() if 'names' in arrays.files else range(n)
+            recorder = cls(names, steps=len(arrays['time']))
+            recorder.infection_time[:] = arrays['infection_time']
+            recorder.recovery_time[:] = arrays['recovery_time']
+            recorder.infector[:] = arrays['infector']
+            for step in xrange(len(arrays['time'])):
+                recorder.record_counts(step, arrays['susceptible'][step], arrays['infected'][step], arrays['recovered'][step])
+        return recorder
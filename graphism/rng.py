@@ -0,0 +1,121 @@
+import os
+import struct
+import functools
+import itertools
+
+import numpy
+
+def entropy():
+    """
+    Returns a fresh seed from os.urandom.
+
+    :rtype list(int):
+    """
+    return list(struct.unpack('4I', os.urandom(16)))
+
+class RandomStream(object):
+    """
+    A seedable stream of random numbers backed by numpy.random.RandomState.
+    random() hands out uniforms from a buffer that's refilled with one array
+    draw, so it can stand in for the random module wherever single draws are
+    made:
+
+    .. code-block:: python
+
+        stream = RandomStream(42)
+        graph = Graph(edges, rng=stream)
+        workers = stream.spawn(8) # Independent streams for parallel workers
+
+    A stream is identified by its key, the seed followed by the index of each
+    spawn that led to it, so the same seed reproduces every stream exactly.
+
+    :param seed: An int or a list of ints. Drawn from os.urandom when omitted.
+    :param int buffer_size: The number of uniforms drawn at a time.
+    """
+    def __init__(self, seed=None, buffer_size=4096):
+        if seed is None:
+            seed = entropy()
+        self.__key = list(seed) if isinstance(seed, (list, tuple)) else [seed]
+        self.__state = numpy.random.RandomState(self.__key)
+        self.__buffer_size = buffer_size
+        self.__spawned = 0
+        self.random = functools.partial(next, itertools.chain.from_iterable(self.__buffers()))
+
+    def __buffers(self):
+        while True:
+            yield self.__state.random_sample(self.__buffer_size).tolist()
+
+    def key(self):
+        """
+        Returns the key of the stream. RandomStream(key) starts the same stream.
+
+        :rtype list(int):
+        """
+        return list(self.__key)
+
+    def state(self):
+        """
+        Returns the numpy.random.RandomState the stream draws from, for array
+        draws.
+
+        :rtype numpy.random.RandomState:
+        """
+        return self.__state
+
+    def random_sample(self, size):
+        """
+        Returns an array of size uniforms on [0,1).
+
+        :param int size: The number of uniforms.
+
+        :rtype numpy.ndarray:
+        """
+        return self.__state.random_sample(size)
+
+    def spawn(self, n):
+        """
+        Returns n new streams that are independent of this one and of each
+        other. Streams spawned later get new keys, so they don't repeat
+        earlier ones.
+
+        :param int n: The number of streams.
+
+        :rtype list(RandomStream):
+        """
+        streams = [RandomStream(self.__key + [self.__spawned + i], self.__buffer_size) for i in xrange(n)]
+        self.__spawned += n
+        return streams
+
+def random_state(seed=None):
+    """
+    Returns the numpy.random.RandomState an engine should draw from.
+
+    :param seed: A RandomStream or numpy.random.RandomState to draw from, or a seed for a new numpy.random.RandomState.
+
+    :rtype numpy.random.RandomState:
+    """
+    if isinstance(seed, RandomStream):
+        return seed.state()
+    if isinstance(seed, numpy.random.RandomState):
+        return seed
+    return numpy.random.RandomState(seed)
+
+def spawn_state(seed=None):
+    """
+    Returns a numpy.random.RandomState that's independent of
+    random_state(seed), for draws that mustn't shift the main stream. A
+    RandomStream spawns a stream, an int or a list of ints is extended with
+    an index the way RandomStream.spawn extends keys, and a
+    numpy.random.RandomState gives the seed of the new state from one draw.
+
+    :param seed: A RandomStream or numpy.random.RandomState, or the seed given to random_state.
+
+    :rtype numpy.random.RandomState:
+    """
+    if isinstance(seed, RandomStream):
+        return seed.spawn(1)[0].state()
+    if isinstance(seed, numpy.random.RandomState):
+        return numpy.random.RandomState(seed.randint(2 ** 31, size=4))
+    if seed is None:
+        seed = entropy()
+    return numpy.random.RandomState((list(seed) if isinstance(seed, (list, tuple)) else [seed]) + [0])
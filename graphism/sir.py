@@ -0,0 +1,334 @@
+import numpy
+
+from graphism.cache import probabilities, default_transmission_probability
+from graphism.rng import random_state
+
+SUSCEPTIBLE = 0
+INFECTED = 1
+RECOVERED = 2
+
+def expand_rows(indptr, rows):
+    """
+    Returns the positions in the CSR arrays of every edge stored in the given
+    rows, in row order, along with the row each position belongs to.
+
+    :param numpy.ndarray indptr: The CSR row offsets.
+    :param numpy.ndarray rows: The row (node) ids to expand.
+
+    :rtype tuple(numpy.ndarray, numpy.ndarray): The edge positions and their source rows.
+    """
+    starts = indptr[rows]
+    counts = indptr[rows + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        empty = numpy.zeros(0, dtype=numpy.int64)
+        return empty, empty
+    offsets = numpy.cumsum(counts) - counts
+    positions = numpy.repeat(starts - offsets, counts) + numpy.arange(total)
+    return positions, numpy.repeat(rows, counts)
+
+def skip_sample(random, probability, n):
+    """
+    Returns the indices of the successes among n independent trials with the
+    same probability, in order. The gaps between successes are drawn from a
+    geometric distribution, so the cost is proportional to the number of
+    successes rather than to n.
+
+    :param numpy.random.RandomState random: The random number generator.
+    :param float probability: The probability of success of each trial.
+    :param int n: The number of trials.
+
+    :rtype numpy.ndarray:
+    """
+    if probability <= 0.0 or n == 0:
+        return numpy.zeros(0, dtype=numpy.int64)
+    if probability >= 1.0:
+        return numpy.arange(n, dtype=numpy.int64)
+    hits = []
+    last = -1
+    while True:
+        expected = (n - last - 1) * probability
+        gaps = random.geometric(probability, int(expected + 4 * numpy.sqrt(expected)) + 16)
+        indices = last + numpy.cumsum(gaps)
+        hits.append(indices[indices < n])
+        if indices[-1] >= n:
+            return numpy.concatenate(hits)
+        last = indices[-1]
+
+def uniform_probability(probability):
+    """
+    Returns probability as a float when it's an array holding the same value
+    for every entry, so the engines can draw only the successful trials, see
+    skip_sample. Anything else is returned as it is.
+
+    :param probability: Either a float or an array of probabilities.
+
+    :rtype float:
+    """
+    if isinstance(probability, numpy.ndarray) and len(probability) and (probability == probability[0]).all():
+        return float(probability[0])
+    return probability
+
+def run_steps(step, counts, steps, active, until=None):
+    """
+    Calls step up to steps times and collects the counts before the first
+    step and after every step. Once active() is false the state can't change,
+    so stepping stops and the remaining rows are filled in with the last
+    counts. When until() is true, which is checked before the first step and
+    after every step, stepping stops and the rows end at that step.
+
+    :param function step: Advances the simulation by one step.
+    :param function counts: Returns the current counts, as a sequence or an array.
+    :param int steps: The largest number of steps.
+    :param function active: Returns whether a step can still change the state.
+    :param function until: Returns True to stop.
+
+    :rtype tuple(numpy.ndarray, int): The counts, indexed by step first, and the number of steps taken.
+    """
+    first = numpy.asarray(counts(), dtype=numpy.int64)
+    rows = numpy.zeros((steps + 1,) + first.shape, dtype=numpy.int64)
+    rows[0] = first
+    if until is not None and until():
+        return rows[:1], 0
+    t = 0
+    while t < steps and active():
+        step()
+        t += 1
+        rows[t] = counts()
+        if until is not None and until():
+            return rows[:t + 1], t
+    rows[t + 1:] = rows[t]
+    return rows, t
+
+class SIREngine(object):
+    """
+    Steps an SIR epidemic over a graphism.compact.CompactGraph with batched
+    array operations. The state of each node is kept in a uint8 array
+    (SUSCEPTIBLE, INFECTED or RECOVERED) and each step draws every
+    transmission trial from the infected frontier and every recovery trial at
+    once.
+
+    One call to step() is equivalent in distribution to one call to
+    graphism.graph.Graph.propagate(): every susceptible neighbor of an infected
+    node is exposed once per step, nodes infected during the step start
+    transmitting on the next step, and recovery is then tried for every
+    infected node, including the ones infected during the step.
+
+    When every edge has the same transmission probability only the successful
+    trials are drawn, see skip_sample.
+
+    :param graphism.compact.CompactGraph graph: The graph to simulate on. A graphism.graph.Graph is compacted first.
+    :param transmission_probability: Either a float, or an array with the transmission probability of each stored edge. Defaults as described in graphism.cache.probabilities.
+    :param recovery_probability: Either a float, or an array with the recovery probability of each node. Defaults as described in graphism.cache.probabilities.
+    :param seed: The seed for the engine's random number generator, or a graphism.rng.RandomStream to draw from.
+    :param graphism.recorder.Recorder recorder: Records the counts of every step and when and by whom each node was infected. Must be built for the names of the compact graph, or pass True to have one built, see recorder().
+    :param function infection: Executed once per step, and once per call to infect_ids, with the array of ids of the newly infected nodes. Not executed when no node was infected.
+    :param function recovery: Executed once per step with the array of ids of the newly recovered nodes. Not executed when no node recovered.
+    """
+    def __init__(self, graph, transmission_probability=None, recovery_probability=None, seed=None, recorder=None,
+                 infection=None, recovery=None):
+        graph, transmission_probability, recovery_probability = probabilities(graph, transmission_probability, recovery_probability)
+        self.__graph = graph
+
+        self.__transmission_probability = uniform_probability(transmission_probability)
+        self.__recovery_probability = recovery_probability
+
+        self.__random = random_state(seed)
+
+        self.__state = numpy.zeros(len(graph), dtype=numpy.uint8)
+        self.__infected = numpy.zeros(0, dtype=numpy.int64)
+        self.__counts = [len(graph), 0, 0]
+
+        self.__steps = 0
+        if recorder is True:
+            from graphism.recorder import Recorder
+            recorder = Recorder(graph.names)
+        self.__recorder = recorder
+        self.__infection = infection
+        self.__recovery = recovery
+        if recorder is not None:
+            recorder.record_counts(0, *self.__counts)
+
+    def graph(self):
+        """
+        Getter for the graph the engine simulates on.
+
+        :rtype graphism.compact.CompactGraph:
+        """
+        return self.__graph
+
+    def state(self):
+        """
+        Returns the state array. Indexed by node id.
+
+        :rtype numpy.ndarray:
+        """
+        return self.__state
+
+    def infected(self):
+        """
+        Returns the ids of the infected nodes.
+
+        :rtype numpy.ndarray:
+        """
+        return self.__infected
+
+    def steps(self):
+        """
+        Returns the number of steps taken.
+
+        :rtype int:
+        """
+        return self.__steps
+
+    def recorder(self):
+        """
+        Getter for the recorder, or None when the engine doesn't record.
+
+        :rtype graphism.recorder.Recorder:
+        """
+        return self.__recorder
+
+    def n_susceptible(self):
+        """
+        Returns the number of susceptible nodes.
+
+        :rtype int:
+        """
+        return self.__counts[SUSCEPTIBLE]
+
+    def n_infected(self):
+        """
+        Returns the number of infected nodes.
+
+        :rtype int:
+        """
+        return self.__counts[INFECTED]
+
+    def n_recovered(self):
+        """
+        Returns the number of recovered nodes.
+
+        :rtype int:
+        """
+        return self.__counts[RECOVERED]
+
+    def infect_seeds(self, seed_nodes):
+        """
+        Infects the seed nodes.
+
+        :param list(str) seed_nodes: The names of the nodes to start the infection with.
+        """
+        ids = numpy.array([self.__graph.get_node_by_name(name) for name in seed_nodes], dtype=numpy.int64)
+        self.infect_ids(ids)
+
+    def infect_ids(self, ids):
+        """
+        Infects the susceptible nodes among ids.
+
+        :param numpy.ndarray ids: The node ids to infect.
+        """
+        ids = numpy.unique(ids)
+        ids = ids[self.__state[ids] == SUSCEPTIBLE]
+        self.__state[ids] = INFECTED
+        self.__infected = numpy.concatenate((self.__infected, ids))
+        self.__counts[SUSCEPTIBLE] -= len(ids)
+        self.__counts[INFECTED] += len(ids)
+
+        recorder = self.__recorder
+        if recorder is not None:
+            recorder.record_infections(ids, self.__steps)
+            recorder.record_counts(self.__steps, *self.__counts)
+        if self.__infection is not None and len(ids):
+            self.__infection(ids)
+
+    def step(self):
+        """
+        Advances the epidemic by one step. First infects nodes according to the
+        probability of transmission, then recovers nodes according to the
+        probability of recovery.
+
+        :rtype tuple(numpy.ndarray, numpy.ndarray): The ids of the newly infected and the newly recovered nodes.
+        """
+        graph = self.__graph
+        state = self.__state
+        infected = self.__infected
+
+        probability = self.__transmission_probability
+        if isinstance(probability, numpy.ndarray):
+            positions, sources = expand_rows(graph.indptr, infected)
+            exposed = state[graph.indices[positions]] == SUSCEPTIBLE
+            positions = positions[exposed]
+            sources = sources[exposed]
+
+            hits = self.__random.random_sample(len(positions)) < probability[positions]
+            positions = positions[hits]
+            sources = sources[hits]
+        else:
+            positions, sources = self.__skip_trials(infected, probability)
+        targets = graph.indices[positions]
+        exposed = state[targets] == SUSCEPTIBLE
+        positions = positions[exposed]
+        sources = sources[exposed]
+        newly_infected, first = numpy.unique(targets[exposed], return_index=True)
+
+        state[newly_infected] = INFECTED
+        infected = numpy.concatenate((infected, newly_infected))
+
+        probability = self.__recovery_probability
+        if isinstance(probability, numpy.ndarray):
+            probability = probability[infected]
+        recovering = self.__random.random_sample(len(infected)) < probability
+        newly_recovered = infected[recovering]
+
+        state[newly_recovered] = RECOVERED
+        self.__infected = infected[~recovering]
+
+        self.__counts[SUSCEPTIBLE] -= len(newly_infected)
+        self.__counts[INFECTED] += len(newly_infected) - len(newly_recovered)
+        self.__counts[RECOVERED] += len(newly_recovered)
+        self.__steps += 1
+
+        recorder = self.__recorder
+        if recorder is not None:
+            # A node exposed by several infected nodes in one step is credited
+            # to the first of them.
+            recorder.record_infections(newly_infected, self.__steps, sources[first])
+            recorder.record_recoveries(newly_recovered, self.__steps)
+            recorder.record_counts(self.__steps, *self.__counts)
+
+        if self.__infection is not None and len(newly_infected):
+            self.__infection(newly_infected)
+        if self.__recovery is not None and len(newly_recovered):
+            self.__recovery(newly_recovered)
+
+        return newly_infected, newly_recovered
+
+    def __skip_trials(self, infected, probability):
+        # Numbers the trials of every edge of the infected nodes, draws the
+        # successful ones and maps them back to edge positions.
+        indptr = self.__graph.indptr
+        starts = indptr[infected]
+        counts = indptr[infected + 1] - starts
+        ends = numpy.cumsum(counts)
+        total = int(ends[-1]) if len(ends) else 0
+        trials = skip_sample(self.__random, probability, total)
+        rows = numpy.searchsorted(ends, trials, side='right')
+        positions = starts[rows] + trials - (ends[rows] - counts[rows])
+        return positions, infected[rows]
+
+    def run(self, steps):
+        """
+        Runs the epidemic for a number of steps. Once no node is infected the
+        state can't change, so the remaining steps are filled in without
+        stepping.
+
+        :param int steps: The number of steps to run.
+
+        :rtype dict(str, numpy.ndarray): The time, susceptible, infected and recovered counts. The first entry is the state before the first step.
+        """
+        counts, _ = run_steps(self.step, lambda: self.__counts, steps, lambda: self.__counts[INFECTED])
+        return {'time': numpy.arange(steps + 1, dtype=numpy.float64),
+                'susceptible': counts[:, SUSCEPTIBLE],
+                'infected': counts[:, INFECTED],
+                'recovered': counts[:, RECOVERED]}
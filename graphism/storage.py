@@ -0,0 +1,216 @@
+"""
+Reads and writes graphism.compact.CompactGraph objects in a binary file
+format that can be memory mapped, so a large graph opens without parsing and
+many processes can share one copy of it through the page cache.
+
+Every integer and float is little-endian. A file starts with a 64 byte header:
+
+========  ======  =============================================================
+Offset    Type    Field
+========  ======  =============================================================
+0         char[8] The magic string GRAPHISM
+8         uint32  The format version, currently 1
+12        uint32  Flags. Bit 0 is set for directed graphs. Bit 1 is set when
+                  node names are integers rather than strings.
+16        uint64  n, the number of nodes
+24        uint64  m, the number of stored edges (the length of indices)
+32        uint64  t, the number of edge types, not counting the None type
+40        byte[]  Reserved, zero
+========  ======  =============================================================
+
+The header is followed by these sections, each starting at an offset that is a
+multiple of 8 bytes:
+
+================  ================  ===========================================
+Section           Type              Contents
+================  ================  ===========================================
+indptr            int64[n+1]        CSR row offsets
+indices           int64[m]          CSR neighbor ids
+weights           float64[m]        Edge weights
+types             int32[m]          Edge type codes. 0 is the None type.
+multiplicity      float64[m]        Edge multiplicities
+degree            float64[n]        Node degrees
+names             int64[n], or      Node names. Integer names are stored
+                  int64[n+1] and    directly. String names are stored as
+                  byte[]            offsets into a UTF-8 blob.
+type names        int64[t+1] and    The names of the edge types 1..t as offsets
+                  byte[]            into a UTF-8 blob.
+================  ================  ===========================================
+
+"""
+import struct
+
+import numpy
+
+from graphism.compact import CompactGraph
+
+MAGIC = 'GRAPHISM'
+VERSION = 1
+HEADER = struct.Struct('<8sIIQQQ24x')
+
+DIRECTED = 1
+INTEGER_NAMES = 2
+
+class NameTable(object):
+    """
+    A read-only sequence of strings stored as offsets into a UTF-8 blob.
+    Strings are decoded when they're accessed.
+
+    :param numpy.ndarray offsets: The start of each string in blob, followed by the end of the last one.
+    :param numpy.ndarray blob: The encoded strings.
+    """
+    def __init__(self, offsets, blob):
+        self.__offsets = offsets
+        self.__blob = blob
+
+    def __len__(self):
+        return len(self.__offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        value = self.__blob[self.__offsets[i]:self.__offsets[i + 1]].tostring()
+        try:
+            value.decode('ascii')
+            return value
+        except UnicodeDecodeError:
+            return value.decode('utf-8')
+
+    def __iter__(self):
+        for i in xrange(len(self)):
+            yield self[i]
+
+class IntegerNameTable(object):
+    """
+    A read-only sequence of integer names backed by an int64 array.
+
+    :param numpy.ndarray names: The names.
+    """
+    def __init__(self, names):
+        self.__names = names
+
+    def __len__(self):
+        return len(self.__names)
+
+    def __getitem__(self, i):
+        return int(self.__names[i])
+
+    def __iter__(self):
+        for name in self.__names.tolist():
+            yield name
+
+def _is_integer(name):
+    return isinstance(name, (int, long, numpy.integer)) and not isinstance(name, bool)
+
+def _encode(strings):
+    encoded = [s.encode('utf-8') if isinstance(s, unicode) else str(s) for s in strings]
+    offsets = numpy.zeros(len(encoded) + 1, dtype='<i8')
+    numpy.cumsum([len(s) for s in encoded], out=offsets[1:])
+    return offsets, ''.join(encoded)
+
+def _pad(fp):
+    fp.write('\0' * (-fp.tell() % 8))
+
+def save(graph, path):
+    """
+    Writes graph to path in the graphism binary format.
+
+    :param graphism.compact.CompactGraph graph: The graph to write.
+    :param str path: The file to write.
+    """
+    names = list(graph.names)
+    integer_names = all(_is_integer(name) for name in names)
+    if not integer_names and not all(isinstance(name, basestring) for name in names):
+        raise ValueError("Node names must be all integers or all strings to be saved.")
+    type_names = graph.type_names[1:]
+
+    flags = (DIRECTED if graph.directed else 0) | (INTEGER_NAMES if integer_names else 0)
+
+    with open(path, 'wb') as fp:
+        fp.write(HEADER.pack(MAGIC, VERSION, flags, len(names), len(graph.indices), len(type_names)))
+        for array, dtype in ((graph.indptr, '<i8'),
+                             (graph.indices, '<i8'),
+                             (graph.weights, '<f8'),
+                             (graph.types, '<i4'),
+                             (graph.multiplicity, '<f8'),
+                             (graph.degree(), '<f8')):
+            fp.write(numpy.asarray(array, dtype=dtype).tostring())
+            _pad(fp)
+
+        if integer_names:
+            fp.write(numpy.array(names, dtype='<i8').tostring())
+        else:
+            offsets, blob = _encode(names)
+            fp.write(offsets.tostring())
+            fp.write(blob)
+            _pad(fp)
+
+        offsets, blob = _encode(type_names)
+        fp.write(offsets.tostring())
+        fp.write(blob)
+        _pad(fp)
+
+def load(path, mmap=True):
+    """
+    Reads a graph written by save. With mmap the file is mapped read-only and
+    the arrays of the graph are views of the mapping, so opening the file
+    costs about the same no matter how large the graph is. Node names are
+    decoded when they're accessed.
+
+    :param str path: The file to read.
+    :param bool mmap: Whether to map the file rather than read it into memory.
+
+    :rtype graphism.compact.CompactGraph:
+    """
+    if mmap:
+        buf = numpy.memmap(path, dtype=numpy.uint8, mode='r')
+    else:
+        buf = numpy.fromfile(path, dtype=numpy.uint8)
+
+    magic, version, flags, n, m, t = HEADER.unpack(buf[:HEADER.size].tostring())
+    if magic != MAGIC:
+        raise ValueError("%s is not a graphism graph file." % path)
+    if version != VERSION:
+        raise ValueError("Unsupported graphism graph file version %s." % version)
+
+    position = [HEADER.size]
+    def section(dtype, count):
+        dtype = numpy.dtype(dtype)
+        start = position[0]
+        end = start + dtype.itemsize * count
+        position[0] = end + (-end % 8)
+        return buf[start:end].view(dtype)
+
+    def blob(offsets):
+        start = position[0]
+        end = start + int(offsets[-1])
+        position[0] = end + (-end % 8)
+        return buf[start:end]
+
+    indptr = section('<i8', n + 1)
+    indices = section('<i8', m)
+    weights = section('<f8', m)
+    types = section('<i4', m)
+    multiplicity = section('<f8', m)
+    degree = section('<f8', n)
+
+    if flags & INTEGER_NAMES:
+        names = IntegerNameTable(section('<i8', n))
+    else:
+        offsets = section('<i8', n + 1)
+        names = NameTable(offsets, blob(offsets))
+
+    offsets = section('<i8', t + 1)
+    type_names = [None] + list(NameTable(offsets, blob(offsets)))
+
+    return CompactGraph(names=names,
+                        indptr=indptr,
+                        indices=indices,
+                        weights=weights,
+                        types=types,
+                        multiplicity=multiplicity,
+                        type_names=type_names,
+                        degree=degree,
+                        directed=bool(flags & DIRECTED))
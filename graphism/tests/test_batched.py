@@ -0,0 +1,77 @@
+import numpy
+
+from graphism.tests import TestApi
+
+from graphism.graph import Graph
+from graphism.batched import BatchedEngine
+from graphism.ensemble import realization_seed
+from graphism.sir import SIREngine, INFECTED, RECOVERED
+
+def complete(n):
+    return Graph([(i, j) for i in xrange(n) for j in xrange(i)])
+
+class BatchedEngineTest(TestApi):
+
+    def test_chain(self):
+        g = Graph([(1,2),(2,3),(3,4)]).compact()
+        engine = BatchedEngine(g, 3, transmission_probability=1.0, recovery_probability=0.0, seed=1)
+        engine.infect_seeds([1], 0)
+        engine.infect_seeds([4], 2)
+        result = engine.run(4)
+
+        assert result['time'].tolist() == [0, 1, 2, 3, 4]
+        assert result['infected'].shape == (3, 5)
+        assert result['infected'][0].tolist() == [1, 2, 3, 4, 4]
+        assert result['infected'][1].tolist() == [0, 0, 0, 0, 0]
+        assert result['infected'][2].tolist() == [1, 2, 3, 4, 4]
+        assert (engine.state()[[0, 2]] == INFECTED).all()
+        assert engine.counts()[1].tolist() == [4, 0, 0]
+
+    def test_realizations_are_independent(self):
+        g = complete(20).compact()
+        results = []
+        for realizations in (1, 4):
+            engine = BatchedEngine(g, realizations, transmission_probability=0.1, recovery_probability=0.3, seed=7)
+            engine.infect_ids([0])
+            results.append(engine.run(30))
+        for compartment in ('susceptible', 'infected', 'recovered'):
+            assert (results[0][compartment][0] == results[1][compartment][0]).all()
+        assert not (results[1]['infected'] == results[1]['infected'][0]).all()
+
+    def test_matches_engine(self):
+        g = complete(30).compact()
+        engine = BatchedEngine(g, 300, transmission_probability=0.02, recovery_probability=0.4, seed=3)
+        engine.infect_ids([0])
+        batched = engine.run(100)['recovered'][:, -1].mean()
+
+        sizes = []
+        for i in xrange(300):
+            sir = SIREngine(g, transmission_probability=0.02, recovery_probability=0.4, seed=realization_seed(5, i))
+            sir.infect_ids([0])
+            sizes.append(sir.run(100)['recovered'][-1])
+        assert abs(batched - numpy.mean(sizes)) < 0.15 * max(batched, numpy.mean(sizes))
+
+    def test_probability_arrays(self):
+        g = Graph([(1,2),(2,3)]).compact()
+        transmission = numpy.zeros(len(g.indices))
+        one = g.get_node_by_name(1)
+        transmission[g.indptr[one]:g.indptr[one + 1]] = 1.0
+        recovery = numpy.zeros(len(g))
+        recovery[one] = 1.0
+        engine = BatchedEngine(g, 2, transmission_probability=transmission, recovery_probability=recovery)
+        engine.infect_seeds([1])
+        engine.step()
+        assert (engine.state()[:, one] == RECOVERED).all()
+        assert (engine.state()[:, g.get_node_by_name(2)] == INFECTED).all()
+        assert engine.run(5)['infected'][:, -1].tolist() == [1, 1]
+
+    def test_graph(self):
+        g = Graph([(1,2),(2,3)], transmission_probability=1.0, recovery_probability=lambda n: 0.0)
+        result = g.run_batched(2, 3, [[g[1]], [g[3]]], seed=2)
+        assert result['infected'][0].tolist() == [1, 2, 3, 3]
+        assert result['infected'][1].tolist() == [1, 2, 3, 3]
+        assert g.n_infected() == 0
+
+        result = g.run_batched(3, 2, [g[2]])
+        assert result['infected'][:, -1].tolist() == [3, 3, 3]
+        assert result['mean']['infected'].tolist() == [1, 3, 3]
@@ -0,0 +1,40 @@
+from graphism.tests import TestApi
+
+from graphism.benchmarks import runner
+from graphism.benchmarks.suite import BENCHMARKS, Benchmark
+
+class BenchmarksTest(TestApi):
+
+    def test_benchmarks_run(self):
+        for name in BENCHMARKS:
+            result = runner.measure(name, 100, repeat=1)
+
+            assert result['name'] == name
+            assert result['size'] == 100
+            assert result['min'] >= 0.0
+            assert result['peak_rss'] >= result['setup_rss'] > 0
+
+    def test_run(self):
+        results = runner.run(['propagate_step'], sizes=[100, 10 ** 9], repeat=2, isolate=False)
+
+        assert [r['size'] for r in results['results']] == [100]
+        assert results['results'][0]['repeat'] == 2
+        assert 'python' in results
+
+    def test_compare(self):
+        old = {'results': [{'name': 'a', 'size': 10, 'min': 1.0, 'peak_rss': 1},
+                           {'name': 'b', 'size': 10, 'min': 1.0, 'peak_rss': 1},
+                           {'name': 'c', 'size': 10, 'min': 1.0, 'peak_rss': 1}]}
+        new = {'results': [{'name': 'a', 'size': 10, 'min': 2.0, 'peak_rss': 2},
+                           {'name': 'b', 'size': 10, 'min': 0.5, 'peak_rss': 1},
+                           {'name': 'c', 'size': 10, 'min': 1.05, 'peak_rss': 1},
+                           {'name': 'd', 'size': 10, 'min': 1.0, 'peak_rss': 1}]}
+
+        rows = runner.compare(old, new)
+
+        assert [(row['name'], row['change']) for row in rows] == [('a', 'regression'), ('b', 'improvement'), ('c', '')]
+        assert rows[0]['ratio'] == 2.0
+        assert 'regression' in runner.format_comparison(rows)
+
+    def test_run_is_abstract(self):
+        self.assertRaises(TypeError, Benchmark)
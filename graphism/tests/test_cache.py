@@ -0,0 +1,123 @@
+import numpy
+
+from graphism.tests import TestApi
+
+from graphism.graph import Graph
+from graphism.node import Node
+from graphism.compact import CompactGraph
+from graphism.cache import ProbabilityCache, probabilities
+from graphism.sir import SIREngine
+
+class ProbabilityCacheTest(TestApi):
+
+    def test_arrays(self):
+        g = Graph([(1,2),(1,3),(2,3)], recovery_probability=lambda n: n.name() / 10.0)
+        cache = ProbabilityCache(g)
+        compact = cache.compact()
+
+        for node in g:
+            u = compact.get_node_by_name(node.name())
+            assert cache.recovery()[u] == node.name() / 10.0
+            for k in range(compact.indptr[u], compact.indptr[u+1]):
+                child = g.get_node_by_name(compact.name(compact.indices[k]))
+                assert cache.transmission()[k] == node.transmission_probability(child)
+                assert cache.transmission_probability(node, child) == node.transmission_probability(child)
+
+    def test_functions_are_evaluated_once(self):
+        calls = [0]
+        def trans(a, b):
+            calls[0] += 1
+            return 1.0
+
+        g = Graph([(1,2),(2,3)], transmission_probability=trans, cache_probabilities=True)
+        g.infect_seeds([g.get_node_by_name(1)])
+        g.propagate()
+        g.propagate()
+
+        assert calls[0] == 4, calls[0]
+
+        engine = SIREngine(g, seed=1)
+
+        assert calls[0] == 4
+
+    def test_invalidation(self):
+        g = Graph([(1,2),(2,3)], cache_probabilities=True)
+        cache = g.probability_cache()
+
+        assert cache.transmission_probability(g[1], g[2]) == 1.0
+
+        g.set_transmission_probability(lambda a, b: 0.25)
+
+        assert cache.transmission_probability(g[1], g[2]) == 0.25
+
+        g.set_recovery_probability(lambda n: 0.75)
+
+        assert cache.recovery_probability(g[1]) == 0.75
+
+        version = g.version()
+        g.add_edge_by_node_sequence(1, 4)
+
+        assert g.version() > version
+        assert len(cache.compact()) == 4
+        assert cache.transmission_probability(g[1], g[4]) == 0.25
+
+    def test_node_setters_invalidate(self):
+        g = Graph([(1,2),(2,3)], cache_probabilities=True, transmission_probability=0.0)
+        cache = g.probability_cache()
+        g.infect_seeds([g[1]])
+
+        assert cache.homogeneous_probability() == 0.0
+
+        g[1].set_transmission_probability(lambda a, b: 1.0)
+        g.propagate()
+
+        assert g.n_susceptible() == 1
+        assert cache.transmission_probability(g[1], g[2]) == 1.0
+
+        g[2].set_recovery_probability(lambda n: 0.5)
+
+        assert cache.recovery_probability(g[2]) == 0.5
+
+    def test_disable(self):
+        g = Graph([(1,2)], cache_probabilities=True)
+
+        assert g.probability_cache() is not None
+
+        g.cache_probabilities(False)
+
+        assert g.probability_cache() is None
+
+    def test_is_homogeneous(self):
+        g = Graph([(1,2),(2,3)], transmission_probability=lambda a, b: 0.1)
+        assert ProbabilityCache(g).is_homogeneous()
+
+        g = Graph([(1,2),(2,3)])
+        assert not ProbabilityCache(g).is_homogeneous()
+
+    def test_homogeneous_probability(self):
+        g = Graph([(1,2),(2,3)], transmission_probability=lambda a, b: 0.1, cache_probabilities=True)
+
+        assert g.probability_cache().homogeneous_probability() == 0.1
+        assert g[1].homogeneous_transmission_probability() == 0.1
+
+        g.set_transmission_probability(lambda a, b: a.name() / 10.0)
+
+        assert g.probability_cache().homogeneous_probability() is None
+        assert g[1].homogeneous_transmission_probability() is None
+
+    def test_probabilities(self):
+        c = CompactGraph.from_edges([(1,2)])
+
+        graph, transmission, recovery = probabilities(c)
+
+        assert graph is c
+        assert list(transmission) == [1.0, 1.0]
+        assert recovery == 0.5
+
+        g = Graph([(1,2)], recovery_probability=lambda n: 0.1)
+
+        graph, transmission, recovery = probabilities(g, transmission_probability=0.3)
+
+        assert isinstance(graph, CompactGraph)
+        assert transmission == 0.3
+        assert list(recovery) == [0.1, 0.1]
@@ -0,0 +1,85 @@
+import numpy
+
+from graphism.tests import TestApi
+
+from graphism.graph import Graph
+from graphism.compact import CompactGraph
+from graphism import centrality
+
+class CentralityTest(TestApi):
+
+    def test_bfs(self):
+        g = CompactGraph.from_edges([(0,1),(1,2),(2,3),(4,5)])
+
+        distances = centrality.bfs(g, 0)
+
+        assert list(distances[:4]) == [0.0, 1.0, 2.0, 3.0]
+        assert numpy.isinf(distances[4:]).all()
+
+    def test_dijkstra(self):
+        g = CompactGraph.from_edges([{'from_': 0, 'to_': 1, 'weight_': 1.0},
+                                     {'from_': 1, 'to_': 2, 'weight_': 1.0},
+                                     {'from_': 0, 'to_': 2, 'weight_': 5.0}])
+
+        distances = centrality.dijkstra(g, g.weights, 0)
+
+        assert list(distances) == [0.0, 1.0, 2.0]
+
+    def test_edge_lengths(self):
+        g = Graph([(1,2),(2,3)], length=lambda e: 2.0)
+
+        compact, lengths = centrality.edge_lengths(g)
+
+        assert len(lengths) == len(compact.indices)
+        assert (lengths == 2.0).all()
+
+    def test_closeness(self):
+        g = Graph([(1,2),(2,3),(3,4)])
+
+        closeness = g.closeness_centrality()
+
+        assert closeness[1] == 3.0 / 6.0
+        assert closeness[2] == 3.0 / 4.0
+
+        g = Graph([(1,2),(2,3),(3,4)], length=lambda e: 2.0)
+
+        assert g.closeness_centrality()[2] == 3.0 / 8.0
+
+    def test_disconnected(self):
+        g = Graph([(1,2),(3,4),(4,5)])
+
+        closeness = g.closeness_centrality()
+
+        assert closeness[1] == (1.0 / 4.0) * 1.0
+        assert closeness[4] == (2.0 / 4.0) * 1.0
+
+    def test_harmonic(self):
+        g = Graph([(1,2),(2,3),(3,4),(5,6)])
+
+        harmonic = g.harmonic_centrality()
+
+        assert harmonic[1] == 1.0 + 1.0 / 2 + 1.0 / 3
+        assert harmonic[5] == 1.0
+
+    def test_workers(self):
+        g = CompactGraph.from_edges([(i, i + 1) for i in range(20)])
+
+        serial = centrality.harmonic(g)
+        parallel = centrality.harmonic(g, workers=2)
+
+        assert numpy.allclose(serial['centrality'], parallel['centrality'])
+        assert serial['error'] == 0.0
+
+    def test_pivots(self):
+        g = CompactGraph.from_edges([(i, (i + 1) % 200) for i in range(200)])
+
+        exact = centrality.closeness(g)
+        sampled = centrality.closeness(g, pivots=50, seed=1)
+
+        assert sampled['error'] > 0.0
+        error = numpy.abs(1.0 / sampled['centrality'] - 1.0 / exact['centrality'])
+        assert (error <= sampled['error']).all()
+
+        sampled = centrality.harmonic(g, pivots=50, seed=1)
+        exact = centrality.harmonic(g)
+        assert (numpy.abs(sampled['centrality'] - exact['centrality']) <= sampled['error']).all()
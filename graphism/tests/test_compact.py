@@ -0,0 +1,117 @@
+import unittest
+import random
+
+import numpy
+
+from graphism.tests import TestApi
+
+from graphism.graph import Graph
+from graphism.compact import CompactGraph
+
+class CompactGraphTest(TestApi):
+
+    def test_from_edges(self):
+        g = CompactGraph.from_edges([(1,2),(1,3),(1,4),(2,1)])
+
+        assert len(g) == 4
+        assert g.number_of_edges() == 3
+
+        one = g.get_node_by_name(1)
+        two = g.get_node_by_name(2)
+
+        assert sorted(g.name(i) for i in g.neighbors(one)) == [2, 3, 4]
+        assert [g.name(i) for i in g.neighbors(two)] == [1]
+        assert g.degree(one) == 4, "Expected 4, got %s" % g.degree(one)
+        assert g.degree(two) == 2
+        assert g.get_node_by_name(5) is None
+
+    def test_from_edges_directed(self):
+        g = CompactGraph.from_edges([(1,2),(2,3)], directed=True)
+
+        assert list(g.neighbors(g.get_node_by_name(1))) == [g.get_node_by_name(2)]
+        assert list(g.neighbors(g.get_node_by_name(3))) == []
+        assert g.number_of_edges() == 2
+
+    def test_from_graph(self):
+        g = Graph(edges=[{'from_': 1, 'to_': 2, 'type_': 'first', 'weight_': 2.0},
+                         {'from_': 1, 'to_': 3, 'type_': 'second', 'weight_': 3.0},
+                         {'from_': 2, 'to_': 1}])
+        c = g.compact()
+
+        assert set(c) == set([1, 2, 3])
+        for node in g:
+            i = c.get_node_by_name(node.name())
+            assert c.degree(i) == node.degree()
+            assert set(c.name(j) for j in c.neighbors(i)) == set(n.name() for n in node)
+
+        edges = dict(((from_, to_), (weight_, type_, multiplicity)) for from_, to_, weight_, type_, multiplicity in c.edges())
+        assert edges[(1, 2)] == (2.0, 'first', 2.0), edges
+        assert edges[(1, 3)] == (3.0, 'second', 1.0), edges
+
+    def test_export(self):
+        g = CompactGraph.from_edges([(1,2),(2,3),(3,4)])
+
+        g_copy = Graph(edges=g.export())
+
+        assert set(n.name() for n in g_copy) == set(g)
+        assert len(g_copy.edges()) == 3
+
+    def test_from_edge_arrays(self):
+        src = numpy.array([3, 1, 1, 2, 1])
+        dst = numpy.array([1, 2, 3, 1, 2])
+        weight = numpy.array([4.0, 2.0, 3.0, 5.0, 6.0])
+        type_ = numpy.array(['a', None, 'b', 'c', 'd'], dtype=object)
+
+        g = CompactGraph.from_edge_arrays(src, dst, weight=weight, type=type_)
+
+        assert g.names == [1, 2, 3]
+        edges = dict(((from_, to_), (weight_, t, m)) for from_, to_, weight_, t, m in g.edges())
+        assert edges == {(1, 2): (2.0, None, 3.0), (1, 3): (4.0, 'a', 2.0)}, edges
+        assert list(g.degree()) == [5.0, 3.0, 2.0]
+        for i in range(len(g)):
+            row = list(g.neighbors(i))
+            assert row == sorted(row)
+
+    def test_from_edge_arrays_matches_graph(self):
+        edges = [(random.randint(0, 30), random.randint(0, 30)) for i in range(200)]
+        edges = [(a, b) for a, b in edges if a != b]
+        edges += [(a, a) for a, b in edges[:10]]
+
+        g = Graph(edges)
+        c = CompactGraph.from_edge_arrays(numpy.array([a for a, b in edges]),
+                                          numpy.array([b for a, b in edges]))
+
+        for node in g:
+            i = c.get_node_by_name(node.name())
+            assert c.degree(i) == node.degree()
+            for k in range(c.indptr[i], c.indptr[i+1]):
+                assert c.multiplicity[k] == node[c.name(c.indices[k])].multiplicity
+
+    def test_from_edge_chunks(self):
+        chunks = [(numpy.array([1, 2]), numpy.array([2, 3])),
+                  (numpy.array([3, 1]), numpy.array([4, 2]), numpy.array([1.0, 7.0]), None)]
+
+        g = CompactGraph.from_edge_chunks(iter(chunks))
+
+        assert len(g) == 4
+        assert g.number_of_edges() == 3
+        assert g.multiplicity[g.indptr[g.get_node_by_name(1)]] == 2.0
+
+    def test_mixed_names(self):
+        g = CompactGraph.from_edges([(1, '1'), ('1', 'a')])
+
+        assert len(g) == 3
+        assert g.get_node_by_name(1) is not None
+        assert g.get_node_by_name('1') is not None
+
+    def test_to_graph(self):
+        c = CompactGraph.from_edges([(1,2),(2,1),(2,3)])
+
+        g = c.to_graph(transmission_probability=lambda a, b: 1.0)
+
+        assert g.get_node_by_name(1).degree() == 2
+        assert g.get_node_by_name(2).degree() == 3
+        assert g.get_node_by_name(1)[2].multiplicity == 2
+        assert g.get_transmission_probability()(None, None) == 1.0
+        g.infect_seeds([g.get_node_by_name(1)])
+        assert g.n_infected() == 1
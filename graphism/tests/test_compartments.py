@@ -0,0 +1,100 @@
+import numpy
+
+from graphism.tests import TestApi
+
+from graphism.graph import Graph
+from graphism.compartments import CompartmentModel, CompartmentEngine, Induced, Spontaneous, sir, sis, seir, sirs
+from graphism.sir import SIREngine
+
+def chain(n):
+    return Graph([(i, i + 1) for i in xrange(n - 1)]).compact()
+
+class CompartmentTest(TestApi):
+
+    def test_validation(self):
+        self.assertRaises(ValueError, CompartmentModel, ('a', 'a'), [])
+        self.assertRaises(ValueError, CompartmentModel, ('a', 'b'), [Spontaneous('a', 'c', 0.5)])
+        self.assertRaises(ValueError, CompartmentModel, ('a', 'b'), [Induced('a', 'b', by=('c',))])
+        model = CompartmentModel(('a', 'b'), [Spontaneous('b', 'a', 0.5)])
+        assert model.seed_state == 'b'
+        assert model.index('b') == 1
+        assert model.active_states() == [1]
+
+    def test_sir_chain(self):
+        engine = CompartmentEngine(chain(5), sir(), transmission_probability=1.0, recovery_probability=0.0)
+        engine.infect_seeds([0])
+        result = engine.run(6)
+        assert result['infected'].tolist() == [1, 2, 3, 4, 5, 5, 5]
+        assert result['susceptible'].tolist() == [4, 3, 2, 1, 0, 0, 0]
+        assert engine.counts() == {'susceptible': 0, 'infected': 5, 'recovered': 0}
+
+    def test_sir_matches_engine(self):
+        graph = Graph([(i, j) for i in xrange(30) for j in xrange(i)]).compact()
+        sizes = []
+        for engine_type in ('compartment', 'sir'):
+            size = []
+            for i in xrange(300):
+                if engine_type == 'sir':
+                    engine = SIREngine(graph, transmission_probability=0.02, recovery_probability=0.4, seed=i)
+                else:
+                    engine = CompartmentEngine(graph, sir(), transmission_probability=0.02, recovery_probability=0.4, seed=i)
+                engine.infect_ids([0])
+                size.append(engine.run(100)['recovered'][-1])
+            sizes.append(numpy.mean(size))
+        assert abs(sizes[0] - sizes[1]) < 0.15 * max(sizes)
+
+    def test_seir(self):
+        engine = CompartmentEngine(chain(3), seir(incubation_probability=1.0), transmission_probability=1.0, recovery_probability=0.0)
+        engine.infect_seeds([0])
+        state = engine.state
+        model = engine.model()
+        engine.step()
+        assert [model.states[s] for s in state()] == ['infected', 'exposed', 'susceptible']
+        engine.step()
+        assert [model.states[s] for s in state()] == ['infected', 'infected', 'exposed']
+
+    def test_sis(self):
+        engine = CompartmentEngine(chain(2), sis(), transmission_probability=1.0, recovery_probability=1.0)
+        engine.infect_seeds([0])
+        engine.step()
+        assert engine.counts() == {'susceptible': 2, 'infected': 0}
+        result = engine.run(3)
+        assert result['susceptible'].tolist() == [2, 2, 2, 2]
+
+    def test_sirs(self):
+        engine = CompartmentEngine(chain(2), sirs(waning_probability=1.0), transmission_probability=0.0, recovery_probability=1.0)
+        engine.infect_seeds([0])
+        engine.step()
+        assert engine.count('recovered') == 1
+        engine.step()
+        assert engine.count('susceptible') == 2
+        result = engine.run(2)
+        assert result['susceptible'].tolist() == [2, 2, 2]
+
+    def test_arrays(self):
+        graph = chain(4)
+        transmission = numpy.zeros(len(graph.indices))
+        transmission[graph.indptr[1]:graph.indptr[2]] = 1.0
+        recovery = numpy.array([1.0, 0.0, 0.0, 0.0])
+        engine = CompartmentEngine(graph, sir(), transmission_probability=transmission, recovery_probability=recovery)
+        engine.infect_seeds([0, 1])
+        engine.step()
+        assert engine.state().tolist() == [2, 1, 1, 0]
+
+    def test_callback(self):
+        calls = []
+        engine = CompartmentEngine(chain(3), sir(), transmission_probability=1.0, recovery_probability=1.0,
+                                   callback=lambda transition, ids: calls.append((transition.target, ids.tolist())))
+        engine.infect_seeds([0])
+        engine.run(5)
+        assert calls == [('infected', [1]), ('recovered', [0, 1])]
+
+    def test_counts_match_state(self):
+        graph = Graph([(i, j) for i in xrange(40) for j in xrange(i) if (i + j) % 3 == 0]).compact()
+        for model in (sir(), sis(), seir(0.3), sirs(0.2)):
+            engine = CompartmentEngine(graph, model, transmission_probability=0.3, recovery_probability=0.2, seed=5)
+            engine.infect_ids([0, 1])
+            for t in xrange(30):
+                engine.step()
+                counts = numpy.bincount(engine.state(), minlength=len(model.states))
+                assert counts.tolist() == [engine.count(state) for state in model.states]
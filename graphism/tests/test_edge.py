@@ -37,4 +37,32 @@ class EdgeTest(TestApi):
         assert e_d['length'](e) == 1.0
         assert e_d['type_'] == None
         assert e_d['directed'] == False 
-        
\ No newline at end of file
+        
+    def test_slots(self):
+        parent = Node()
+        child = Node()
+
+        e = Edge(weakref.ref(parent), weakref.ref(child))
+
+        assert not hasattr(e, '__dict__')
+        assert e.parent_name == parent.name()
+        assert e.child_name == child.name()
+        assert e.length() == 1.0
+
+    def test_cleanup_references(self):
+        parent = Node()
+        child = Node()
+        Edge(weakref.ref(parent), weakref.ref(child))
+
+        ref, = parent.children()
+
+        assert ref == weakref.ref(child)
+        assert weakref.ref(child) == ref
+        assert ref.edge is parent.edges()[child.name()]
+        assert parent.is_parent_of(child)
+
+        del child
+
+        assert parent.children() == set()
+        assert parent.edges() == {}
+        assert parent.degree() == 0
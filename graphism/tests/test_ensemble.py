@@ -0,0 +1,69 @@
+import numpy
+
+from graphism.tests import TestApi
+
+from graphism.graph import Graph
+from graphism.compact import CompactGraph
+from graphism import ensemble
+from graphism.parallel import chunks
+
+def complete_graph(n):
+    return CompactGraph.from_edges([(i, j) for i in range(n) for j in range(n) if i != j])
+
+class EnsembleTest(TestApi):
+
+    def test_chunks(self):
+        assert chunks(range(5), 2) == [[0, 1, 2], [3, 4]]
+        assert chunks(range(2), 4) == [[0], [1]]
+        assert chunks(range(4), 1) == [range(4)]
+
+    def test_run(self):
+        g = complete_graph(30)
+
+        result = ensemble.run(g, seeds=[0, 1], steps=20, realizations=8,
+                              transmission_probability=0.01, recovery_probability=0.1, seed=5)
+
+        assert result['infected'].shape == (8, 21)
+        assert (result['infected'][:, 0] == 2).all()
+        assert result['mean']['infected'].shape == (21,)
+        totals = result['susceptible'] + result['infected'] + result['recovered']
+        assert (totals == 30).all()
+
+    def test_workers_reproduce_serial_run(self):
+        g = complete_graph(30)
+
+        serial = ensemble.run(g, seeds=[0], steps=15, realizations=6, workers=1,
+                              transmission_probability=0.02, recovery_probability=0.1, seed=11)
+        parallel = ensemble.run(g, seeds=[0], steps=15, realizations=6, workers=3,
+                                transmission_probability=0.02, recovery_probability=0.1, seed=11)
+
+        for compartment in ensemble.COMPARTMENTS:
+            assert (serial[compartment] == parallel[compartment]).all()
+
+    def test_realizations_are_independent(self):
+        g = complete_graph(30)
+
+        result = ensemble.run(g, seeds=[0], steps=15, realizations=10,
+                              transmission_probability=0.02, recovery_probability=0.1, seed=3)
+
+        assert len(set(tuple(curve) for curve in result['recovered'])) > 1
+
+    def test_realization_seed(self):
+        assert ensemble.realization_seed(5, 2) == [5, 2]
+        assert ensemble.realization_seed([5, 6], 2) == [5, 6, 2]
+
+    def test_run_without_seed(self):
+        g = complete_graph(10)
+
+        result = ensemble.run(g, seeds=[0], steps=5, realizations=2,
+                              transmission_probability=0.1, recovery_probability=0.1)
+
+        assert result['infected'].shape == (2, 6)
+
+    def test_run_on_graph(self):
+        g = Graph([(1,2),(2,3),(3,4)])
+
+        result = ensemble.run(g, seeds=[1], steps=5, realizations=2,
+                              transmission_probability=1.0, recovery_probability=0.0, seed=1)
+
+        assert list(result['infected'][0]) == [1, 2, 3, 4, 4, 4]
@@ -0,0 +1,136 @@
+import numpy
+
+from graphism.tests import TestApi
+
+from graphism.graph import Graph
+from graphism.compact import CompactGraph
+from graphism.generators import barabasi_albert as ba
+from graphism.generators import uniform as ug
+
+class BarabasiAlbertTest(TestApi):
+
+    def test_barabasi_albert(self):
+        g = ba.barabasi_albert(2, 100)
+
+        assert g.n_susceptible() == 100
+        assert len(g.edges()) == 1 + 2 * 98
+        for node in g:
+            assert node.degree() >= 1
+        assert g.get_node_by_name('100').degree() == 2
+
+    def test_seed_graph(self):
+        seed_graph = Graph([(1,2),(2,3),(3,1),(4,5)])
+
+        g = ba.barabasi_albert(3, 50, seed_graph)
+
+        assert g is seed_graph
+        assert g.n_susceptible() == 50
+        assert g.get_node_by_name('6') is not None
+        assert g.get_node_by_name('50').degree() == 3
+
+    def test_compact(self):
+        g = ba.barabasi_albert(3, 1000, compact=True)
+
+        assert isinstance(g, CompactGraph)
+        assert len(g) == 1000
+        assert g.degree().sum() == 2 * (1 + 3 * 997 + 2)
+
+    def test_edges(self):
+        seed_graph = CompactGraph.from_edges([(1,2),(2,1),(2,3)])
+
+        src, dst = ba.barabasi_albert_edges(2, 10, seed_graph)
+
+        assert len(src) == len(dst) == 3 + 2 * 7
+        assert list(src[3:5]) == ['4', '4']
+        assert set(dst[3:5]) <= set([1, 2, 3])
+
+    def test_preferential_attachment(self):
+        endpoints = ['hub'] * 98 + ['a', 'b']
+
+        hits = sum(ba.choose_endpoints(endpoints, 1, 3) == ['hub'] for i in range(1000))
+
+        assert hits > 900
+
+    def test_choose_nodes(self):
+        g = Graph([(1,2),(1,3),(1,4)])
+
+        chosen = ba.choose_nodes(g, 2)
+
+        assert len(chosen) == 2
+        assert len(set(chosen)) == 2
+        assert ba.choose_nodes(g, 10) != []
+
+class UniformTest(TestApi):
+
+    def test_build(self):
+        g = ug.build(5)
+
+        assert g.n_susceptible() == 5
+        assert g.get_node_by_name('1').degree() == 8
+
+    def test_implicit(self):
+        g = ug.build(1000, implicit=True, seed=1)
+
+        assert isinstance(g, ug.MeanFieldGraph)
+        assert len(g) == 1000
+        assert g.n_susceptible() == 1000
+
+        g.infect_seeds(['1', '2', '2'])
+
+        assert g.infected() == set(['1', '2'])
+        assert g.n_susceptible() == 998
+
+        g.propagate()
+
+        assert g.n_susceptible() + g.n_infected() + g.n_recovered() == 1000
+        assert g.n_susceptible() < 998
+        assert len(g.infected()) == g.n_infected()
+        assert len(g.recovered()) == g.n_recovered()
+        assert '1' not in g.susceptible()
+        assert not g.infected() & g.recovered()
+
+    def test_names_dont_change_counts(self):
+        counts = []
+        for read in (False, True):
+            g = ug.build(1000, implicit=True, seed=3)
+            g.infect_seeds(['1'])
+            infected = []
+            for i in range(10):
+                g.propagate()
+                if read:
+                    g.infected()
+                infected.append(g.n_infected())
+            counts.append(infected)
+
+        assert counts[0] == counts[1]
+
+    def test_implicit_matches_graph(self):
+        g = ug.build(30)
+        mean_field = ug.MeanFieldGraph(30, seed=3)
+        trials = 200
+        graph_infected = 0
+        mean_field_infected = 0
+        for i in range(trials):
+            g.reset_state()
+            g.infect_seeds([g.get_node_by_name('1')])
+            g.propagate()
+            graph_infected += g.n_infected() + g.n_recovered()
+
+            mean_field.reset_state()
+            mean_field.infect_seeds(['1'])
+            mean_field.propagate()
+            mean_field_infected += mean_field.n_infected() + mean_field.n_recovered()
+
+        assert abs(graph_infected - mean_field_infected) / float(trials) < 1.5
+
+    def test_run(self):
+        g = ug.MeanFieldGraph(10 ** 6, transmission_probability=1e-6, recovery_probability=0.2, seed=1)
+        g.infect_seeds([str(i) for i in range(1, 101)])
+
+        result = g.run(100)
+
+        assert len(result['infected']) == 101
+        assert result['infected'][0] == 100
+        assert result['recovered'][-1] > 100
+        total = result['susceptible'] + result['infected'] + result['recovered']
+        assert (total == 10 ** 6).all()
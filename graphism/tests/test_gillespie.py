@@ -0,0 +1,68 @@
+import numpy
+
+from graphism.tests import TestApi
+
+from graphism.compact import CompactGraph
+from graphism.sir import SIREngine, RECOVERED
+from graphism.gillespie import GillespieEngine, rate, sample
+
+class GillespieEngineTest(TestApi):
+
+    def test_rate(self):
+        assert rate(0.0) == 0.0
+        assert rate(1.0) == float('inf')
+        assert abs(1.0 - numpy.exp(-rate(0.3)) - 0.3) < 1e-12
+
+    def test_run_to_extinction(self):
+        g = CompactGraph.from_edges([(i, j) for i in range(30) for j in range(30) if i != j])
+        engine = GillespieEngine(g, transmission_probability=0.05, recovery_probability=0.2, seed=2)
+        engine.infect_seeds([0])
+
+        result = engine.run()
+
+        assert result['infected'][0] == 1
+        assert result['infected'][-1] == 0
+        assert (numpy.diff(result['time']) >= 0).all()
+        assert ((result['susceptible'] + result['infected'] + result['recovered']) == 30).all()
+
+        infector = engine.infector()
+        for node_id in numpy.flatnonzero(engine.state() == RECOVERED):
+            if node_id != g.get_node_by_name(0):
+                assert infector[node_id] >= 0
+
+    def test_max_time(self):
+        g = CompactGraph.from_edges([(1,2),(2,3)])
+        engine = GillespieEngine(g, transmission_probability=1.0, recovery_probability=0.0, seed=1)
+        engine.infect_seeds([1])
+
+        result = engine.run(max_time=10.0)
+
+        assert result['infected'][-1] == 3
+        assert engine.time() == 0.0
+
+    def test_sample(self):
+        result = {'time': numpy.array([0.0, 0.5, 2.5]),
+                  'susceptible': numpy.array([2, 1, 1]),
+                  'infected': numpy.array([1, 2, 1]),
+                  'recovered': numpy.array([0, 0, 1])}
+
+        sampled = sample(result, numpy.arange(4))
+
+        assert list(sampled['infected']) == [1, 2, 2, 1]
+        assert list(sampled['recovered']) == [0, 0, 0, 1]
+
+    def test_comparable_with_discrete_model(self):
+        g = CompactGraph.from_edges([(i, j) for i in range(40) for j in range(40) if i != j])
+
+        continuous = []
+        discrete = []
+        for r in xrange(200):
+            engine = GillespieEngine(g, transmission_probability=0.002, recovery_probability=0.05, seed=r)
+            engine.infect_seeds([0, 1, 2, 3, 4])
+            continuous.append(sample(engine.run(max_time=20.0), [20.0])['recovered'][0])
+
+            engine = SIREngine(g, transmission_probability=0.002, recovery_probability=0.05, seed=r)
+            engine.infect_seeds([0, 1, 2, 3, 4])
+            discrete.append(engine.run(20)['recovered'][-1])
+
+        assert abs(numpy.mean(continuous) - numpy.mean(discrete)) < 1.0, (numpy.mean(continuous), numpy.mean(discrete))
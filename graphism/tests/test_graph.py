@@ -3,6 +3,8 @@ import random
 import time
 import weakref
 
+import numpy
+
 from graphism.tests import TestApi
 
 from graphism.node import Node
@@ -215,6 +217,7 @@ class GraphTest(TestApi):
         
         closeness, path = g.closeness(one, four)
         assert closeness == 3.0
+        assert path == [1, 2, 3, 4]
 
         g = Graph([(1,2),(2,3),(3,4)],
                   length=lambda e: e.weight_/2.0)
@@ -225,6 +228,13 @@ class GraphTest(TestApi):
         closeness, path = g.closeness(one, four)
         
         assert closeness == 1.5
+
+    def test_distances_from(self):
+        g = Graph([(1,2),(2,3),(4,5)])
+
+        assert g.distances_from(g[1]) == {1: 0.0, 2: 1.0, 3: 2.0}
+        assert g.closeness(g[1], g[5]) == (float('inf'), [])
+        assert g.shortest_path_tree(g[1]) is g.shortest_path_tree(g[1])
         
     def test_get_set_transmission_probability_function(self):
         g = Graph([(1,2),(2,3),(3,4)]) 
@@ -288,4 +298,334 @@ class GraphTest(TestApi):
         for node in g:
             assert node.name() in [n.name() for n in g_copy.nodes()]
         
-        
\ No newline at end of file
+        
+    def test_compartment_counts(self):
+        g = Graph([(1,2),(1,3),(1,4),(1,5)],
+                  transmission_probability=lambda a, b: 1.0,
+                  recovery_probability=lambda n: 0.0)
+
+        assert g.n_susceptible() == 5
+        assert g.n_infected() == 0
+        assert g.n_recovered() == 0
+
+        g.infect_seeds([g.get_node_by_name(1)])
+
+        assert g.n_susceptible() == 4
+        assert g.n_infected() == 1
+
+        g.propagate()
+
+        assert g.n_susceptible() == 0
+        assert g.n_infected() == 5
+        assert g.n_infected() == len(g.infected())
+
+        g.set_recovery_probability(lambda n: 1.0)
+        g.recover()
+
+        assert g.n_infected() == 0
+        assert g.n_recovered() == 5
+
+    def test_compartment_views(self):
+        g = Graph([(1,2),(1,3)])
+
+        infected = g.infected_view()
+        susceptible = g.susceptible_view()
+
+        assert len(infected) == 0
+        assert len(susceptible) == 3
+
+        g.infect_seeds([g.get_node_by_name(1)])
+
+        assert list(infected) == [g.get_node_by_name(1)]
+        assert len(susceptible) == 2
+        assert len(g.recovered_view()) == 0
+
+    def test_propagate_defers_new_infections(self):
+        g = Graph([(1,2),(2,3),(3,4)],
+                  transmission_probability=lambda a, b: 1.0,
+                  recovery_probability=lambda n: 0.0)
+        g.infect_seeds([g.get_node_by_name(1)])
+
+        g.propagate()
+
+        assert g.n_infected() == 2
+        assert g.is_susceptible(g.get_node_by_name(3))
+
+    def test_reset_state(self):
+        g = Graph([(1,2),(2,3),(3,4)],
+                  transmission_probability=lambda a, b: 1.0,
+                  recovery_probability=lambda n: 0.5)
+        edges = len(g.edges())
+        g.infect_seeds([g.get_node_by_name(1)])
+        for i in range(3):
+            g.propagate()
+
+        g.reset_state()
+
+        assert g.n_susceptible() == 4
+        assert g.n_infected() == 0
+        assert g.n_recovered() == 0
+        assert len(g.edges()) == edges
+
+        g.infect_seeds([g.get_node_by_name(4)])
+
+        assert g.n_infected() == 1
+
+    def test_snapshot_and_restore(self):
+        g = Graph([(1,2),(2,3),(3,4)],
+                  transmission_probability=lambda a, b: 1.0,
+                  recovery_probability=lambda n: 0.0)
+        g.infect_seeds([g.get_node_by_name(1)])
+        g.propagate()
+        g.set_recovery_probability(lambda n: 1.0)
+        g.recover()
+        g.infect_seeds([g.get_node_by_name(3)])
+
+        snapshot = g.snapshot()
+
+        assert set(snapshot['recovered']) == set([1, 2])
+        assert set(snapshot['infected']) == set([3])
+
+        g.set_recovery_probability(lambda n: 0.0)
+        g.propagate()
+
+        assert g.n_infected() == 2
+
+        g.restore(snapshot)
+
+        assert set(n.name() for n in g.infected()) == set([3])
+        assert set(n.name() for n in g.recovered()) == set([1, 2])
+        assert set(n.name() for n in g.susceptible()) == set([4])
+
+    def test_from_edge_arrays(self):
+        g = Graph.from_edge_arrays(['1', '1', '2', '2'], ['2', '3', '1', '3'],
+                                   weight=[1.0, 2.0, 3.0, 4.0],
+                                   recovery_probability=lambda n: 0.0)
+
+        one = g.get_node_by_name('1')
+        two = g.get_node_by_name('2')
+        three = g.get_node_by_name('3')
+
+        assert one.degree() == 3
+        assert two.degree() == 3
+        assert three.degree() == 2
+        assert one['2'].multiplicity == 2
+        assert one['3'].weight_ == 2.0
+        assert three in list(two)
+        assert g.get_recovery_probability()(one) == 0.0
+
+    def test_from_compact_bumps_version_once(self):
+        from graphism.compact import CompactGraph
+        compact = CompactGraph.from_edges([(1,2),(2,3),(3,4),(4,1)])
+
+        g = Graph.from_compact(compact)
+
+        assert g.version() == 1
+        assert g[1].degree() == 2
+
+    def test_from_compact_directed(self):
+        from graphism.compact import CompactGraph
+        compact = CompactGraph.from_edges([(1,2),(2,3)], directed=True)
+
+        directed = Graph.from_compact(compact)
+        undirected = Graph.from_compact(compact, directed=False)
+
+        assert directed[1][2].directed
+        assert not undirected[1][2].directed
+        assert Graph.from_edge_arrays([1, 2], [2, 3], directed=True).compact().directed
+        assert not Graph.from_edge_arrays([1, 2], [2, 3]).compact().directed
+
+    def test_from_compact_parents_and_children(self):
+        from graphism.compact import CompactGraph
+        compact = CompactGraph.from_edges([(1,2),(2,1),(2,3)], directed=True)
+
+        for cleanup in (True, False):
+            g = Graph.from_compact(compact, cleanup_references=cleanup)
+
+            assert g[1].is_parent_of(g[2]) and g[2].is_parent_of(g[1])
+            assert g[1].is_child_of(g[2]) and g[2].is_child_of(g[1])
+            assert g[3].is_child_of(g[2]) and not g[3].is_parent_of(g[2])
+
+    def test_remove_node(self):
+        g = Graph([(1,2),(1,3),(2,3),(2,3),(3,4)])
+        g.infect_seeds([g[3]])
+        version = g.version()
+
+        removed = g.remove_node(3)
+
+        assert removed.name() == 3
+        assert removed.edges() == {}
+        assert g[3] is None
+        assert g.n_infected() == 0
+        assert g.n_susceptible() == 3
+        assert sorted(g[2].neighbor_names()) == [1]
+        assert g[2].degree() == 1
+        assert g[4].degree() == 0
+        assert g[4].edges() == {}
+        assert not g[1].is_parent_of(removed)
+        assert g.version() > version
+        self.assertRaises(KeyError, g.remove_node, 3)
+
+    def test_remove_edge(self):
+        g = Graph([(1,2),(1,2),(2,3)])
+
+        g.remove_edge(2, 1)
+
+        assert g[1].edges() == {}
+        assert g[1].degree() == 0
+        assert g[2].degree() == 1
+        assert sorted(g[2].neighbor_names()) == [3]
+        assert not g[1].is_parent_of(g[2])
+        assert len(g.edges()) == 1
+        self.assertRaises(KeyError, g.remove_edge, 1, 2)
+        self.assertRaises(KeyError, g.remove_edge, 1, 5)
+
+    def test_without_cleanup_references(self):
+        g = Graph([(1,2),(2,3),(3,1)], cleanup_references=False)
+
+        assert not g.cleanup_references()
+        assert g[1].is_parent_of(g[2])
+        assert g[2].is_child_of(g[1])
+        assert not g[2].is_parent_of(g[1])
+        assert all(type(ref) is weakref.ref for ref in g[1].children())
+        assert g[1].degree() == 2
+
+        g.infect_seeds([g[1]])
+        g.set_transmission_probability(1.0)
+        g.propagate()
+
+        assert g.n_susceptible() == 0
+
+        g.remove_node(2)
+
+        assert sorted(g[1].neighbor_names()) == [3]
+        assert g[3].degree() == 1
+
+    def test_run(self):
+        g = Graph([(1,2),(2,3),(3,4)],
+                  transmission_probability=1.0,
+                  recovery_probability=lambda n: 1.0 if n.name() == 1 else 0.0)
+        g.infect_seeds([g[1]])
+        result = g.run(5)
+
+        assert result['time'].tolist() == [0, 1, 2, 3, 4, 5]
+        assert result['susceptible'].tolist() == [3, 2, 1, 0, 0, 0]
+        assert result['infected'].tolist() == [1, 1, 2, 3, 3, 3]
+        assert result['recovered'].tolist() == [0, 1, 1, 1, 1, 1]
+
+    def test_run_skips_extinction(self):
+        calls = []
+        g = Graph([(1,2),(2,3)], recovery_probability=lambda n: 1.0,
+                  transmission_probability=lambda a, b: 0.0)
+        g.add_observer(type('Counter', (object,), {'step_started': lambda self, graph, step: calls.append(step),
+                                                   'step_finished': lambda self, graph, statistics: None})())
+        g.infect_seeds([g[1]])
+        result = g.run(1000)
+
+        assert calls == [0]
+        assert len(result['time']) == 1001
+        assert result['recovered'][-1] == 1
+        assert result['infected'][1:].sum() == 0
+
+    def test_run_until(self):
+        g = Graph([(i, i + 1) for i in xrange(10)],
+                  transmission_probability=1.0,
+                  recovery_probability=lambda n: 0.0)
+        g.infect_seeds([g[0]])
+        result = g.run(100, until=lambda graph: graph.n_infected() >= 4)
+
+        assert result['infected'].tolist() == [1, 2, 3, 4]
+        assert g.n_infected() == 4
+
+        result = g.run(100, until=lambda graph: graph.n_infected() >= 4)
+        assert result['infected'].tolist() == [4]
+
+    def test_run_record(self):
+        g = Graph([(1,2),(2,3)],
+                  transmission_probability=1.0,
+                  recovery_probability=lambda n: 0.0)
+        g.infect_seeds([g[1]])
+        result = g.run(3, record=True)
+        recorder = g.recorder()
+
+        for compartment in ('susceptible', 'infected', 'recovered'):
+            assert (recorder.counts()[compartment] == result[compartment]).all()
+        assert recorder.infector[recorder.index(3)] == recorder.index(2)
+
+    def test_run_record_skipped_steps(self):
+        g = Graph([(1,2),(2,3)],
+                  transmission_probability=1.0,
+                  recovery_probability=lambda n: 1.0)
+        g.infect_seeds([g[1]])
+        result = g.run(10, record=True)
+        recorder = g.recorder()
+
+        assert len(recorder.counts()['time']) == 11
+        for compartment in ('susceptible', 'infected', 'recovered'):
+            assert (recorder.counts()[compartment] == result[compartment]).all()
+
+        g.propagate()
+
+        assert len(recorder.counts()['time']) == 12
+        assert recorder.counts()['recovered'][-1] == result['recovered'][-1]
+
+        g.reset_state()
+
+        assert recorder.counts()['susceptible'].tolist() == [3]
+        assert numpy.isnan(recorder.infection_time).all()
+
+    def test_batch_callbacks(self):
+        per_node = []
+        infected = []
+        recovered = []
+        g = Graph([(1,2),(2,3)],
+                  transmission_probability=1.0,
+                  recovery_probability=lambda n: 1.0 if n.name() == 1 else 0.0,
+                  infection=per_node.append,
+                  recovery=per_node.append,
+                  batch_infection=lambda nodes: infected.append(sorted(n.name() for n in nodes)),
+                  batch_recovery=lambda nodes: recovered.append(sorted(n.name() for n in nodes)))
+        g.infect_seeds([g[1]])
+        g.propagate()
+        g.propagate()
+        g.propagate()
+
+        assert infected == [[1], [2], [3]]
+        assert recovered == [[1]]
+        assert per_node == []
+
+        g.set_batch_infection(None)
+        g.reset_state()
+        g.infect_seeds([g[1]])
+        g.propagate()
+        assert infected == [[1], [2], [3]]
+        assert sorted(n.name() for n in per_node) == [1, 2]
+
+    def test_batch_callbacks_observed(self):
+        from graphism.observers import Profiler
+        infected = []
+        g = Graph([(1,2),(2,3)], transmission_probability=1.0,
+                  batch_infection=lambda nodes: infected.append(len(nodes)))
+        g.add_observer(Profiler())
+        g.set_infection(lambda n: self.fail("per-node callback in batched mode"))
+        g.infect_seeds([g[2]])
+        g.propagate()
+        assert infected == [1, 2]
+
+    def test_queries_during_propagate(self):
+        infected = []
+        seen = []
+        g = Graph([(1,2),(1,3)], transmission_probability=1.0, recovery_probability=lambda n: 0.0)
+        g.infect_seeds([g[1]])
+
+        def infection(node):
+            seen.append((g.n_infected(),
+                         [g.get_node_by_name(n.name()) is n for n in infected],
+                         set(infected) <= g.infected(),
+                         set(infected) <= g.nodes()))
+            infected.append(node)
+        g.set_infection(infection)
+        g.propagate()
+
+        assert seen == [(1, [], True, True), (2, [True], True, True)]
+        assert g.n_infected() == 3
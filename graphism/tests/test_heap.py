@@ -0,0 +1,46 @@
+import random
+
+from graphism.tests import TestApi
+
+from graphism.heap import IndexedHeap
+
+class IndexedHeapTest(TestApi):
+
+    def test_pop_order(self):
+        heap = IndexedHeap()
+        priorities = [random.random() for i in range(500)]
+        for key, priority in enumerate(priorities):
+            heap.push(key, priority)
+
+        popped = [heap.pop()[1] for i in range(len(priorities))]
+
+        assert popped == sorted(priorities)
+        assert len(heap) == 0
+
+    def test_change_priority(self):
+        heap = IndexedHeap()
+        heap.push('a', 2.0)
+        heap.push('b', 1.0)
+        heap.push('c', 3.0)
+
+        heap.push('a', 0.5)
+
+        assert len(heap) == 3
+        assert heap.peek() == ('a', 0.5)
+
+        heap.push('a', 5.0)
+
+        assert heap.priority('a') == 5.0
+        assert [heap.pop()[0] for i in range(3)] == ['b', 'c', 'a']
+
+    def test_remove(self):
+        heap = IndexedHeap()
+        for key in range(10):
+            heap.push(key, float(key))
+
+        heap.remove(3)
+        heap.remove(0)
+
+        assert 3 not in heap
+        assert heap.priority(3) is None
+        assert [heap.pop()[0] for i in range(8)] == [1, 2, 4, 5, 6, 7, 8, 9]
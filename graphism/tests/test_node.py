@@ -7,7 +7,7 @@ from graphism.tests import TestApi
 
 from graphism.node import Node
 from graphism.graph import Graph
-from graphism.helpers import rp, tp
+from graphism.helpers import rp, tp, Constant, geometric_skips
 
 import sys
 
@@ -265,9 +265,83 @@ class NodeTest(TestApi):
         target.set_transmission_probability(b)
         
         assert target.get_transmission_probability() == b
-        assert target.transmission_probability(asset) == 0        
+        assert target.transmission_probability(asset) == 0
+
+    def test_constant_transmission_probability(self):
+        g = Graph([(1,2),(2,3)], transmission_probability=0.25)
+
+        assert isinstance(g.get_transmission_probability(), Constant)
+        assert g[1].transmission_probability(g[2]) == 0.25
+        assert g[1].homogeneous_transmission_probability() == 0.25
+        assert Node().homogeneous_transmission_probability() is None
+
+        g[1].set_transmission_probability(1.0)
+        g.infect_seeds([g[1]])
+        g.propagate()
+
+        assert g.n_susceptible() == 1
+
+    def test_geometric_skips(self):
+        random.seed(3)
+
+        hits = [list(geometric_skips(random.random, 0.05, 200)) for i in range(2000)]
+
+        assert abs(sum(len(h) for h in hits) / 2000.0 - 10.0) < 0.3
+        assert all(h == sorted(set(h)) and all(0 <= i < 200 for i in h) for h in hits)
+        assert list(geometric_skips(random.random, 1.0, 3)) == [0, 1, 2]
+        assert list(geometric_skips(random.random, 0.0, 3)) == []
+
+    def test_neighbor_names(self):
+        g = Graph([(1,2),(1,3),(3,1)])
+        one = g[1]
+
+        assert sorted(one.neighbor_names()) == [2, 3]
+        assert one.neighbor_names() is one.neighbor_names()
+        assert sorted(n.name() for n in one) == [2, 3]
+
+        g.add_edge_by_node_sequence(1, 4)
+
+        assert sorted(one.neighbor_names()) == [2, 3, 4]
+
+        one.remove_all_edges_by_name(2)
+
+        assert sorted(one.neighbor_names()) == [3, 4]
+
+    def test_neighbors_without_graph(self):
+        target = Node()
+        neighbors = [Node(), Node()]
+        target.add_parent(neighbors[0])
+        target.add_child(neighbors[1])
+
+        assert set(target) == set(neighbors)
+
+        del neighbors[:]
+
+        assert target.neighbor_names() == ()
+
+    def test_neighbors_outside_graph(self):
+        g = Graph([(1,2)])
+        outsider = Node(name='x')
+        g[1].add_child(outsider)
+
+        assert set(g[1]) == set([g[2], outsider])
+
+    def test_directed_neighbors(self):
+        g = Graph.from_edge_arrays([1, 3], [2, 3], directed=True,
+                                   transmission_probability=lambda parent, child: 1.0,
+                                   recovery_probability=lambda node: 0.0,
+                                   cache_probabilities=True)
+
+        assert g[1].neighbor_names() == (2,)
+        assert g[2].neighbor_names() == ()
+        assert g[3].neighbor_names() == (3,)
+
+        g.infect_seeds([g[2]])
+        g.propagate()
+
+        assert g[1] in g.susceptible()
+        assert g[3] in g.susceptible()
 
 
 if __name__ == '__main__':
     unittest.main()
-            
\ No newline at end of file
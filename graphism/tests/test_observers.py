@@ -0,0 +1,119 @@
+import time
+import StringIO
+
+from graphism.tests import TestApi
+
+from graphism.graph import Graph
+from graphism.node import Node
+from graphism.observers import Observer, Profiler, TimedCallback
+
+class Recorder(Observer):
+
+    def __init__(self):
+        self.started = []
+        self.finished = []
+
+    def step_started(self, graph, step):
+        self.started.append(step)
+
+    def step_finished(self, graph, statistics):
+        self.finished.append(dict(statistics))
+
+class ObserverTest(TestApi):
+
+    def test_statistics(self):
+        g = Graph([(1,2),(1,3),(3,4)],
+                  transmission_probability=lambda a, b: 1.0,
+                  recovery_probability=lambda n: 1.0,
+                  infection=lambda n: time.sleep(0.01))
+        recorder = Recorder()
+        g.add_observer(recorder)
+        g.infect_seeds([g[1]])
+
+        g.propagate()
+        g.propagate()
+
+        assert recorder.started == [0, 1]
+        first, second = recorder.finished
+        assert first['frontier'] == 1
+        assert first['trials'] == 2
+        assert first['transmissions'] == 2
+        assert first['recoveries'] == 3
+        assert first['callback_time'] >= 0.02
+        assert first['duration'] >= first['callback_time']
+        assert second['frontier'] == 0
+        assert second['recoveries'] == 0
+
+    def test_remove_observer(self):
+        g = Graph([(1,2)])
+        recorder = Recorder()
+        g.add_observer(recorder)
+
+        assert g.observers() == (recorder,)
+
+        g.remove_observer(recorder)
+        g.propagate()
+
+        assert g.observers() == ()
+        assert recorder.finished == []
+
+    def test_trials(self):
+        parent = Node(transmission_probability=lambda a, b: 1.0)
+        children = [Node() for i in range(10)]
+        for child in children:
+            parent.add_child(child)
+
+        assert parent.propagate_infection(lambda n: None) == (10, 10)
+        assert parent.propagate_infection(None) == (0, 0)
+
+        parent.set_transmission_probability(0.0)
+
+        assert parent.propagate_infection(lambda n: None, count_trials=True) == (10, 0)
+        assert parent.propagate_infection(lambda n: None) == (None, 0)
+
+    def test_trials_count_susceptible_neighbors(self):
+        for probability in (1.0, lambda a, b: 1.0):
+            g = Graph([(1,2),(1,3),(1,4)], transmission_probability=probability)
+            profiler = Profiler()
+            g.add_observer(profiler)
+            g.infect_seeds([g[1], g[2]])
+            g.propagate()
+
+            statistics = profiler.summary()
+            assert statistics['trials'] == 2, statistics
+
+    def test_timed_callback(self):
+        statistics = {'callback_time': 0.0}
+        callback = TimedCallback(lambda n: time.sleep(0.01) or n, statistics)
+
+        assert callback(3) == 3
+        assert statistics['callback_time'] >= 0.01
+
+        callback.statistics = None
+
+        assert callback(4) == 4
+
+    def test_profiler(self):
+        g = Graph([(i, i + 1) for i in range(30)], transmission_probability=0.5)
+        profiler = Profiler()
+        g.add_observer(profiler)
+        g.infect_seeds([g[0]])
+        while g.n_infected():
+            g.propagate()
+
+        summary = profiler.summary()
+
+        assert summary['steps'] > 0
+        assert summary['recoveries'] == g.n_recovered()
+        assert summary['transmissions'] == g.n_recovered() - 1
+        assert 0.0 <= summary['hit_rate'] <= 1.0
+
+        stream = StringIO.StringIO()
+        profiler.dump(stream)
+
+        assert 'transmissions' in stream.getvalue()
+        assert len(stream.getvalue().splitlines()) == 10
+
+        profiler.reset()
+
+        assert profiler.summary()['steps'] == 0
@@ -0,0 +1,54 @@
+from graphism.tests import TestApi
+
+from graphism.graph import Graph
+from graphism.paths import dijkstra, path, ShortestPathCache
+
+class PathsTest(TestApi):
+
+    def test_dijkstra(self):
+        g = Graph(edges=[{'from_': 1, 'to_': 2, 'weight_': 1.0},
+                         {'from_': 2, 'to_': 3, 'weight_': 1.0},
+                         {'from_': 1, 'to_': 3, 'weight_': 5.0},
+                         {'from_': 3, 'to_': 4, 'weight_': 1.0},
+                         {'from_': 5, 'to_': 6, 'weight_': 1.0}])
+
+        distances, predecessors = dijkstra(g[1])
+
+        assert distances == {1: 0.0, 2: 1.0, 3: 2.0, 4: 3.0}
+        assert predecessors == {2: 1, 3: 2, 4: 3}
+        assert path(predecessors, 1, 4) == [1, 2, 3, 4]
+        assert path(predecessors, 1, 1) == [1]
+        assert path(predecessors, 1, 6) == []
+
+    def test_target(self):
+        g = Graph([(1,2),(2,3),(3,4)])
+
+        distances, predecessors = dijkstra(g[1], g[2])
+
+        assert distances[2] == 1.0
+        assert 4 not in distances
+
+    def test_directed(self):
+        g = Graph.from_edge_arrays([1, 2], [2, 3], directed=True)
+
+        assert dijkstra(g[1])[0] == {1: 0.0, 2: 1.0, 3: 2.0}
+        assert dijkstra(g[3])[0] == {3: 0.0}
+        assert g.closeness(g[2], g[1]) == (float('inf'), [])
+
+    def test_cache(self):
+        g = Graph([(1,2),(2,3)])
+        cache = ShortestPathCache(size=2)
+
+        tree = cache.tree(g, g[1])
+
+        assert cache.tree(g, g[1]) is tree
+        cache.tree(g, g[2])
+        cache.tree(g, g[3])
+        assert len(cache) == 2
+        assert cache.tree(g, g[1]) is not tree
+
+        tree = cache.tree(g, g[1])
+        g.add_edge_by_node_sequence(1, 3)
+
+        assert cache.tree(g, g[1]) is not tree
+        assert cache.tree(g, g[1]).distance(3) == 1.0
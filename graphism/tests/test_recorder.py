@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+
+import numpy
+
+from graphism.tests import TestApi
+
+from graphism.graph import Graph
+from graphism.recorder import Recorder
+from graphism.sir import SIREngine
+
+class RecorderTest(TestApi):
+
+    def test_counts_grow(self):
+        recorder = Recorder(['a', 'b'], steps=1)
+        for step in xrange(10):
+            recorder.record_counts(step, 2, step, 0)
+        counts = recorder.counts()
+        assert counts['time'].tolist() == range(10)
+        assert counts['infected'].tolist() == range(10)
+        assert counts['susceptible'].tolist() == [2] * 10
+
+    def test_fill_counts(self):
+        recorder = Recorder(['a', 'b'], steps=1)
+        recorder.record_counts(0, 1, 1, 0)
+        recorder.fill_counts(1, 5, 0, 0, 2)
+        counts = recorder.counts()
+        assert counts['recovered'].tolist() == [0, 2, 2, 2, 2]
+        assert counts['susceptible'].tolist() == [1, 0, 0, 0, 0]
+
+    def test_defaults(self):
+        recorder = Recorder(['a', 'b'])
+        assert numpy.isnan(recorder.infection_time).all()
+        assert numpy.isnan(recorder.recovery_time).all()
+        assert recorder.infector.tolist() == [-1, -1]
+
+    def test_engine(self):
+        g = Graph([(1,2),(2,3),(3,4)])
+        compact = g.compact()
+        engine = SIREngine(compact, transmission_probability=1.0, recovery_probability=0.0, recorder=True)
+        recorder = engine.recorder()
+        engine.infect_seeds([1])
+        engine.run(5)
+
+        ids = [compact.get_node_by_name(name) for name in (1, 2, 3, 4)]
+        assert recorder.infection_time[ids].tolist() == [0, 1, 2, 3]
+        assert recorder.infector[ids].tolist() == [-1] + ids[:3]
+        assert numpy.isnan(recorder.recovery_time).all()
+        assert recorder.counts()['infected'].tolist() == [1, 2, 3, 4, 4, 4]
+
+        infectors, infected = recorder.transmission_tree()
+        assert sorted(zip(infectors.tolist(), infected.tolist())) == sorted(zip(ids[:3], ids[1:]))
+
+    def test_engine_matches_run(self):
+        g = Graph([(i, i + 1) for i in xrange(50)])
+        compact = g.compact()
+        engine = SIREngine(compact, transmission_probability=0.8, recovery_probability=0.3, seed=3, recorder=True)
+        engine.infect_seeds([0])
+        result = engine.run(200)
+        counts = engine.recorder().counts()
+        steps = len(counts['time'])
+        for compartment in ('susceptible', 'infected', 'recovered'):
+            assert (counts[compartment] == result[compartment][:steps]).all()
+
+        recorder = engine.recorder()
+        infected = ~numpy.isnan(recorder.infection_time)
+        assert infected.sum() == result['recovered'][-1]
+        assert (recorder.recovery_time[infected] >= recorder.infection_time[infected]).all()
+
+    def test_graph(self):
+        g = Graph([('a','b'),('b','c')],
+                  transmission_probability=lambda a, b: 1.0,
+                  recovery_probability=lambda n: 0.0)
+        recorder = g.set_recorder(True)
+        assert g.recorder() is recorder
+        g.infect_seeds([g['a']])
+        g.propagate()
+        g.propagate()
+        g.propagate()
+
+        index = recorder.index
+        assert recorder.infection_time[[index('a'), index('b'), index('c')]].tolist() == [0, 1, 2]
+        assert numpy.isnan(recorder.recovery_time).all()
+        assert recorder.infector[index('a')] == -1
+        assert recorder.infector[index('b')] == index('a')
+        assert recorder.infector[index('c')] == index('b')
+        assert recorder.counts()['infected'].tolist() == [1, 2, 3, 3]
+
+        g.set_recovery_probability(lambda n: 1.0)
+        g.propagate()
+        assert recorder.recovery_time.tolist() == [4, 4, 4]
+        assert recorder.counts()['recovered'].tolist() == [0, 0, 0, 0, 3]
+
+        g.set_recorder(None)
+        g.propagate()
+        assert len(recorder.counts()['time']) == 5
+
+    def test_save_load(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'run.npz')
+            for names in (['a', 'b', 'c'], [1, 2, 3]):
+                recorder = Recorder(names)
+                recorder.record_infection(names[0], 0)
+                recorder.record_infection(names[1], 1, names[0])
+                recorder.record_recovery(names[0], 2)
+                recorder.record_counts(0, 2, 1, 0)
+                recorder.record_counts(1, 1, 2, 0)
+                recorder.save(path)
+
+                loaded = Recorder.load(path)
+                assert list(loaded.names) == names
+                assert loaded.infector.tolist() == [-1, 0, -1]
+                assert numpy.array_equal(loaded.infection_time[:2], [0, 1])
+                assert loaded.recovery_time[0] == 2
+                assert loaded.counts()['infected'].tolist() == [1, 2]
+        finally:
+            shutil.rmtree(directory)
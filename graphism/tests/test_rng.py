@@ -0,0 +1,85 @@
+import random
+
+import numpy
+
+from graphism.tests import TestApi
+
+from graphism.graph import Graph
+from graphism.node import Node
+from graphism.compact import CompactGraph
+from graphism.sir import SIREngine
+from graphism.rng import RandomStream, random_state, spawn_state
+
+class RandomStreamTest(TestApi):
+
+    def test_random(self):
+        stream = RandomStream(5, buffer_size=3)
+
+        draws = [stream.random() for i in range(10)]
+
+        assert draws == numpy.random.RandomState([5]).random_sample(12).tolist()[:10]
+        assert all(0.0 <= u < 1.0 for u in draws)
+
+    def test_spawn(self):
+        stream = RandomStream(5)
+
+        first = stream.spawn(2)
+        second = stream.spawn(1)
+
+        assert [s.key() for s in first + second] == [[5, 0], [5, 1], [5, 2]]
+        assert first[0].random() != first[1].random()
+        assert RandomStream([5, 1]).random() == RandomStream(5).spawn(2)[1].random()
+
+    def test_random_state(self):
+        stream = RandomStream(1)
+        state = numpy.random.RandomState(1)
+
+        assert random_state(stream) is stream.state()
+        assert random_state(state) is state
+        assert isinstance(random_state(3), numpy.random.RandomState)
+
+    def test_spawn_state(self):
+        assert (spawn_state(7).random_sample(5) == spawn_state(7).random_sample(5)).all()
+        assert (spawn_state(7).random_sample(5) != random_state(7).random_sample(5)).all()
+        assert (spawn_state(RandomStream(7)).random_sample(5) == RandomStream(7).spawn(1)[0].random_sample(5)).all()
+
+    def test_graph(self):
+        def outbreak(seed):
+            g = Graph([(i, i + 1) for i in range(50)],
+                      transmission_probability=lambda a, b: 0.6,
+                      rng=RandomStream(seed))
+            g.infect_seeds([g[0]])
+            sizes = []
+            while g.n_infected():
+                g.propagate()
+                sizes.append((g.n_infected(), g.n_recovered()))
+            return sizes
+
+        random.seed(1)
+        first = outbreak(7)
+        random.seed(2)
+
+        assert outbreak(7) == first
+
+    def test_node(self):
+        g = Graph([(1,2)])
+        stream = RandomStream(1)
+
+        assert g.rng() is random
+        assert g[1].rng() is random
+
+        g.set_rng(stream)
+
+        assert g[1].rng() is stream
+        assert Node(rng=stream).rng() is stream
+        assert Node().rng() is random
+
+    def test_engine(self):
+        g = CompactGraph.from_edges([(i, i + 1) for i in range(50)])
+
+        first = SIREngine(g, seed=RandomStream(3))
+        second = SIREngine(g, seed=RandomStream(3))
+        first.infect_seeds([0])
+        second.infect_seeds([0])
+
+        assert (first.run(20)['infected'] == second.run(20)['infected']).all()
@@ -0,0 +1,181 @@
+import unittest
+import random
+
+import numpy
+
+from graphism.tests import TestApi
+
+from graphism.graph import Graph
+from graphism.compact import CompactGraph
+from graphism.sir import SIREngine, expand_rows, skip_sample, uniform_probability, run_steps, default_transmission_probability, SUSCEPTIBLE, INFECTED, RECOVERED
+
+class SIREngineTest(TestApi):
+
+    def test_expand_rows(self):
+        g = CompactGraph.from_edges([(0,1),(0,2),(1,2),(2,3)])
+
+        positions, sources = expand_rows(g.indptr, numpy.array([0, 2]))
+
+        assert list(g.indices[positions]) == [1, 2, 0, 1, 3]
+        assert list(sources) == [0, 0, 2, 2, 2]
+
+    def test_default_transmission_probability(self):
+        g = Graph([(1,2),(1,3),(1,4),(2,1)])
+        c = g.compact()
+
+        probability = default_transmission_probability(c)
+
+        for node in g:
+            i = c.get_node_by_name(node.name())
+            for k in xrange(c.indptr[i], c.indptr[i+1]):
+                child = g.get_node_by_name(c.name(c.indices[k]))
+                assert probability[k] == node.transmission_probability(child)
+
+    def test_skip_sample(self):
+        random = numpy.random.RandomState(1)
+
+        hits = [skip_sample(random, 0.01, 1000) for i in range(2000)]
+
+        assert abs(numpy.mean([len(h) for h in hits]) - 10.0) < 0.3
+        for h in hits[:100]:
+            assert (numpy.diff(h) > 0).all()
+            assert len(h) == 0 or 0 <= h[0] and h[-1] < 1000
+        assert list(skip_sample(random, 1.0, 3)) == [0, 1, 2]
+        assert len(skip_sample(random, 0.0, 3)) == 0
+        assert len(skip_sample(random, 0.5, 0)) == 0
+
+    def test_skip_matches_trials(self):
+        g = CompactGraph.from_edges([(i, j) for i in range(30) for j in range(30) if i != j])
+        probability = numpy.ones(len(g.indices)) * 0.01
+        probability[0] = 0.0100001
+
+        skipped = []
+        drawn = []
+        for r in xrange(300):
+            for sizes, p in ((skipped, 0.01), (drawn, probability)):
+                engine = SIREngine(g, transmission_probability=p, recovery_probability=0.3, seed=r)
+                engine.infect_seeds([0, 1])
+                sizes.append(30 - engine.run(5)['susceptible'][-1])
+
+        assert abs(numpy.mean(skipped) - numpy.mean(drawn)) < 0.5, (numpy.mean(skipped), numpy.mean(drawn))
+
+    def test_uniform_probability(self):
+        assert uniform_probability(numpy.array([0.2, 0.2])) == 0.2
+        assert isinstance(uniform_probability(numpy.array([0.2, 0.2])), float)
+        assert isinstance(uniform_probability(numpy.array([0.2, 0.3])), numpy.ndarray)
+        assert uniform_probability(0.5) == 0.5
+
+    def test_run_steps(self):
+        state = [3]
+        def step():
+            state[0] -= 1
+
+        counts, t = run_steps(step, lambda: state, 5, lambda: state[0])
+
+        assert t == 3
+        assert counts[:, 0].tolist() == [3, 2, 1, 0, 0, 0]
+
+        state[0] = 3
+        counts, t = run_steps(step, lambda: state, 5, lambda: state[0], until=lambda: state[0] == 2)
+
+        assert t == 1
+        assert counts[:, 0].tolist() == [3, 2]
+
+    def test_step(self):
+        g = CompactGraph.from_edges([(1,2),(1,3),(1,4),(4,5)])
+        engine = SIREngine(g, transmission_probability=1.0, recovery_probability=0.0, seed=1)
+        engine.infect_seeds([1])
+
+        assert engine.n_infected() == 1
+
+        newly_infected, newly_recovered = engine.step()
+
+        assert sorted(g.name(i) for i in newly_infected) == [2, 3, 4]
+        assert len(newly_recovered) == 0
+        assert engine.n_infected() == 4
+        assert engine.state()[g.get_node_by_name(5)] == SUSCEPTIBLE
+
+        engine.step()
+
+        assert engine.n_infected() == 5
+        assert engine.n_susceptible() == 0
+
+    def test_recovery(self):
+        g = CompactGraph.from_edges([(1,2),(2,3)])
+        engine = SIREngine(g, transmission_probability=0.0, recovery_probability=1.0, seed=1)
+        engine.infect_seeds([1, 2])
+
+        engine.step()
+
+        assert engine.n_infected() == 0
+        assert engine.n_recovered() == 2
+        assert engine.state()[g.get_node_by_name(1)] == RECOVERED
+
+    def test_run(self):
+        g = CompactGraph.from_edges([(i, j) for i in range(50) for j in range(50) if i != j])
+        engine = SIREngine(g, transmission_probability=0.05, recovery_probability=0.1, seed=3)
+        engine.infect_seeds([0, 1, 2])
+
+        result = engine.run(100)
+
+        assert len(result['infected']) == 101
+        assert result['infected'][0] == 3
+        totals = result['susceptible'] + result['infected'] + result['recovered']
+        assert (totals == 50).all()
+        assert (numpy.diff(result['recovered']) >= 0).all()
+
+    def test_matches_propagate_in_distribution(self):
+        edges = [(i, j) for i in range(20) for j in range(20) if i != j]
+        realizations = 300
+        random.seed(7)
+
+        graph_sizes = []
+        for r in xrange(realizations):
+            g = Graph(edges,
+                      transmission_probability=lambda a, b: 0.02,
+                      recovery_probability=lambda n: 0.3)
+            g.infect_seeds([g.get_node_by_name(0)])
+            for t in xrange(5):
+                g.propagate()
+            graph_sizes.append(20 - len(g.susceptible()))
+
+        engine_sizes = []
+        c = CompactGraph.from_edges(edges)
+        for r in xrange(realizations):
+            engine = SIREngine(c, transmission_probability=0.02, recovery_probability=0.3, seed=r)
+            engine.infect_seeds([0])
+            result = engine.run(5)
+            engine_sizes.append(20 - result['susceptible'][-1])
+
+        assert abs(numpy.mean(graph_sizes) - numpy.mean(engine_sizes)) < 0.5, (numpy.mean(graph_sizes), numpy.mean(engine_sizes))
+
+    def test_constant_probability_matches_function(self):
+        edges = [(i, j) for i in range(20) for j in range(20) if i != j]
+        random.seed(7)
+
+        sizes = {}
+        for transmission_probability in (0.02, lambda a, b: 0.02):
+            sizes[transmission_probability] = []
+            for r in xrange(300):
+                g = Graph(edges,
+                          transmission_probability=transmission_probability,
+                          recovery_probability=lambda n: 0.3)
+                g.infect_seeds([g.get_node_by_name(0)])
+                for t in xrange(5):
+                    g.propagate()
+                sizes[transmission_probability].append(20 - g.n_susceptible())
+
+        skipped, drawn = [numpy.mean(s) for s in sizes.values()]
+        assert abs(skipped - drawn) < 0.5, (skipped, drawn)
+
+    def test_batch_callbacks(self):
+        infected = []
+        recovered = []
+        g = Graph([(1,2),(2,3)]).compact()
+        engine = SIREngine(g, transmission_probability=1.0, recovery_probability=0.0,
+                           infection=infected.append, recovery=recovered.append)
+        engine.infect_seeds([1])
+        engine.run(5)
+
+        assert [ids.tolist() for ids in infected] == [[g.get_node_by_name(1)], [g.get_node_by_name(2)], [g.get_node_by_name(3)]]
+        assert recovered == []
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+
+import numpy
+
+from graphism.tests import TestApi
+
+from graphism.graph import Graph
+from graphism.compact import CompactGraph
+from graphism import storage
+
+class StorageTest(TestApi):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'graph.bin')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assert_same(self, a, b):
+        assert list(a.names) == list(b.names)
+        assert a.directed == b.directed
+        assert a.type_names == b.type_names
+        for attribute in ('indptr', 'indices', 'weights', 'types', 'multiplicity'):
+            assert (getattr(a, attribute) == getattr(b, attribute)).all(), attribute
+        assert (a.degree() == b.degree()).all()
+
+    def test_round_trip_integer_names(self):
+        g = CompactGraph.from_edges([{'from_': 1, 'to_': 2, 'type_': 'first', 'weight_': 2.0},
+                                     {'from_': 2, 'to_': 3, 'type_': 'second'},
+                                     {'from_': 3, 'to_': 1}])
+        g.save(self.path)
+
+        for mmap in (True, False):
+            loaded = CompactGraph.load(self.path, mmap=mmap)
+            self.assert_same(g, loaded)
+            assert loaded.get_node_by_name(3) == g.get_node_by_name(3)
+            assert isinstance(loaded.name(0), int)
+
+    def test_round_trip_string_names(self):
+        g = CompactGraph.from_edges([('a', 'b'), ('b', 'c'), ('a', 'b'), (u'é', 'a')], directed=True)
+        g.save(self.path)
+
+        loaded = storage.load(self.path)
+
+        self.assert_same(g, loaded)
+        assert loaded.get_node_by_name(u'é') == g.get_node_by_name(u'é')
+        assert sorted(loaded.export()) == sorted(g.export())
+
+    def test_mmap_is_read_only(self):
+        CompactGraph.from_edges([(1,2)]).save(self.path)
+
+        loaded = CompactGraph.load(self.path)
+
+        assert isinstance(loaded.indices, numpy.memmap)
+        assert not loaded.indices.flags.writeable
+
+    def test_graph_save(self):
+        g = Graph([(1,2),(2,3),(3,4),(2,1)])
+        g.save(self.path)
+
+        loaded = Graph.load(self.path)
+
+        assert isinstance(loaded, Graph)
+        for node in g:
+            assert loaded.get_node_by_name(node.name()).degree() == node.degree()
+
+    def test_graph_load_mmap(self):
+        Graph([(1,2)]).save(self.path)
+
+        self.assertRaises(TypeError, Graph.load, self.path, mmap=True)
+
+    def test_graph_save_self_edge(self):
+        g = Graph([('a','b'),('b','a'),('a','a')])
+        g.save(self.path)
+
+        loaded = Graph.load(self.path)
+
+        assert loaded['a'].degree() == g['a'].degree() == 4
+        assert loaded['a']['a'].multiplicity == g['a']['a'].multiplicity
+        assert loaded['a']['b'].multiplicity == g['a']['b'].multiplicity
+
+    def test_mixed_names(self):
+        g = CompactGraph.from_edges([(1, 'a')])
+
+        self.assertRaises(ValueError, g.save, self.path)
+
+    def test_bad_magic(self):
+        with open(self.path, 'wb') as fp:
+            fp.write('\0' * 64)
+
+        self.assertRaises(ValueError, storage.load, self.path)
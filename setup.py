@@ -18,6 +18,7 @@ setup(
     "Pygments==1.6",
     "Sphinx==1.2b1",
     "docutils==0.10",
+    "numpy==1.16.6",
     "pyglet==1.1.4",
     "wsgiref==0.1.2"
   ]